@@ -0,0 +1,195 @@
+from src.database import queries as q
+
+# Fake en memoria de la interfaz driver/session/result de neo4j que usa Neo4jService.
+# Responde las consultas conocidas de src/database/queries.py con un dataset sintetico
+# y registra el resto (las escrituras inline) como no-op. Sirve para medir el costo
+# del lado Python sin red ni servidor.
+
+
+class FakeRecord:
+    __slots__ = ("_data",)
+
+    def __init__(self, data):
+        self._data = data
+
+    def data(self):
+        return dict(self._data)
+
+
+class FakeSummary:
+    plan = None
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def __iter__(self):
+        for row in self._rows:
+            yield FakeRecord(row)
+
+    def data(self):
+        return [dict(row) for row in self._rows]
+
+    def consume(self):
+        return FakeSummary()
+
+
+class FakeTransaction:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def run(self, query, parameters=None, **kwargs):
+        return self._driver.execute(query, parameters or {})
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, parameters=None, **kwargs):
+        return self._driver.execute(query, parameters or {})
+
+    def execute_read(self, fn, *args, **kwargs):
+        return fn(FakeTransaction(self._driver), *args, **kwargs)
+
+    def execute_write(self, fn, *args, **kwargs):
+        return fn(FakeTransaction(self._driver), *args, **kwargs)
+
+    def close(self):
+        pass
+
+
+class FakeDriver:
+    def __init__(self, dataset):
+        self.candidates = {c["email"]: c for c in dataset["candidates"]}
+        self.offers = {o["titulo"]: o for o in dataset["offers"]}
+        self.skills = dataset["skills"]
+        self.matches = {}
+        self.compiled = {}
+        self.queries = 0
+        self.unhandled = 0
+
+        self._handlers = {
+            q.CANDIDATE_PROFILE_QUERY: lambda p: [self.candidates[p["email"]]] if p["email"] in self.candidates else [],
+            q.CANDIDATE_PROFILES_BY_EMAIL_QUERY: lambda p: [self.candidates[e] for e in p["emails"] if e in self.candidates],
+            q.ALL_CANDIDATE_PROFILES_QUERY: lambda p: list(self.candidates.values()),
+            q.OFFER_REQUIREMENTS_QUERY: self._find_offer,
+            q.OFFER_REQUIREMENTS_FULLTEXT_QUERY: self._find_offer,
+            q.OFFERS_REQUIREMENTS_BY_TITLES_QUERY: lambda p: [o for t in p["titulos"] for o in self._find_offer({"titulo": t})],
+            q.OFFERS_REQUIREMENTS_BY_TITLES_FULLTEXT_QUERY: self._find_offers,
+            q.SAVE_MATCHING_MATRIX_QUERY: self._save_matrix,
+            q.SKILL_SCORES_FOR_OFFER_QUERY: self._skill_scores,
+            q.ALL_OFFER_REQUIREMENTS_QUERY: lambda p: list(self.offers.values()),
+            q.ALL_SKILLS_QUERY: lambda p: list(self.skills),
+            q.COMPANY_EXISTS_QUERY: lambda p: [{"existe": True}],
+            q.SAVE_MATCHING_SCORE_QUERY: self._save_match,
+            q.SAVE_MATCHING_SCORES_QUERY: self._save_matches,
+            q.COMPILED_OFFER_QUERY: lambda p: [{"compilada": self.compiled.get(p["titulo"])}],
+            q.SAVE_COMPILED_OFFER_QUERY: lambda p: self.compiled.__setitem__(p["titulo"], p["compilada"]) or [],
+            q.SAVE_CANDIDATES_BULK_QUERY: lambda p: [{"candidatos_creados": len(p["candidatos"])}],
+        }
+
+    def session(self, **kwargs):
+        return FakeSession(self)
+
+    def close(self):
+        pass
+
+    def execute(self, query, parameters):
+        self.queries += 1
+        handler = self._handlers.get(query)
+        if handler is None:
+            self.unhandled += 1
+            return FakeResult([])
+        return FakeResult(handler(parameters))
+
+    def _find_offer(self, p):
+        titulo = p["titulo"]
+        if titulo in self.offers:
+            return [self.offers[titulo]]
+        return [o for t, o in self.offers.items() if titulo in t][:1]
+
+    def _find_offers(self, p):
+        # Una fila por oferta con los titulos que la resolvieron (como el collect de la consulta)
+        found = {}
+        for b in p["busquedas"]:
+            for o in self._find_offer(b):
+                found.setdefault(o["titulo"], {**o, "buscados": []})["buscados"].append(b["titulo"])
+        return list(found.values())
+
+    def _save_match(self, p):
+        self.matches[(p["email"], p["oferta_titulo"])] = p["scores"]
+        return []
+
+    def _save_matrix(self, p):
+        for row in p["rows"]:
+            self.matches[(row["email"], row["oferta_titulo"])] = row["scores"]
+        return []
+
+    def _save_matches(self, p):
+        for row in p["rows"]:
+            self.matches[(row["email"], p["oferta_titulo"])] = row["scores"]
+        return []
+
+    def _skill_scores(self, p):
+        # Misma cuenta que SKILL_SCORES_FOR_OFFER_QUERY (paso a paso, como la haria Neo4j)
+        offer = self.offers.get(p["titulo"])
+        if offer is None:
+            return []
+        hoy = p["hoy"]
+        reqs = [r for r in offer["requisitos"] if r["nombre"] is not None]
+        tecnicos = [(r["nombre"], r["nivel_minimo"], 1.5 if r["es_critica"] else 1.0) for r in reqs if r["tipo"] == "Técnica"]
+        blandos = [(r["nombre"], r["nivel_minimo"]) for r in reqs if r["tipo"] == "Blanda"]
+        peso_tecnico = 0.0
+        for _, _, peso in tecnicos:
+            peso_tecnico += peso
+
+        def meses(u):
+            if u is None:
+                return None
+            ajuste = 1 if u.day > hoy["dia"] and not hoy["fin_de_mes"] else 0
+            return (hoy["anio"] - u.year) * 12 + (hoy["mes"] - u.month) - ajuste
+
+        def recencia(m):
+            if m is None:
+                return 0.5
+            return 1.0 if m <= 6 else 0.8 if m <= 12 else 0.6 if m <= 24 else 0.4
+
+        emails = p["emails"]
+        candidates = self.candidates.values() if emails is None else [self.candidates[e] for e in emails if e in self.candidates]
+        rows = []
+        for c in candidates:
+            habilidades = {
+                h["nombre"]: (float(h["nivel"]), meses(h["ultimo_uso"]))
+                for h in reversed(c["habilidades"]) if h["nombre"] is not None
+            }
+            tecnico = 1.0
+            if tecnicos:
+                total = 0.0
+                for nombre, nivel_minimo, peso in tecnicos:
+                    if nombre in habilidades:
+                        nivel, m = habilidades[nombre]
+                        total += min(nivel / nivel_minimo, 1.0) * recencia(m) * peso
+                tecnico = total / peso_tecnico
+            blando = 1.0
+            if blandos:
+                total = 0.0
+                for nombre, nivel_minimo in blandos:
+                    if nombre in habilidades:
+                        total += min(habilidades[nombre][0] / nivel_minimo, 1.0)
+                blando = total / len(blandos)
+            rows.append({
+                "email": c["email"],
+                "nombre_completo": c["nombre_completo"],
+                "score_tecnico": tecnico,
+                "score_blando": blando,
+                "experiencias": [e for e in c["experiencias"] if e["puesto"] is not None or e["fecha_inicio"] is not None],
+            })
+        return rows
@@ -0,0 +1,238 @@
+"""
+Benchmarks de matching y persistencia.
+
+Uso (desde la raiz del repo):
+    python -m benchmarks.run --scales 1000 10000 100000 --output bench.json
+    python -m benchmarks.run --scales 1000 --fake-encoder --compare bench.json
+
+La base de datos se reemplaza por el fake en memoria de benchmarks/fake_neo4j.py,
+asi que no hace falta un servidor Neo4j. Con --fake-encoder tampoco se carga el modelo
+(embeddings deterministicos por hash), util para medir solo la parte numerica.
+"""
+import argparse
+import hashlib
+import json
+import platform
+import random
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.fake_neo4j import FakeDriver
+from benchmarks.synthetic import generate_dataset, random_role
+from src.database.neo4j_service import Neo4jService
+from src.engine.embeddings import EmbeddingCache
+from src.engine.matching import MatchingEngine, ROLE_MODEL
+from src.engine.parallel import ParallelMatcher
+from src.engine.records import CandidateProfile, OfferRequirements
+from src.engine.snapshot import MatchingSnapshot
+
+
+class HashEncoder:
+    # Reemplazo offline del SentenceTransformer: vector fijo por texto
+    dim = 384
+
+    def encode(self, texts, convert_to_numpy=True, batch_size=32, **kwargs):
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+            out[i] = np.random.default_rng(seed).standard_normal(self.dim)
+        return out
+
+
+def hash_engine():
+    # Fabrica para los workers de ParallelMatcher (tiene que ser una funcion de modulo)
+    return MatchingEngine(embedding_cache=EmbeddingCache(HashEncoder()))
+
+
+class Recorder:
+    def __init__(self):
+        self.timings = defaultdict(list)
+
+    def time(self, name, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.timings[name].append(time.perf_counter() - start)
+        return result
+
+    def summary(self):
+        result = {}
+        for name, values in self.timings.items():
+            ordered = sorted(values)
+            result[name] = {
+                "calls": len(values),
+                "total_s": sum(values),
+                "mean_ms": statistics.fmean(values) * 1000,
+                "p50_ms": ordered[len(ordered) // 2] * 1000,
+                "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+            }
+        return result
+
+
+def bench_engine(engine, data, rec, sample, rng):
+    candidates, offers = data["candidates"], data["offers"]
+    pairs = [(rng.choice(candidates), rng.choice(offers)) for _ in range(sample)]
+
+    for cand, offer in pairs:
+        rec.time("engine.calculate_technical_score", engine.calculate_technical_score, cand["habilidades"], offer["requisitos"])
+        rec.time("engine.calculate_soft_score", engine.calculate_soft_score, cand["habilidades"], offer["requisitos"])
+        rec.time("engine.calculate_experience_score", engine.calculate_experience_score,
+                 cand["experiencias"], offer["titulo"], offer["meses_min_experiencia"])
+        rec.time("engine.calculate_total_score", engine.calculate_total_score, cand, offer)
+
+    # Mismos pares con registros armados al cargar
+    for cand, offer in pairs:
+        cand, offer = CandidateProfile.from_record(cand), OfferRequirements.from_record(offer)
+        rec.time("engine.calculate_total_score(records)", engine.calculate_total_score, cand, offer)
+
+    for _ in range(sample):
+        rec.time("engine.role_affinity", engine.role_affinity, random_role(rng), rng.choice(offers)["titulo"])
+
+    # Caminos masivos sobre todos los candidatos
+    for offer in offers:
+        rec.time("engine.score_candidates", engine.score_candidates, candidates, offer)
+    records = rec.time("records.CandidateProfile.from_records", CandidateProfile.from_records, candidates)
+    for offer in offers:
+        rec.time("engine.score_candidates(records)", engine.score_candidates, records, OfferRequirements.from_record(offer))
+    rec.time("engine.skill_score_matrices", engine.skill_score_matrices, candidates, offers)
+
+
+def bench_db(db, data, rec, sample, rng):
+    candidates, offers = data["candidates"], data["offers"]
+    emails = [c["email"] for c in candidates]
+
+    for _ in range(sample):
+        rec.time("db.get_candidate_profile", db.get_candidate_profile, rng.choice(emails))
+        rec.time("db.get_offer_requirements", db.get_offer_requirements, rng.choice(offers)["titulo"])
+        rec.time("db.save_matching_score", db.save_matching_score, rng.choice(emails), offers[0]["titulo"],
+                 {"final": 0.5, "tecnico": 0.5, "blando": 0.5, "exp": 0.5})
+        rec.time("db.add_skill_to_candidate", db.add_skill_to_candidate, rng.choice(emails), "habilidad_0", 3)
+
+    rec.time("db.get_all_skills", db.get_all_skills)
+    rec.time("db.get_candidate_profiles", db.get_candidate_profiles, rng.sample(emails, min(100, len(emails))))
+    rec.time("db.stream_candidate_profiles", lambda: sum(1 for _ in db.stream_candidate_profiles()))
+
+    rows = [{"email": e, "scores": {"final": 0.5, "tecnico": 0.5, "blando": 0.5, "exp": 0.5}} for e in emails]
+    rec.time("db.save_matching_scores", db.save_matching_scores, offers[0]["titulo"], rows)
+
+    new_candidates = [{
+        "personal_data": {"nombre": "N", "apellido": "A", "email": f"nuevo{i}@bench.test"},
+        "skills": [{"nombre": "habilidad_1", "nivel": 3}],
+        "experiences": [],
+    } for i in range(min(sample, 500))]
+    rec.time("db.save_candidates_bulk", db.save_candidates_bulk, new_candidates)
+
+
+def run_scale(n_candidates, args):
+    rng = random.Random(args.seed)
+    rec = Recorder()
+
+    start = time.perf_counter()
+    data = generate_dataset(n_candidates, n_offers=args.offers, n_skills=args.skills, seed=args.seed)
+    generation_s = time.perf_counter() - start
+
+    encoder = HashEncoder() if args.fake_encoder else ROLE_MODEL
+    cache = EmbeddingCache(encoder, max_size=args.cache_size)
+    engine = MatchingEngine(embedding_cache=cache)
+    bench_engine(engine, data, rec, args.sample, rng)
+
+    db = Neo4jService(driver=FakeDriver(data))
+    bench_db(db, data, rec, args.sample, rng)
+
+    # Ranking leyendo perfiles completos vs scores tecnico/blando calculados en la base
+    # (con el fake, esa cuenta la hace Python dentro del driver)
+    for offer in data["offers"]:
+        rec.time("engine.rank_candidates_for_offer", engine.rank_candidates_for_offer, db, offer["titulo"], save=False)
+        rec.time("engine.rank_candidates_for_offer(pushdown)", engine.rank_candidates_for_offer, db, offer["titulo"],
+                 save=False, pushdown=True)
+
+    # Todas las ofertas contra todos los candidatos: secuencial vs pool de procesos
+    candidates, offers = data["candidates"], data["offers"]
+    rec.time("engine.rank_candidates(all offers)", lambda: [engine.rank_candidates(candidates, o) for o in offers])
+    factory = hash_engine if args.fake_encoder else MatchingEngine
+    with ParallelMatcher(workers=args.workers, engine_factory=factory) as matcher:
+        matcher.score_matrix(candidates[:10], offers[:1])  # levanta el pool y carga el modelo
+        rec.time(f"parallel.rank_offers(workers={matcher.workers})", matcher.rank_offers, candidates, offers)
+
+    # Foto local: exportar, guardar, cargar (memmap) y rankear todas las ofertas sin base
+    snapshot = rec.time("snapshot.from_db", MatchingSnapshot.from_db, db, cache)
+    with tempfile.TemporaryDirectory(prefix="workia-snapshot-") as snapshot_dir:
+        rec.time("snapshot.save", snapshot.save, snapshot_dir)
+        loaded = rec.time("snapshot.load", MatchingSnapshot.load, snapshot_dir)
+        rec.time("engine.rank_snapshot(all offers)", engine.rank_snapshot, loaded)
+
+    return {
+        "candidates": n_candidates,
+        "offers": args.offers,
+        "generation_s": generation_s,
+        "embedding_cache": cache.stats(),
+        "results": rec.summary(),
+    }
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    print(f"\nComparacion contra {baseline_path} (mean_ms, ratio < 1 = mas rapido)")
+    for scale, run in current["scales"].items():
+        base_run = baseline["scales"].get(scale)
+        if not base_run:
+            continue
+        print(f"\n[{scale} candidatos]")
+        for name, stats in sorted(run["results"].items()):
+            base = base_run["results"].get(name)
+            if not base or not base["mean_ms"]:
+                continue
+            ratio = stats["mean_ms"] / base["mean_ms"]
+            print(f"  {name:40s} {base['mean_ms']:10.3f} -> {stats['mean_ms']:10.3f}  x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de MatchingEngine y Neo4jService")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--offers", type=int, default=20)
+    parser.add_argument("--skills", type=int, default=200)
+    parser.add_argument("--sample", type=int, default=500, help="llamadas por metodo en los caminos de a uno")
+    parser.add_argument("--cache-size", type=int, default=4096)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="procesos para ParallelMatcher (default: cpu_count)")
+    parser.add_argument("--fake-encoder", action="store_true", help="no cargar el modelo, embeddings por hash")
+    parser.add_argument("--output", help="archivo JSON de resultados")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "encoder": "hash" if args.fake_encoder else ROLE_MODEL.cache_key,
+            "seed": args.seed,
+            "sample": args.sample,
+        },
+        "scales": {},
+    }
+
+    for n in args.scales:
+        print(f"Corriendo escala {n} candidatos...")
+        run = run_scale(n, args)
+        report["scales"][str(n)] = run
+        for name, stats in sorted(run["results"].items()):
+            print(f"  {name:40s} mean {stats['mean_ms']:10.3f} ms  p95 {stats['p95_ms']:10.3f} ms  ({stats['calls']} llamadas)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResultados guardados en {args.output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import random
+from datetime import date, timedelta
+
+# Datos sinteticos con el mismo formato que devuelve Neo4jService
+# (get_candidate_profile / get_offer_requirements / get_all_skills)
+
+ROLE_WORDS = {
+    "area": ["Backend", "Frontend", "Full Stack", "Data", "Mobile", "DevOps", "QA", "Cloud", "Seguridad", "Soporte"],
+    "puesto": ["Developer", "Engineer", "Analista", "Lider Tecnico", "Arquitecto", "Consultor", "Tester"],
+    "nivel": ["Junior", "Semi Senior", "Senior", ""],
+}
+SENIORITIES = ["Junior", "Semi Senior", "Senior"]
+MODALIDADES = ["Remoto", "Presencial", "Hibrido"]
+
+
+def random_role(rng):
+    return " ".join(w for w in (
+        rng.choice(ROLE_WORDS["puesto"]), rng.choice(ROLE_WORDS["area"]), rng.choice(ROLE_WORDS["nivel"])
+    ) if w)
+
+
+def random_date(rng, start_year=2012, end=None):
+    end = end or date.today()
+    start = date(start_year, 1, 1)
+    return start + timedelta(days=rng.randrange((end - start).days))
+
+
+def sample_size(rng, bounds, population):
+    # Cantidad al azar entre bounds, sin pasarse de las habilidades que hay (catalogos chicos)
+    lo, hi = bounds
+    return rng.randint(min(lo, len(population)), min(hi, len(population)))
+
+
+def generate_skills(n_skills=200, soft_ratio=0.25, seed=0):
+    rng = random.Random(seed)
+    return [
+        {"nombre": f"habilidad_{i}", "tipo": "Blanda" if rng.random() < soft_ratio else "Técnica"}
+        for i in range(n_skills)
+    ]
+
+
+def generate_candidates(n, skills, skills_per_candidate=(3, 20), experiences_per_candidate=(0, 6), seed=0):
+    rng = random.Random(seed)
+    candidates = []
+    for i in range(n):
+        habilidades = [
+            {
+                "nombre": s["nombre"],
+                "nivel": rng.randint(1, 5),
+                "ultimo_uso": random_date(rng, 2018) if rng.random() > 0.1 else None,
+                "tipo": s["tipo"],
+            }
+            for s in rng.sample(skills, sample_size(rng, skills_per_candidate, skills))
+        ]
+
+        experiencias = []
+        for _ in range(rng.randint(*experiences_per_candidate)):
+            inicio = random_date(rng)
+            fin = None if rng.random() < 0.2 else inicio + timedelta(days=rng.randint(20, 2000))
+            experiencias.append({"puesto": random_role(rng), "fecha_inicio": inicio, "fecha_fin": fin})
+
+        candidates.append({
+            "nombre_completo": f"Nombre{i} Apellido{i}",
+            "email": f"candidato{i}@bench.test",
+            "ubicacion": "Buenos Aires",
+            "fecha_nacimiento": date(1980 + i % 25, 1 + i % 12, 1 + i % 28),
+            "movilidad": bool(i % 2),
+            "seniority": rng.choice(SENIORITIES),
+            # Mismo formato que la consulta cuando no hay resultados en el OPTIONAL MATCH
+            "habilidades": habilidades or [{"nombre": None, "nivel": None, "ultimo_uso": None, "tipo": None}],
+            "experiencias": experiencias or [{"puesto": None, "fecha_inicio": None, "fecha_fin": None}],
+        })
+    return candidates
+
+
+def generate_offers(n, skills, requirements_per_offer=(3, 12), seed=0):
+    rng = random.Random(seed + 1)
+    offers = []
+    for i in range(n):
+        offers.append({
+            "titulo": f"{random_role(rng)} #{i}",
+            "modalidad": rng.choice(MODALIDADES),
+            "seniority_buscado": rng.choice(SENIORITIES),
+            "salario": rng.randint(1000, 6000),
+            "fecha_publicacion": random_date(rng, 2024),
+            "meses_min_experiencia": rng.choice([0, 6, 12, 24, 36]),
+            "w_tec": 0.5,
+            "w_blan": 0.2,
+            "w_exp": 0.3,
+            "requisitos": [
+                {
+                    "nombre": s["nombre"],
+                    "nivel_minimo": rng.randint(1, 5),
+                    "es_critica": rng.random() < 0.3,
+                    "tipo": s["tipo"],
+                }
+                for s in rng.sample(skills, sample_size(rng, requirements_per_offer, skills))
+            ],
+        })
+    return offers
+
+
+def generate_dataset(n_candidates, n_offers=20, n_skills=200, seed=0):
+    skills = generate_skills(n_skills, seed=seed)
+    return {
+        "skills": skills,
+        "candidates": generate_candidates(n_candidates, skills, seed=seed),
+        "offers": generate_offers(n_offers, skills, seed=seed),
+    }
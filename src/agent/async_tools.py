@@ -0,0 +1,173 @@
+import asyncio
+from langchain.tools import tool
+from src.database.async_neo4j_service import AsyncNeo4jService
+from src.engine.matching import MatchingEngine
+from src.engine.records import CandidateProfile, OfferRequirements
+
+# Mismas tools que src/agent/tools.py pero async: no bloquean el event loop y
+# las lecturas independientes se hacen en paralelo. El scoring (CPU) va a un thread.
+db = AsyncNeo4jService()
+engine = MatchingEngine()
+
+@tool
+async def search_candidates(criteria: str):
+    """
+    Busca candidatos en la base de datos por nombre o apellido.
+    Es útil para encontrar el email de un candidato si solo se conoce su nombre.
+    """
+    return await db.get_all_candidates(criteria)
+
+@tool
+async def search_offers(title: str, date_from: str, date_to: str):
+    """
+    Busca ofertas laborales por título en un rango de fechas específico.
+    'date_from' y 'date_to' deben estar en formato 'YYYY-MM-DD'.
+    """
+    return await db.get_all_offers(title, date_from, date_to)
+
+@tool
+async def analyze_candidate_suitability(email: str, offer_title: str):
+    """
+    Calcula la adecuación entre un candidato (email) y una oferta (título).
+    Genera puntajes técnicos, de habilidades blandas y de experiencia,
+    y guarda el resultado en la base de datos.
+    """
+    try:
+        # Las dos lecturas no dependen una de otra
+        candidate, offer = await asyncio.gather(
+            db.get_candidate_profile(email),
+            db.get_offer_requirements(offer_title)
+        )
+
+        if not candidate or not offer:
+            return "No se encontró el candidato o la oferta especificada"
+
+        result = await asyncio.to_thread(engine.calculate_total_score, candidate, offer)
+
+        await db.save_matching_score(email, offer['titulo'], {
+            "final": result['final_score'],
+            "tecnico": result['tech_score'],
+            "blando": result['soft_score'],
+            "exp": result['exp_score']
+        })
+
+        return {
+            "message": "Análisis completado y guardado exitosamente",
+            "candidate": candidate['nombre_completo'],
+            "offer": offer['titulo'],
+            "scores_details": result
+        }
+    except Exception as e:
+        return f"Error al procesar la adecuación {str(e)}"
+
+
+@tool
+async def rank_candidates_for_offer(offer_title: str, top_k: int = 10):
+    """
+    Busca los mejores candidatos de toda la base para una oferta (título).
+    Puntúa a todos los candidatos de una vez, guarda la adecuación de los
+    'top_k' mejores y devuelve el ranking ordenado de mayor a menor.
+    """
+    async def load_candidates():
+        return [c async for c in db.stream_candidate_profiles()]
+
+    try:
+        offer, candidates = await asyncio.gather(db.get_offer_requirements(offer_title), load_candidates())
+        if not offer or not candidates:
+            return "No se encontró la oferta especificada o no hay candidatos cargados"
+
+        def rank():
+            # Los registros se arman en el thread, no en el event loop
+            return engine.rank_candidates(CandidateProfile.from_records(candidates), OfferRequirements.from_record(offer), top_k)
+
+        ranking = await asyncio.to_thread(rank)
+        await db.save_matching_scores(offer['titulo'], engine.score_rows(ranking))
+        return ranking
+    except Exception as e:
+        return f"Error al generar el ranking {str(e)}"
+
+
+@tool
+async def analyze_candidates_for_offers(emails: list[str], offer_titles: list[str]):
+    """
+    Calcula la adecuación de varios candidatos (emails) contra varias ofertas (títulos) de una vez.
+    Usar en lugar de llamar muchas veces a analyze_candidate_suitability.
+    Guarda todos los resultados y devuelve una tabla ordenada por oferta y de mayor a menor puntaje.
+    """
+    try:
+        candidates, offers = await asyncio.gather(db.get_candidate_profiles(emails), db.get_offers_requirements(offer_titles))
+        if not candidates or not offers:
+            return "No se encontraron los candidatos o las ofertas especificadas"
+
+        rows = await asyncio.to_thread(engine.score_matrix, candidates, offers)
+        await db.save_matching_matrix(engine.matrix_rows(rows))
+
+        found = {c['email'] for c in candidates}
+        return {
+            **engine.matrix_table(rows),
+            "emails_no_encontrados": [e for e in emails if e not in found],
+            "ofertas_encontradas": [o['titulo'] for o in offers]
+        }
+    except Exception as e:
+        return f"Error al procesar las adecuaciones {str(e)}"
+
+
+@tool
+async def get_complete_profile(email: str):
+    """
+    Obtiene el perfil detallado de un candidato, incluyendo todas sus
+    habilidades registradas y su historial de experiencias laborales.
+    """
+    return await db.get_candidate_profile(email)
+
+@tool
+async def list_available_skills():
+    """
+    Devuelve una lista de todas las habilidades (técnicas y blandas)
+    que existen actualmente en el sistema.
+    """
+    return await db.get_all_skills()
+
+@tool
+async def save_complete_candidate(personal_data: dict, skills: list, experiences: list):
+    """
+    Registra un nuevo candidato completo con sus habilidades y experiencias.
+    Si ya existe un candidato con ese email no guarda nada y devuelve un error.
+    'personal_data' debe incluir: nombre, apellido, email, ubicacion, fecha_nacimiento, seniority, movilidad.
+    'skills': lista de {'nombre': str, 'nivel': int}.
+    'experiences': lista de {'empresa_email': str, 'puesto': str, 'fecha_inicio': str, 'fecha_fin': str}.
+    """
+    try:
+        # Todo en una sola transaccion: si algo falla no queda el candidato a medias. Si el email
+        # ya existe no se escribe nada (la verificacion va en la misma consulta)
+        if not await db.save_candidate_bulk(personal_data, skills, experiences):
+            return f"Error al guardar candidato. Ya existe un candidato con el mail {personal_data['email']}"
+
+        return f"Candidato {personal_data['nombre']} guardado exitosamente"
+    except Exception as e:
+        return f"Error al guardar candidato: {str(e)}"
+
+@tool
+async def save_offer(title: str, company_email: str, offer_details: dict, weighters: dict, skills_required: list):
+    """
+    Crea una nueva oferta laboral vinculada a una empresa y define sus requisitos.
+    'offer_details': {descripcion, modalidad, seniority_buscado, salario_max_usd, meses_min_experiencia}.
+    'weighters': {tecnico: float, blando: float, experiencia: float}.
+    'skills_required': lista de {'habilidad': str, 'nivel_minimo': int, 'es_critica': bool}.
+    """
+    try:
+        if not await db.company_exists(company_email):
+            return f"Error al guardar oferta. No se encontró una empresa con el mail {company_email}"
+
+        await db.save_offer_bulk(
+            titulo=title,
+            detalles=offer_details,
+            mults=weighters,
+            email_empresa=company_email,
+            requisitos=skills_required
+        )
+
+        return f"Oferta {title} guardada exitosamente"
+
+    except Exception as e:
+        return f"Error al guardar oferta: {str(e)}"
@@ -1,10 +1,42 @@
+import os
 from langchain.tools import tool
+from src.database.cache import CachedNeo4jService, ReadCache
 from src.database.neo4j_service import Neo4jService
-from src.engine.matching import MatchingEngine
+from src.engine.matching import ROLE_INDEX, MatchingEngine
+from src.engine.rescoring import Rescorer
+from src.utils.metrics import METRICS, start_json_logger
 
-db = Neo4jService()
+# Las lecturas repetidas (perfiles, ofertas, catalogos) salen del cache hasta que una escritura las invalida.
+# Neo4jService no abre conexiones al importarse: usa el driver compartido del proceso (un solo pool
+# para todos los hilos del agente), que se crea en la primera consulta
+db = CachedNeo4jService(Neo4jService(), ReadCache(
+    max_size=int(os.getenv("READ_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("READ_CACHE_TTL", "120"))
+))
+# Con NEO4J_ENSURE_SCHEMA=1 se crean al arrancar los constraints e indices (full-text incluidos) que
+# usan las consultas; sin ellos las busquedas caen a CONTAINS
+if os.getenv("NEO4J_ENSURE_SCHEMA") == "1":
+    db.ensure_schema()
+# Las herramientas que puntuan y guardan adecuaciones leen perfiles y ofertas sin cache
+scoring_db = db.fresh()
 engine = MatchingEngine()
 
+# Con SCORING_PUSHDOWN=1 el ranking masivo calcula los scores tecnico y blando en Neo4j. Queda apagado
+# por defecto: activarlo solo despues de correr tests/test_skill_scores_pushdown.py contra esa version de Neo4j
+SCORING_PUSHDOWN = os.getenv("SCORING_PUSHDOWN") == "1"
+
+# Tiempos de consultas / scoring: con METRICS_LOG_INTERVAL=<segundos> se loguea un snapshot JSON periodico
+if os.getenv("METRICS_ENABLED", "1") == "0":
+    METRICS.enabled = False
+elif os.getenv("METRICS_LOG_INTERVAL"):
+    start_json_logger(METRICS, interval=float(os.getenv("METRICS_LOG_INTERVAL")), reset=True)
+
+# Recalcula las adecuaciones desactualizadas (perfiles u ofertas que cambiaron). Con
+# RESCORER_ENABLED=1 corre en un hilo de fondo cada RESCORER_INTERVAL segundos
+rescorer = Rescorer(scoring_db, engine, interval=float(os.getenv("RESCORER_INTERVAL", "60")))
+if os.getenv("RESCORER_ENABLED") == "1":
+    rescorer.start()
+
 @tool
 def search_candidates(criteria: str):
     """
@@ -21,6 +53,24 @@ def search_offers(title: str, date_from: str, date_to: str):
     """
     return db.get_all_offers(title, date_from, date_to)
 
+@tool
+def search_candidates_page(criteria: str, cursor: str = "", limit: int = 20):
+    """
+    Igual que search_candidates pero devuelve los resultados de a páginas ('limit' por vez).
+    Para ver la página siguiente, volver a llamar pasando en 'cursor' el 'next_cursor' recibido.
+    Si 'next_cursor' es null no hay más resultados.
+    """
+    return db.get_candidates_page(criteria, cursor or None, limit)
+
+@tool
+def search_offers_page(title: str, date_from: str, date_to: str, cursor: str = "", limit: int = 20):
+    """
+    Igual que search_offers pero devuelve los resultados de a páginas ('limit' por vez),
+    de la más reciente a la más antigua. Para ver la página siguiente, volver a llamar
+    pasando en 'cursor' el 'next_cursor' recibido. Si 'next_cursor' es null no hay más resultados.
+    """
+    return db.get_offers_page(title, date_from, date_to, cursor or None, limit)
+
 @tool
 def analyze_candidate_suitability(email: str, offer_title: str):
     """
@@ -29,15 +79,15 @@ def analyze_candidate_suitability(email: str, offer_title: str):
     y guarda el resultado en la base de datos.
     """
     try:
-        candidate = db.get_candidate_profile(email)
-        offer = db.get_offer_requirements(offer_title)
+        candidate = scoring_db.get_candidate_profile(email)
+        offer = scoring_db.get_offer_requirements(offer_title)
 
         if not candidate or not offer:
             return "No se encontró el candidato o la oferta especificada"
         
         result = engine.calculate_total_score(candidate, offer)
 
-        db.save_matching_score(email, offer['titulo'], {
+        scoring_db.save_matching_score(email, offer['titulo'], {
             "final": result['final_score'],
             "tecnico": result['tech_score'],
             "blando": result['soft_score'],
@@ -54,6 +104,63 @@ def analyze_candidate_suitability(email: str, offer_title: str):
         return f"Error al procesar la adecuación {str(e)}"
     
 
+@tool
+def rank_candidates_for_offer(offer_title: str, top_k: int = 10):
+    """
+    Busca los mejores candidatos de toda la base para una oferta (título).
+    Puntúa a todos los candidatos de una vez (con muchos puestos distintos, solo a los de
+    experiencia más afín al título), guarda la adecuación de los 'top_k' mejores y devuelve
+    el ranking ordenado de mayor a menor.
+    """
+    try:
+        ranking = engine.rank_candidates_for_offer(
+            scoring_db, offer_title, top_k=top_k, role_index=ROLE_INDEX.get(scoring_db), pushdown=SCORING_PUSHDOWN
+        )
+        if not ranking:
+            return "No se encontró la oferta especificada o no hay candidatos cargados"
+        return ranking
+    except Exception as e:
+        return f"Error al generar el ranking {str(e)}"
+
+
+@tool
+def refresh_outdated_scores():
+    """
+    Recalcula todas las adecuaciones marcadas como desactualizadas (candidatos u ofertas
+    que cambiaron después de calcularse) y devuelve cuántas se actualizaron.
+    """
+    try:
+        return {"adecuaciones_recalculadas": rescorer.run_until_clean()}
+    except Exception as e:
+        return f"Error al recalcular las adecuaciones {str(e)}"
+
+
+@tool
+def analyze_candidates_for_offers(emails: list[str], offer_titles: list[str]):
+    """
+    Calcula la adecuación de varios candidatos (emails) contra varias ofertas (títulos) de una vez.
+    Usar en lugar de llamar muchas veces a analyze_candidate_suitability.
+    Guarda todos los resultados y devuelve una tabla ordenada por oferta y de mayor a menor puntaje.
+    """
+    try:
+        candidates = scoring_db.get_candidate_profiles(emails)
+        offers = scoring_db.get_offers_requirements(offer_titles)
+        if not candidates or not offers:
+            return "No se encontraron los candidatos o las ofertas especificadas"
+
+        rows = engine.score_matrix(candidates, offers)
+        scoring_db.save_matching_matrix(engine.matrix_rows(rows))
+
+        found = {c['email'] for c in candidates}
+        return {
+            **engine.matrix_table(rows),
+            "emails_no_encontrados": [e for e in emails if e not in found],
+            "ofertas_encontradas": [o['titulo'] for o in offers]
+        }
+    except Exception as e:
+        return f"Error al procesar las adecuaciones {str(e)}"
+
+
 @tool
 def get_complete_profile(email: str):
     """
@@ -74,28 +181,16 @@ def list_available_skills():
 def save_complete_candidate(personal_data: dict, skills: list, experiences: list):
     """
     Registra un nuevo candidato completo con sus habilidades y experiencias.
+    Si ya existe un candidato con ese email no guarda nada y devuelve un error.
     'personal_data' debe incluir: nombre, apellido, email, ubicacion, fecha_nacimiento, seniority, movilidad.
     'skills': lista de {'nombre': str, 'nivel': int}.
     'experiences': lista de {'empresa_email': str, 'puesto': str, 'fecha_inicio': str, 'fecha_fin': str}.
     """
     try:
-        db.create_candidate(
-            datos_personales = personal_data, 
-            email = personal_data['email'], 
-            perfil = personal_data)
-        for s in skills:
-            db.add_skill_to_candidate(
-                email = personal_data['email'], 
-                nombre_habilidad = s['nombre'], 
-                nivel = s['nivel']
-            )
-
-        for e in experiences:
-            db.add_experience_to_candidate(
-                email_candidato = personal_data['email'], 
-                email_empresa = e['empresa_email'], 
-                experiencia = e
-            )
+        # Todo en una sola transaccion: si algo falla no queda el candidato a medias. Si el email
+        # ya existe no se escribe nada (la verificacion va en la misma consulta)
+        if not db.save_candidate_bulk(personal_data, skills, experiences):
+            return f"Error al guardar candidato. Ya existe un candidato con el mail {personal_data['email']}"
 
         return f"Candidato {personal_data['nombre']} guardado exitosamente"
     except Exception as e:
@@ -113,19 +208,13 @@ def save_offer(title: str, company_email: str, offer_details: dict, weighters: d
         if not db.company_exists(company_email):
             return f"Error al guardar oferta. No se encontró una empresa con el mail {company_email}"
         
-        db.create_offer(
+        db.save_offer_bulk(
             titulo=title, 
             detalles=offer_details, 
             mults=weighters, 
-            email_empresa=company_email
+            email_empresa=company_email,
+            requisitos=skills_required
         )
-       
-        for s in skills_required:
-            db.add_requirement_to_offer(
-                oferta_titulo=title, 
-                habilidad_nombre = s['habilidad'], 
-                nivel_min = s['nivel_minimo'],
-                es_critica = s['es_critica'])
 
         return f"Oferta {title} guardada exitosamente"
     
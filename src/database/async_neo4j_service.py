@@ -0,0 +1,227 @@
+import logging
+import sys
+import time
+
+from neo4j import READ_ACCESS
+from neo4j.exceptions import ClientError, ConstraintError
+from dotenv import load_dotenv
+
+from src.database.driver import get_async_driver, session_config
+from src.utils.metrics import METRICS
+from src.database.queries import (
+    fulltext_query,
+    SEARCH_CANDIDATES_FULLTEXT_QUERY,
+    SEARCH_CANDIDATES_QUERY,
+    CANDIDATE_PROFILE_QUERY,
+    CANDIDATE_PROFILES_BY_EMAIL_QUERY,
+    ALL_CANDIDATE_PROFILES_QUERY,
+    SEARCH_OFFERS_QUERY,
+    OFFER_REQUIREMENTS_FULLTEXT_QUERY,
+    OFFER_REQUIREMENTS_QUERY,
+    OFFERS_REQUIREMENTS_BY_TITLES_FULLTEXT_QUERY,
+    OFFERS_REQUIREMENTS_BY_TITLES_QUERY,
+    ALL_SKILLS_QUERY,
+    COMPANY_EXISTS_QUERY,
+    SAVE_MATCHING_SCORE_QUERY,
+    SAVE_MATCHING_SCORES_QUERY,
+    SAVE_MATCHING_MATRIX_QUERY,
+    SAVE_NEW_CANDIDATE_QUERY,
+    SAVE_OFFER_BULK_QUERY,
+)
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncNeo4jService:
+    """
+    Version async de Neo4jService (neo4j.AsyncGraphDatabase) con las mismas consultas.
+    Permite lanzar lecturas independientes en paralelo con asyncio.gather y atender
+    muchas conversaciones desde un mismo proceso sin un hilo por pedido.
+    """
+
+    def __init__(self, driver=None, database=None, fetch_size=None):
+        # Igual que Neo4jService: driver async compartido (uno por event loop), creado en el primer uso
+        self._driver = driver
+        config = session_config()
+        self.database = database or config["database"]
+        self.fetch_size = fetch_size or config["fetch_size"]
+
+    @property
+    def driver(self):
+        return self._driver or get_async_driver()
+
+    async def close(self):
+        # Igual que Neo4jService.close: el driver compartido se cierra con close_async_driver() antes de terminar el loop
+        if self._driver is not None:
+            await self._driver.close()
+
+
+    # Helpers
+    def _session(self, **kwargs):
+        return self.driver.session(database=self.database, fetch_size=self.fetch_size, **kwargs)
+
+    async def _execute(self, query, parameters, write, method):
+        # Transaccion administrada (con reintentos ante errores transitorios), con las mismas
+        # metricas que Neo4jService._execute
+        attempts = 0
+
+        async def work(tx):
+            nonlocal attempts
+            attempts += 1
+            result = await tx.run(query, parameters)
+            return await result.data()
+
+        async with self._session() as session:
+            execute = session.execute_write if write else session.execute_read
+            with METRICS.timer("neo4j_write_seconds" if write else "neo4j_query_seconds", method=method):
+                rows = await execute(work)
+
+        METRICS.inc("neo4j_rows", len(rows), method=method)
+        if attempts > 1:
+            METRICS.inc("neo4j_retries", attempts - 1, method=method)
+        return rows
+
+    async def run_query(self, query, parameters=None):
+        # Lectura. Las metricas se etiquetan con el metodo que hizo la consulta
+        return await self._execute(query, parameters, False, sys._getframe(1).f_code.co_name)
+
+    def stream_query(self, query, parameters=None):
+        # El metodo que llama se toma aca y no dentro del generador (ahi seria quien lo consume)
+        return self._stream(query, parameters, sys._getframe(1).f_code.co_name)
+
+    async def _stream(self, query, parameters, method):
+        rows = 0
+        # Como en Neo4jService._stream, solo cuenta el tiempo de la consulta y de traer los registros
+        elapsed = 0.0
+        async with self._session(default_access_mode=READ_ACCESS) as session:
+            try:
+                start = time.perf_counter()
+                result = await session.run(query, parameters)
+                elapsed += time.perf_counter() - start
+                records = result.__aiter__()
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        record = await records.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        elapsed += time.perf_counter() - start
+                    rows += 1
+                    yield record.data()
+            finally:
+                METRICS.observe("neo4j_query_seconds", elapsed, method=method)
+        METRICS.inc("neo4j_rows", rows, method=method)
+
+    async def run_write_query(self, query, parameters=None):
+        # Escritura en una unica transaccion
+        return await self._execute(query, parameters, True, sys._getframe(1).f_code.co_name)
+
+
+    # --- CONSULTAR DATOS ---
+    async def get_all_candidates(self, criterio):
+        busqueda = fulltext_query(criterio)
+        if busqueda:
+            try:
+                result = await self.run_query(SEARCH_CANDIDATES_FULLTEXT_QUERY, {"busqueda": busqueda})
+                if result:
+                    return result
+            except ClientError as e:
+                # todavia no se creo el indice (ver Neo4jService.ensure_schema), se sigue con la busqueda por CONTAINS
+                logger.warning("Indice full-text no disponible, se busca por CONTAINS: %s", e)
+
+        return await self.run_query(SEARCH_CANDIDATES_QUERY, {"criterio": criterio})
+
+    async def get_candidate_profile(self, email):
+        result = await self.run_query(CANDIDATE_PROFILE_QUERY, {"email": email})
+        return result[0] if result else None
+
+    async def get_candidate_profiles(self, emails):
+        return await self.run_query(CANDIDATE_PROFILES_BY_EMAIL_QUERY, {"emails": list(emails)})
+
+    def stream_candidate_profiles(self):
+        return self.stream_query(ALL_CANDIDATE_PROFILES_QUERY)
+
+    async def get_all_offers(self, title=None, date_from=None, date_to=None):
+        params = {
+            "titulo": title,
+            "fecha_desde": date_from,
+            "fecha_hasta": date_to
+        }
+        return await self.run_query(SEARCH_OFFERS_QUERY, params)
+
+    async def get_offer_requirements(self, titulo):
+        busqueda = fulltext_query(titulo)
+        if busqueda:
+            try:
+                result = await self.run_query(OFFER_REQUIREMENTS_FULLTEXT_QUERY, {"titulo": titulo, "busqueda": busqueda})
+                if result:
+                    return result[0]
+            except ClientError as e:
+                # todavia no se creo el indice (ver Neo4jService.ensure_schema), se sigue con la busqueda por CONTAINS
+                logger.warning("Indice full-text no disponible, se busca por CONTAINS: %s", e)
+
+        result = await self.run_query(OFFER_REQUIREMENTS_QUERY, {"titulo": titulo})
+        return result[0] if result else None
+
+    async def get_offers_requirements(self, titulos):
+        titulos = list(titulos)
+        busquedas = [{"titulo": t, "busqueda": fulltext_query(t)} for t in titulos]
+        busquedas = [b for b in busquedas if b["busqueda"]]
+        result, resueltos = [], set()
+        if busquedas:
+            try:
+                for row in await self.run_query(OFFERS_REQUIREMENTS_BY_TITLES_FULLTEXT_QUERY, {"busquedas": busquedas}):
+                    resueltos.update(row.pop('buscados'))
+                    result.append(row)
+            except ClientError as e:
+                # todavia no se creo el indice (ver Neo4jService.ensure_schema), se sigue con la busqueda por CONTAINS
+                logger.warning("Indice full-text no disponible, se busca por CONTAINS: %s", e)
+
+        pendientes = [t for t in titulos if t not in resueltos]
+        if pendientes:
+            rows = await self.run_query(OFFERS_REQUIREMENTS_BY_TITLES_QUERY, {"titulos": pendientes})
+            result += [row for row in rows if row not in result]
+        return result
+
+    async def get_all_skills(self):
+        return await self.run_query(ALL_SKILLS_QUERY)
+
+    async def company_exists(self, email):
+        result = await self.run_query(COMPANY_EXISTS_QUERY, {"email": email})
+        return result[0]['existe'] if result else False
+
+
+    # --- ESCRITURAS ---
+    async def save_matching_score(self, email, oferta_titulo, scores):
+        params = {"email": email, "oferta_titulo": oferta_titulo, "scores": scores}
+        await self.run_write_query(SAVE_MATCHING_SCORE_QUERY, params)
+
+    async def save_matching_scores(self, oferta_titulo, rows, batch_size=500):
+        for start in range(0, len(rows), batch_size):
+            await self.run_write_query(SAVE_MATCHING_SCORES_QUERY, {"oferta_titulo": oferta_titulo, "rows": rows[start:start + batch_size]})
+
+    async def save_matching_matrix(self, rows, batch_size=500):
+        for start in range(0, len(rows), batch_size):
+            await self.run_write_query(SAVE_MATCHING_MATRIX_QUERY, {"rows": rows[start:start + batch_size]})
+
+    async def save_candidate_bulk(self, personal_data, skills, experiences):
+        # Igual que Neo4jService.save_candidate_bulk: solo crea, con un email existente devuelve 0
+        params = {"candidato": {"personal_data": personal_data, "skills": skills, "experiences": experiences}}
+        try:
+            result = await self.run_write_query(SAVE_NEW_CANDIDATE_QUERY, params)
+        except ConstraintError:
+            return 0
+        return result[0]['candidatos_creados'] if result else 0
+
+    async def save_offer_bulk(self, titulo, detalles, mults, email_empresa, requisitos):
+        params = {
+            "titulo": titulo,
+            "email_empresa": email_empresa,
+            "detalles": detalles,
+            "mults": mults,
+            "requisitos": requisitos
+        }
+        return await self.run_write_query(SAVE_OFFER_BULK_QUERY, params)
@@ -0,0 +1,246 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+
+class ReadCache:
+    """
+    Cache LRU con TTL para resultados de lecturas.
+    Cada entrada se guarda con 'tags' (la entidad que toco, ej: ("candidato", email))
+    y las escrituras invalidan solo las entradas con esos tags.
+    """
+
+    def __init__(self, max_size=1024, ttl=120):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (vence, valor, tags)
+        self._by_tag = defaultdict(set)
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._generation = 0  # sube con cada invalidacion
+
+    def get_or_load(self, method, args, loader, tags_fn):
+        key = (method, args)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._stats[method]["hits"] += 1
+                return entry[1]
+            if entry is not None:
+                self._drop(key)
+            self._stats[method]["misses"] += 1
+            generation = self._generation
+
+        value = loader()
+        tags = tags_fn(value)
+
+        with self._lock:
+            # Si hubo una escritura mientras se leia, el valor puede estar viejo: no se guarda
+            if generation != self._generation:
+                return value
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (now + self.ttl, value, tags)
+            for tag in tags:
+                self._by_tag[tag].add(key)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+
+        return value
+
+    def invalidate(self, *tags):
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in list(self._by_tag.get(tag, ())):
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_tag.clear()
+
+    def stats(self):
+        # Hits / misses / hit rate por metodo
+        with self._lock:
+            result = {}
+            for method, s in self._stats.items():
+                total = s["hits"] + s["misses"]
+                result[method] = {**s, "hit_rate": s["hits"] / total if total else 0.0}
+            return result
+
+    def _drop(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+
+class UncachedReads:
+    """
+    Mismo contrato que ReadCache pero siempre lee de la base; las invalidaciones se pasan
+    al cache real. Ver CachedNeo4jService.fresh.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def get_or_load(self, method, args, loader, tags_fn):
+        return loader()
+
+    def invalidate(self, *tags):
+        self.cache.invalidate(*tags)
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self):
+        return self.cache.stats()
+
+
+class CachedNeo4jService:
+    """
+    Envuelve un Neo4jService: las lecturas pasan por un ReadCache y los create_*/add_*/save_*
+    invalidan solo las entradas de las entidades que tocan. Lo que no esta aca se delega tal cual.
+    Los resultados cacheados se comparten, no hay que modificarlos.
+    """
+
+    def __init__(self, db, cache=None):
+        self.db = db
+        self.cache = cache or ReadCache()
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+    def fresh(self):
+        # Mismo servicio con lecturas directas a la base y escrituras que invalidan este cache.
+        # Para el scoring: un perfil u oferta vieja se puntuaria y se guardaria como adecuacion al dia
+        return CachedNeo4jService(self.db, UncachedReads(self.cache))
+
+    def _cached(self, method, args, tags_fn):
+        return self.cache.get_or_load(method, args, lambda: getattr(self.db, method)(*args), tags_fn)
+
+    def _write(self, tags, write_fn, *args):
+        # Se invalida despues de escribir (y aunque falle) para no volver a cachear el dato viejo
+        try:
+            return write_fn(*args)
+        finally:
+            self.cache.invalidate(*tags)
+
+
+    # --- LECTURAS ---
+    def get_all_candidates(self, criterio):
+        return self._cached("get_all_candidates", (criterio,), lambda _: {("candidatos",)})
+
+    def get_candidates_page(self, criterio, cursor=None, limit=50):
+        return self._cached("get_candidates_page", (criterio, cursor, limit), lambda _: {("candidatos",)})
+
+    def get_candidate_profile(self, email):
+        return self._cached("get_candidate_profile", (email,), lambda _: {("candidato", email)})
+
+    def get_all_offers(self, title=None, date_from=None, date_to=None):
+        return self._cached("get_all_offers", (title, date_from, date_to), lambda _: {("ofertas",)})
+
+    def get_offers_page(self, title=None, date_from=None, date_to=None, cursor=None, limit=20):
+        return self._cached("get_offers_page", (title, date_from, date_to, cursor, limit), lambda _: {("ofertas",)})
+
+    def get_offer_requirements(self, titulo):
+        # Una oferta nueva puede cambiar a que oferta resuelve la busqueda, por eso tambien ("ofertas",)
+        return self._cached(
+            "get_offer_requirements", (titulo,),
+            lambda offer: {("ofertas",), ("oferta", offer['titulo'] if offer else None)}
+        )
+
+    def get_offers_requirements(self, titulos):
+        titulos = tuple(titulos)
+        return self._cached(
+            "get_offers_requirements", (titulos,),
+            lambda offers: {("ofertas",)} | {("oferta", o['titulo']) for o in offers}
+        )
+
+    def get_all_skills(self):
+        return self._cached("get_all_skills", (), lambda _: {("habilidades",)})
+
+    def get_all_companies(self):
+        return self._cached("get_all_companies", (), lambda _: {("empresas",)})
+
+    def company_exists(self, email):
+        return self._cached("company_exists", (email,), lambda _: {("empresa", email)})
+
+    def get_best_candidates_for_offer(self, oferta_titulo, limit=5):
+        return self._cached(
+            "get_best_candidates_for_offer", (oferta_titulo, limit),
+            lambda _: {("adecuaciones",), ("adecuaciones", oferta_titulo)}
+        )
+
+
+    # --- ESCRITURAS (invalidan) ---
+    def create_candidate(self, datos_personales, email, perfil):
+        return self._write([("candidatos",), ("candidato", email)], self.db.create_candidate, datos_personales, email, perfil)
+
+    def create_skill(self, nombre, tipo):
+        return self._write([("habilidades",)], self.db.create_skill, nombre, tipo)
+
+    def create_offer(self, titulo, detalles, mults, email_empresa):
+        return self._write([("ofertas",), ("oferta", titulo)], self.db.create_offer, titulo, detalles, mults, email_empresa)
+
+    def create_company(self, email, datos_empresa):
+        return self._write([("empresas",), ("empresa", email)], self.db.create_company, email, datos_empresa)
+
+    def add_skill_to_candidate(self, email, nombre_habilidad, nivel):
+        # Tambien cambia la marca de desactualizada de sus adecuaciones
+        return self._write([("candidato", email), ("habilidades",), ("adecuaciones",)], self.db.add_skill_to_candidate, email, nombre_habilidad, nivel)
+
+    def add_experience_to_candidate(self, email_candidato, email_empresa, experiencia):
+        return self._write([("candidato", email_candidato), ("empresas",), ("empresa", email_empresa), ("adecuaciones",)], self.db.add_experience_to_candidate, email_candidato, email_empresa, experiencia)
+
+    def add_requirement_to_offer(self, oferta_titulo, habilidad_nombre, nivel_min, es_critica):
+        return self._write([("oferta", oferta_titulo), ("habilidades",), ("adecuaciones",)], self.db.add_requirement_to_offer, oferta_titulo, habilidad_nombre, nivel_min, es_critica)
+
+    def update_offer_weights(self, titulo, mults):
+        return self._write([("oferta", titulo), ("ofertas",), ("adecuaciones",)], self.db.update_offer_weights, titulo, mults)
+
+    def save_matching_score(self, email, oferta_titulo, scores):
+        return self._write([("adecuaciones", oferta_titulo)], self.db.save_matching_score, email, oferta_titulo, scores)
+
+    def save_matching_scores(self, oferta_titulo, rows, batch_size=500):
+        return self._write([("adecuaciones", oferta_titulo)], self.db.save_matching_scores, oferta_titulo, rows, batch_size)
+
+    def save_matching_matrix(self, rows, batch_size=500):
+        tags = [("adecuaciones", titulo) for titulo in {row['oferta_titulo'] for row in rows}]
+        return self._write(tags, self.db.save_matching_matrix, rows, batch_size)
+
+    def save_rescored_matches(self, oferta_id, rows):
+        return self._write([("adecuaciones",)], self.db.save_rescored_matches, oferta_id, rows)
+
+    def save_candidates_bulk(self, candidatos):
+        return self._write(self._candidate_tags(candidatos), self.db.save_candidates_bulk, candidatos)
+
+    def save_candidate_bulk(self, personal_data, skills, experiences):
+        tags = self._candidate_tags([{"personal_data": personal_data, "experiences": experiences}])
+        return self._write(tags, self.db.save_candidate_bulk, personal_data, skills, experiences)
+
+    def save_offer_bulk(self, titulo, detalles, mults, email_empresa, requisitos):
+        return self._write([("ofertas",), ("oferta", titulo), ("habilidades",)], self.db.save_offer_bulk, titulo, detalles, mults, email_empresa, requisitos)
+
+    def import_candidates_jsonl(self, path, chunk_size=500):
+        try:
+            return self.db.import_candidates_jsonl(path, chunk_size)
+        finally:
+            self.cache.clear()
+
+    @staticmethod
+    def _candidate_tags(candidatos):
+        # Un candidato que ya existia se actualiza y sus adecuaciones quedan desactualizadas
+        tags = [("candidatos",), ("habilidades",), ("empresas",), ("adecuaciones",)]
+        for cand in candidatos:
+            tags.append(("candidato", cand["personal_data"].get("email")))
+            for exp in cand.get("experiences") or []:
+                tags.append(("empresa", exp.get("empresa_email")))
+        return tags
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import threading
+import weakref
+from neo4j import GraphDatabase, AsyncGraphDatabase
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Un unico driver (con su pool de conexiones) por proceso, compartido por todos los
+# Neo4jService y por los hilos del agente. Se crea en el primer uso.
+# Las conexiones del driver async quedan atadas al event loop que las abrio, asi que hay
+# uno por loop (asyncio.run por pedido, tests, etc.) compartido por los AsyncNeo4jService de ese loop.
+_driver = None
+_async_drivers = weakref.WeakKeyDictionary()  # event loop -> driver async
+_lock = threading.Lock()
+
+
+def driver_config():
+    # Pool y reintentos, configurables por variables de entorno
+    return {
+        "max_connection_pool_size": int(os.getenv("NEO4J_POOL_SIZE", "50")),
+        "connection_acquisition_timeout": float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "30")),
+        "max_connection_lifetime": float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600")),
+        # Tiempo maximo que execute_read / execute_write reintentan ante errores transitorios
+        "max_transaction_retry_time": float(os.getenv("NEO4J_MAX_RETRY_TIME", "15")),
+    }
+
+
+def session_config():
+    # Base de datos (None = la default del servidor) y registros por lote al leer resultados
+    return {
+        "database": os.getenv("NEO4J_DATABASE") or None,
+        "fetch_size": int(os.getenv("NEO4J_FETCH_SIZE", "1000")),
+    }
+
+
+def _auth():
+    return os.getenv("NEO4J_URI"), (os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD"))
+
+
+def get_driver():
+    global _driver
+    with _lock:
+        if _driver is None:
+            uri, auth = _auth()
+            _driver = GraphDatabase.driver(uri, auth=auth, **driver_config())
+        return _driver
+
+
+def get_async_driver():
+    # Driver del event loop que esta corriendo (hay que llamarlo desde una corutina)
+    loop = asyncio.get_running_loop()
+    with _lock:
+        driver = _async_drivers.get(loop)
+        if driver is None:
+            # Los loops ya cerrados no van a volver a usar su driver
+            for closed in [l for l in _async_drivers if l.is_closed()]:
+                del _async_drivers[closed]
+            uri, auth = _auth()
+            driver = _async_drivers[loop] = AsyncGraphDatabase.driver(uri, auth=auth, **driver_config())
+        return driver
+
+
+def close_driver():
+    # Cierra el driver compartido (al apagar el proceso). Un get_driver posterior crea uno nuevo
+    global _driver
+    with _lock:
+        driver, _driver = _driver, None
+    if driver is not None:
+        driver.close()
+
+
+async def close_async_driver():
+    # Cierra el driver async del loop actual (antes de que termine el loop)
+    with _lock:
+        driver = _async_drivers.pop(asyncio.get_running_loop(), None)
+    if driver is not None:
+        await driver.close()
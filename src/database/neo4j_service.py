@@ -1,65 +1,286 @@
-import os
-from neo4j import GraphDatabase
+import copy
+import logging
+import sys
+import time
+import json
+from datetime import date
+from neo4j import READ_ACCESS
+from neo4j.exceptions import ClientError, ConstraintError, Neo4jError
 from dotenv import load_dotenv
 
+from src.database.driver import get_driver, session_config
+from src.utils.helpers import is_end_of_month
+from src.utils.metrics import METRICS
+from src.database.queries import (
+    fulltext_query,
+    SEARCH_CANDIDATES_FULLTEXT_QUERY,
+    SEARCH_CANDIDATES_QUERY,
+    SEARCH_CANDIDATES_PAGE_FULLTEXT_QUERY,
+    SEARCH_CANDIDATES_PAGE_QUERY,
+    CANDIDATE_PROFILE_QUERY,
+    CANDIDATE_PROFILES_BY_EMAIL_QUERY,
+    ALL_CANDIDATE_PROFILES_QUERY,
+    SKILL_SCORES_FOR_OFFER_QUERY,
+    SEARCH_OFFERS_QUERY,
+    SEARCH_OFFERS_PAGE_QUERY,
+    OFFER_REQUIREMENTS_FULLTEXT_QUERY,
+    OFFER_REQUIREMENTS_QUERY,
+    OFFER_REQUIREMENTS_BY_ID_QUERY,
+    OFFERS_REQUIREMENTS_BY_TITLES_FULLTEXT_QUERY,
+    OFFERS_REQUIREMENTS_BY_TITLES_QUERY,
+    ALL_OFFER_REQUIREMENTS_QUERY,
+    COMPILED_OFFER_QUERY,
+    ALL_SKILLS_QUERY,
+    COMPANY_EXISTS_QUERY,
+    SAVE_MATCHING_SCORE_QUERY,
+    SAVE_MATCHING_SCORES_QUERY,
+    SAVE_MATCHING_MATRIX_QUERY,
+    SAVE_CANDIDATES_BULK_QUERY,
+    SAVE_NEW_CANDIDATE_QUERY,
+    SAVE_COMPILED_OFFER_QUERY,
+    DELETE_COMPILED_OFFER,
+    UPDATE_OFFER_WEIGHTS_QUERY,
+    SAVE_OFFER_BULK_QUERY,
+)
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Constraints e indices que usan las consultas de este servicio (todos idempotentes)
+SCHEMA_STATEMENTS = [
+    "CREATE CONSTRAINT candidato_email IF NOT EXISTS FOR (c:Candidato) REQUIRE c.email IS UNIQUE",
+    "CREATE CONSTRAINT empresa_email IF NOT EXISTS FOR (e:Empresa) REQUIRE e.email IS UNIQUE",
+    "CREATE CONSTRAINT habilidad_nombre IF NOT EXISTS FOR (h:Habilidad) REQUIRE h.nombre IS UNIQUE",
+    # El titulo de oferta no se fuerza unico (puede repetirse), solo se indexa
+    "CREATE RANGE INDEX oferta_titulo IF NOT EXISTS FOR (o:Oferta) ON (o.titulo)",
+    "CREATE RANGE INDEX oferta_fecha_publicacion IF NOT EXISTS FOR (o:Oferta) ON (o.fecha_publicacion)",
+    "CREATE FULLTEXT INDEX candidato_nombre_ft IF NOT EXISTS FOR (c:Candidato) ON EACH [c.nombre, c.apellido]",
+    "CREATE FULLTEXT INDEX oferta_titulo_ft IF NOT EXISTS FOR (o:Oferta) ON EACH [o.titulo]",
+]
+
+def _plan_operators(plan):
+    # Recorre el plan de EXPLAIN y devuelve los operadores de acceso (indices, scans, procedimientos)
+    ops = []
+    operator = plan.get("operatorType", "")
+    if any(k in operator for k in ("Index", "Scan", "ProcedureCall")):
+        ops.append({"operador": operator.split("@")[0], "detalle": plan.get("args", {}).get("Details")})
+    for child in plan.get("children", []):
+        ops.extend(_plan_operators(child))
+    return ops
+
 class Neo4jService:
-    def __init__(self):
-        self.uri = os.getenv("NEO4J_URI")
-        self.user = os.getenv("NEO4J_USER")
-        self.password = os.getenv("NEO4J_PASSWORD")
-        self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
+    def __init__(self, driver=None, database=None, fetch_size=None):
+        # Por defecto usa el driver compartido del proceso (src/database/driver.py), que recien
+        # se crea en la primera consulta. Se puede pasar otro (ej: el fake en memoria de benchmarks/)
+        self._driver = driver
+        config = session_config()
+        self.database = database or config["database"]
+        self.fetch_size = fetch_size or config["fetch_size"]
+        self._explain_plans = None
+
+    @property
+    def driver(self):
+        return self._driver or get_driver()
 
     def close(self):
-        self.driver.close()
+        # Solo cierra un driver propio (pasado en el constructor). El compartido lo usan los demas
+        # servicios del proceso: se cierra con close_driver() al apagar
+        if self._driver is not None:
+            self._driver.close()
+
+
+    # Helpers
+    def _session(self, **kwargs):
+        return self.driver.session(database=self.database, fetch_size=self.fetch_size, **kwargs)
+
+    def _execute(self, query, parameters, write, method):
+        # Transaccion administrada (execute_read / execute_write): el driver la reintenta ante
+        # errores transitorios y, en un cluster, la manda a un lector o al lider segun corresponda
+        with self._session() as session:
+            if self._explain_plans is not None:
+                # Modo reporte (index_usage_report): solo se guarda el plan, no se ejecuta nada
+                self._explain_plans.append(session.run("EXPLAIN " + query, parameters).consume().plan)
+                return []
+
+            attempts = 0
+
+            def work(tx):
+                nonlocal attempts
+                attempts += 1
+                return [record.data() for record in tx.run(query, parameters)]
+
+            execute = session.execute_write if write else session.execute_read
+            with METRICS.timer("neo4j_write_seconds" if write else "neo4j_query_seconds", method=method):
+                rows = execute(work)
 
+        METRICS.inc("neo4j_rows", len(rows), method=method)
+        if attempts > 1:
+            METRICS.inc("neo4j_retries", attempts - 1, method=method)
+        return rows
 
-    # Helper
     def run_query(self, query, parameters=None):
-        with self.driver.session() as session:
-            result = session.run(query, parameters)
-            return [record.data() for record in result]
+        # Lectura. Las metricas se etiquetan con el metodo que hizo la consulta (get_candidate_profile, etc.)
+        return self._execute(query, parameters, False, sys._getframe(1).f_code.co_name)
+
+    def stream_query(self, query, parameters=None):
+        # Igual que run_query pero devuelve los registros de a uno, sin armar la lista completa.
+        # El metodo que llama se toma aca y no dentro del generador (ahi seria quien lo consume)
+        return self._stream(query, parameters, sys._getframe(1).f_code.co_name)
+
+    def _stream(self, query, parameters, method):
+        rows = 0
+        # Se mide solo el tiempo de la consulta y de traer cada registro, no lo que tarda quien consume
+        elapsed = 0.0
+        # Auto-commit para poder ir devolviendo registros (una transaccion administrada no se
+        # puede reintentar a mitad de camino); fetch_size limita cuanto se trae por vez.
+        # Son todas lecturas: en un cluster van a un lector y no al lider
+        with self._session(default_access_mode=READ_ACCESS) as session:
+            try:
+                start = time.perf_counter()
+                records = iter(session.run(query, parameters))
+                elapsed += time.perf_counter() - start
+                while True:
+                    start = time.perf_counter()
+                    record = next(records, None)
+                    elapsed += time.perf_counter() - start
+                    if record is None:
+                        break
+                    rows += 1
+                    yield record.data()
+            finally:
+                METRICS.observe("neo4j_query_seconds", elapsed, method=method)
+        METRICS.inc("neo4j_rows", rows, method=method)
+
+    def iter_pages(self, fetch_page, **kwargs):
+        # Recorre un metodo paginado (get_*_page) pagina por pagina, devolviendo los items de a uno
+        cursor = None
+        while True:
+            page = fetch_page(cursor=cursor, **kwargs)
+            yield from page['items']
+            cursor = page['next_cursor']
+            if not cursor:
+                return
+
+    def run_write_query(self, query, parameters=None):
+        # Ejecuta la escritura en una unica transaccion (si algo falla no queda nada a medias)
+        return self._execute(query, parameters, True, sys._getframe(1).f_code.co_name)
+
+
+    # --- ESQUEMA ---
+    def ensure_schema(self):
+        # Crea constraints e indices si no existen (se puede llamar en cada arranque: con
+        # NEO4J_ENSURE_SCHEMA=1 lo hace src/agent/tools.py, o a mano con "python -m src.database.neo4j_service")
+        for statement in SCHEMA_STATEMENTS:
+            self.run_write_query(statement)
+
+    def index_usage_report(self):
+        # Corre EXPLAIN sobre las consultas de lectura frecuentes y devuelve que indices usa cada una
+        checks = {
+            "get_all_candidates": lambda db: db.get_all_candidates("a"),
+            "get_candidate_profile": lambda db: db.get_candidate_profile("a"),
+            "get_offer_requirements": lambda db: db.get_offer_requirements("a"),
+            "get_all_offers": lambda db: db.get_all_offers("a", "2000-01-01", "2100-01-01"),
+            "company_exists": lambda db: db.company_exists("a"),
+            "get_best_candidates_for_offer": lambda db: db.get_best_candidates_for_offer("a"),
+            "add_skill_to_candidate": lambda db: db.add_skill_to_candidate("a", "a", 1),
+            "add_requirement_to_offer": lambda db: db.add_requirement_to_offer("a", "a", 1, False),
+            "save_matching_score": lambda db: db.save_matching_score("a", "a", {}),
+        }
+        # Las consultas pasan por una copia en modo reporte, asi este servicio sigue ejecutando
+        # normal si otro hilo lo usa mientras tanto
+        explainer = copy.copy(self)
+        report = {}
+        for name, call in checks.items():
+            explainer._explain_plans = []
+            call(explainer)
+            report[name] = [op for plan in explainer._explain_plans for op in _plan_operators(plan)]
+        return report
 
 
     # --- CONSULTAR DATOS ---
     def get_all_candidates(self, criterio):
-        query = """
-            MATCH (c:Candidato) 
-            WHERE c.nombre CONTAINS $criterio OR c.apellido CONTAINS $criterio
-            RETURN c.nombre, c.apellido, c.email
-        """
+        busqueda = fulltext_query(criterio)
+        if busqueda:
+            # Usa el indice full-text (ver ensure_schema) en vez de recorrer todos los candidatos
+            query = SEARCH_CANDIDATES_FULLTEXT_QUERY
+            try:
+                result = self.run_query(query, {"busqueda": busqueda})
+                # Sin resultados se prueba CONTAINS (el indice busca por prefijo: "ez" no encuentra "Pérez")
+                if result or self._explain_plans is not None:
+                    return result
+            except ClientError as e:
+                # todavia no se creo el indice (ver ensure_schema), se sigue con la busqueda por CONTAINS
+                logger.warning("Indice full-text no disponible, se busca por CONTAINS: %s", e)
+
+        query = SEARCH_CANDIDATES_QUERY
         return self.run_query(query, {"criterio": criterio})
 
+    def get_candidates_page(self, criterio, cursor=None, limit=50):
+        # Igual que get_all_candidates pero de a 'limit' (minimo 1), ordenado por email
+        limit = max(1, int(limit))
+        params = {"criterio": criterio or "", "cursor": cursor or None, "limit": limit}
+        items = None
+        busqueda = fulltext_query(criterio)
+        if busqueda:
+            try:
+                items = self.run_query(SEARCH_CANDIDATES_PAGE_FULLTEXT_QUERY, {**params, "busqueda": busqueda})
+                # Como en get_all_candidates, si el indice no encuentra nada se pagina por CONTAINS.
+                # Con cursor, una pagina vacia puede ser el final del full-text: se mira si la primera tenia algo
+                if not items and (cursor is None or not self.run_query(
+                        SEARCH_CANDIDATES_PAGE_FULLTEXT_QUERY, {**params, "busqueda": busqueda, "cursor": None, "limit": 1})):
+                    items = None
+            except ClientError as e:
+                # todavia no se creo el indice (ver ensure_schema), se sigue con la busqueda por CONTAINS
+                logger.warning("Indice full-text no disponible, se busca por CONTAINS: %s", e)
+        if items is None:
+            items = self.run_query(SEARCH_CANDIDATES_PAGE_QUERY, params)
+
+        next_cursor = items[-1]['c.email'] if len(items) == limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
     def get_candidate_profile(self, email):
         #Extrae datos, habilidades y experiencia de un candidato.
-        query = """
-        MATCH (c:Candidato {email: $email})
-        OPTIONAL MATCH (c)-[p:POSEE]->(h:Habilidad)
-        WITH c, collect({nombre: h.nombre, nivel: p.nivel, ultimo_uso: p.ultimo_uso, tipo: h.tipo}) AS habilidades
-        OPTIONAL MATCH (c)-[t:TRABAJO_EN]->(e:Empresa)
-        RETURN c.nombre + ' ' + c.apellido AS nombre_completo,
-               c.email AS email,
-               c.ubicacion AS ubicacion,
-               c.fecha_nacimiento AS fecha_nacimiento,
-               c.movilidad AS movilidad,
-               c.seniority AS seniority,
-               habilidades,
-               collect({puesto: t.puesto, fecha_inicio: t.fecha_inicio, fecha_fin: t.fecha_fin}) AS experiencias
-        """
+        query = CANDIDATE_PROFILE_QUERY
         result = self.run_query(query, {"email": email})
         return result[0] if result else None
 
-    def get_all_offers(self, title=None, date_from=None, date_to=None):
+    def get_candidate_profiles(self, emails):
+        # Varios perfiles (mismo formato que get_candidate_profile) en una sola consulta
+        return self.run_query(CANDIDATE_PROFILES_BY_EMAIL_QUERY, {"emails": list(emails)})
+
+    def stream_candidate_profiles(self):
+        # Todos los perfiles (mismo formato que get_candidate_profile) en una sola consulta
+        query = ALL_CANDIDATE_PROFILES_QUERY
+        return self.stream_query(query)
+
+    def stream_skill_scores_for_offer(self, titulo, emails=None, hoy=None):
+        # Scores tecnico y blando (calculados en Neo4j) + experiencias de cada candidato para la oferta.
+        # Sin emails, todos los candidatos
+        hoy = hoy or date.today()
+        params = {
+            "titulo": titulo,
+            "emails": list(emails) if emails is not None else None,
+            "hoy": {
+                "anio": hoy.year,
+                "mes": hoy.month,
+                "dia": hoy.day,
+                "fin_de_mes": is_end_of_month(hoy),
+            },
+        }
+        return self.stream_query(SKILL_SCORES_FOR_OFFER_QUERY, params)
+
+    def stream_candidate_roles(self):
+        # Pares (email, puesto) de todas las experiencias, para armar el RoleIndex
         query = """
-            MATCH (o:Oferta)
-                WHERE 1 = 1
-                    AND ($titulo IS NULL OR o.titulo CONTAINS $titulo)
-                    AND ($fecha_desde IS NULL OR o.fecha_publicacion >= date($fecha_desde))
-                    AND ($fecha_hasta IS NULL OR o.fecha_publicacion <= date($fecha_hasta))
-                RETURN o
-                ORDER BY o.fecha_publicacion DESC
+            MATCH (c:Candidato)-[t:TRABAJO_EN]->(:Empresa)
+            WHERE t.puesto IS NOT NULL
+            RETURN c.email AS email, t.puesto AS puesto
         """
+        return self.stream_query(query)
+
+    def get_all_offers(self, title=None, date_from=None, date_to=None):
+        query = SEARCH_OFFERS_QUERY
         params = {
            "titulo": title,
             "fecha_desde": date_from,
@@ -68,27 +289,80 @@ class Neo4jService:
 
         return self.run_query(query, params)
     
+    def get_offers_page(self, title=None, date_from=None, date_to=None, cursor=None, limit=20):
+        # Igual que get_all_offers pero de a 'limit'. El cursor es "fecha|id" de la ultima oferta
+        # devuelta ("|id" si no tiene fecha de publicacion). 'limit' minimo 1
+        limit = max(1, int(limit))
+        cursor_fecha, _, cursor_id = (cursor or "").partition("|")
+        params = {
+            "titulo": title,
+            "fecha_desde": date_from,
+            "fecha_hasta": date_to,
+            "cursor_fecha": cursor_fecha or None,
+            "cursor_id": cursor_id or None,
+            "limit": limit
+        }
+        rows = self.run_query(SEARCH_OFFERS_PAGE_QUERY, params)
+
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = f"{rows[-1]['cursor_fecha'] or ''}|{rows[-1]['cursor_id']}"
+        return {"items": [{"o": row['o']} for row in rows], "next_cursor": next_cursor}
+
     def get_offer_requirements(self, titulo):
         #TODO: ver si agrego: meses_min_experiencia: toInteger($detalles.meses_min_experiencia),
-        query = """
-        MATCH (o:Oferta) WHERE o.titulo CONTAINS $titulo
-        OPTIONAL MATCH (o)-[r:REQUIERE]->(h:Habilidad)
-        RETURN o.titulo AS titulo,
-               o.modalidad AS modalidad,
-               o.seniority_buscado AS seniority_buscado,
-               o.salario_max_usd AS salario,
-               o.fecha_publicacion AS fecha_publicacion,
-               o.meses_min_experiencia AS meses_min_experiencia,
-               o.mult_tecnico AS w_tec,
-               o.mult_blando AS w_blan,
-               o.mult_experiencia AS w_exp,
-               collect({nombre: h.nombre, nivel_minimo: r.nivel_minimo, es_critica: r.es_critica, tipo: h.tipo}) AS requisitos
-        """
+        busqueda = fulltext_query(titulo)
+        if busqueda:
+            # Indice full-text: primero el titulo exacto, si no el de mejor score
+            try:
+                result = self.run_query(OFFER_REQUIREMENTS_FULLTEXT_QUERY, {"titulo": titulo, "busqueda": busqueda})
+                if result or self._explain_plans is not None:
+                    return result[0] if result else None
+            except ClientError as e:
+                # todavia no se creo el indice (ver ensure_schema), se sigue con la busqueda por CONTAINS
+                logger.warning("Indice full-text no disponible, se busca por CONTAINS: %s", e)
+
+        query = OFFER_REQUIREMENTS_QUERY
         result = self.run_query(query, {"titulo": titulo})
         return result[0] if result else None
-    
+
+    def get_offer_requirements_by_id(self, oferta_id):
+        result = self.run_query(OFFER_REQUIREMENTS_BY_ID_QUERY, {"oferta_id": oferta_id})
+        return result[0] if result else None
+
+    def get_offers_requirements(self, titulos):
+        # Varias ofertas (mismo formato que get_offer_requirements) en una o dos consultas. Cada titulo
+        # se resuelve como en get_offer_requirements: full-text con el exacto primero y, si no, CONTAINS
+        titulos = list(titulos)
+        busquedas = [{"titulo": t, "busqueda": fulltext_query(t)} for t in titulos]
+        busquedas = [b for b in busquedas if b["busqueda"]]
+        result, resueltos = [], set()
+        if busquedas:
+            try:
+                for row in self.run_query(OFFERS_REQUIREMENTS_BY_TITLES_FULLTEXT_QUERY, {"busquedas": busquedas}):
+                    resueltos.update(row.pop('buscados'))
+                    result.append(row)
+            except ClientError as e:
+                # todavia no se creo el indice (ver ensure_schema), se sigue con la busqueda por CONTAINS
+                logger.warning("Indice full-text no disponible, se busca por CONTAINS: %s", e)
+
+        pendientes = [t for t in titulos if t not in resueltos]
+        if pendientes:
+            query = OFFERS_REQUIREMENTS_BY_TITLES_QUERY
+            result += [row for row in self.run_query(query, {"titulos": pendientes}) if row not in result]
+        return result
+
+    def get_compiled_offer(self, titulo):
+        result = self.run_query(COMPILED_OFFER_QUERY, {"titulo": titulo})
+        return result[0]['compilada'] if result else None
+
+    def stream_offer_requirements(self):
+        # Todas las ofertas con sus requisitos (mismo formato que get_offer_requirements)
+        query = ALL_OFFER_REQUIREMENTS_QUERY
+        return self.stream_query(query)
+
     def get_all_skills(self):
-        query = "MATCH (h:Habilidad) RETURN h.nombre AS nombre, h.tipo AS tipo ORDER BY nombre"
+        query = ALL_SKILLS_QUERY
         return self.run_query(query)
 
     def get_all_companies(self):
@@ -96,14 +370,15 @@ class Neo4jService:
         return self.run_query(query)
 
     def company_exists(self, email):
-        query = "MATCH (e:Empresa {email: $email}) RETURN count(e) > 0 AS existe"
+        query = COMPANY_EXISTS_QUERY
         result = self.run_query(query, {"email": email})
         return result[0]['existe'] if result else False
 
     def get_best_candidates_for_offer(self, oferta_titulo, limit=5):
         query = """
             MATCH (c:Candidato)-[a:ADECUACION]->(o:Oferta {titulo: $titulo})
-            RETURN c.nombre + ' ' + c.apellido AS nombre, a.score_final AS score
+            RETURN c.nombre + ' ' + c.apellido AS nombre, a.score_final AS score,
+                   a.desactualizada IS NOT NULL AS desactualizado
             ORDER BY a.score_final DESC LIMIT $limit
         """
         return self.run_query(query, {"titulo": oferta_titulo, "limit": limit})
@@ -127,7 +402,7 @@ class Neo4jService:
             "email": email,
             "perfil": perfil
         }
-        return self.run_query(query, params)
+        return self.run_write_query(query, params)
 
     def create_skill(self, nombre, tipo):
         query= """
@@ -140,7 +415,7 @@ class Neo4jService:
             "nombre": nombre,
             "tipo": tipo
         }
-        self.run_query(query, params)
+        self.run_write_query(query, params)
 
     def create_offer(self, titulo, detalles, mults, email_empresa):
         #TODO: ver si agrego: meses_min_experiencia: toInteger($detalles.meses_min_experiencia),
@@ -167,7 +442,7 @@ class Neo4jService:
             "detalles": detalles,
             "mults": mults
         }
-        self.run_query(query, params)
+        self.run_write_query(query, params)
 
 
     def create_company(self, email, datos_empresa):
@@ -183,7 +458,7 @@ class Neo4jService:
             "email": email,
             "datos": datos_empresa
         }
-        self.run_query(query, params)
+        self.run_write_query(query, params)
 
 
     # --- CREAR ALGUNAS RELACIONES ---
@@ -195,8 +470,11 @@ class Neo4jService:
             MERGE (c)-[p:POSEE]->(h)
                 SET p.nivel = $nivel, 
                 p.ultimo_uso = date()
+            WITH c
+            OPTIONAL MATCH (c)-[a:ADECUACION]->(:Oferta)
+            SET a.desactualizada = datetime()
         """
-        self.run_query(query, {"email": email, "nombre_habilidad": nombre_habilidad, "nivel": nivel})
+        self.run_write_query(query, {"email": email, "nombre_habilidad": nombre_habilidad, "nivel": nivel})
 
     def add_experience_to_candidate(self, email_candidato, email_empresa, experiencia):
         #Candidato - TRABAJO_EN -> Empresa
@@ -205,13 +483,16 @@ class Neo4jService:
             MERGE (e:Empresa {email: $email_empresa})
             MERGE (c)-[t:TRABAJO_EN {puesto: $experiencia.puesto}]->(e)
             SET t.fecha_inicio = date($experiencia.fecha_inicio), t.fecha_fin = date($experiencia.fecha_fin)
+            WITH c
+            OPTIONAL MATCH (c)-[a:ADECUACION]->(:Oferta)
+            SET a.desactualizada = datetime()
         """
         params = {
             "email_candidato": email_candidato,
             "email_empresa": email_empresa,
             "experiencia": experiencia
         }
-        return self.run_query(query, params)
+        return self.run_write_query(query, params)
 
     def add_requirement_to_offer(self, oferta_titulo, habilidad_nombre, nivel_min, es_critica):
         # Oferta - REQUIERE -> Habilidad
@@ -219,30 +500,149 @@ class Neo4jService:
             MATCH (o:Oferta {titulo: $oferta_titulo})
             MERGE (h:Habilidad {nombre: $habilidad_nombre})
             MERGE (o)-[r:REQUIERE]->(h)
-            SET r.nivel_minimo = $nivel_min, r.es_critica = $es_critica
+            SET r.nivel_minimo = $nivel_min, r.es_critica = $es_critica""" + DELETE_COMPILED_OFFER + """
+            OPTIONAL MATCH (:Candidato)-[a:ADECUACION]->(o)
+            SET a.desactualizada = datetime()
         """
-        return self.run_query(query, {
+        return self.run_write_query(query, {
             "oferta_titulo": oferta_titulo, 
             "habilidad_nombre": habilidad_nombre, 
             "nivel_min": nivel_min, 
             "es_critica": es_critica
         })
     
+    def update_offer_weights(self, titulo, mults):
+        # mults: {tecnico, blando, experiencia}, los que falten quedan como estan
+        return self.run_write_query(UPDATE_OFFER_WEIGHTS_QUERY, {"titulo": titulo, "mults": mults})
+
+    def save_compiled_offer(self, titulo, compilada):
+        self.run_write_query(SAVE_COMPILED_OFFER_QUERY, {"titulo": titulo, "compilada": compilada})
+
     # --- GUARDAR ADECUACION (Persistir el Score) ---
     def save_matching_score(self, email, oferta_titulo, scores):
+        query = SAVE_MATCHING_SCORE_QUERY
+        params = {"email": email, "oferta_titulo": oferta_titulo, "scores": scores}
+        self.run_write_query(query, params)
+
+    def save_matching_scores(self, oferta_titulo, rows, batch_size=500):
+        # rows: lista de {email, scores} con el mismo formato de scores que save_matching_score
+        query = SAVE_MATCHING_SCORES_QUERY
+        for start in range(0, len(rows), batch_size):
+            self.run_write_query(query, {"oferta_titulo": oferta_titulo, "rows": rows[start:start + batch_size]})
+
+    def save_matching_matrix(self, rows, batch_size=500):
+        # rows: lista de {email, oferta_titulo, scores}, de varias ofertas mezcladas
+        query = SAVE_MATCHING_MATRIX_QUERY
+        for start in range(0, len(rows), batch_size):
+            self.run_write_query(query, {"rows": rows[start:start + batch_size]})
+
+
+
+    # --- ADECUACIONES DESACTUALIZADAS (re-scoring incremental) ---
+    # Los add_* que cambian un perfil o una oferta marcan sus ADECUACION con a.desactualizada
+    def get_stale_matches(self, limit=500):
         query = """
-            MATCH (c:Candidato {email: $email})
-            MATCH (o:Oferta {titulo: $oferta_titulo})
-            MERGE (c)-[a:ADECUACION]->(o)
-            SET a.score_final = $scores.final,
-                a.score_tecnico = $scores.tecnico,
-                a.score_blando = $scores.blando,
-                a.score_experiencia = $scores.exp,
+            MATCH (c:Candidato)-[a:ADECUACION]->(o:Oferta)
+            WHERE a.desactualizada IS NOT NULL
+            RETURN c.email AS email, elementId(o) AS oferta_id, a.desactualizada AS marca
+            ORDER BY a.desactualizada LIMIT $limit
+        """
+        return self.run_query(query, {"limit": limit})
+
+    def count_stale_matches(self):
+        query = "MATCH ()-[a:ADECUACION]->() WHERE a.desactualizada IS NOT NULL RETURN count(a) AS pendientes"
+        return self.run_query(query)[0]['pendientes']
+
+    def save_rescored_matches(self, oferta_id, rows):
+        # rows: {email, scores, marca}. La marca solo se borra si no hubo otro cambio mientras se recalculaba
+        query = """
+            MATCH (o:Oferta) WHERE elementId(o) = $oferta_id
+            UNWIND $rows AS row
+            MATCH (c:Candidato {email: row.email})-[a:ADECUACION]->(o)
+            SET a.score_final = row.scores.final,
+                a.score_tecnico = row.scores.tecnico,
+                a.score_blando = row.scores.blando,
+                a.score_experiencia = row.scores.exp,
                 a.fecha_calculo = datetime()
+            FOREACH (_ IN CASE WHEN a.desactualizada = row.marca THEN [1] ELSE [] END |
+                REMOVE a.desactualizada
+            )
         """
-        params = {"email": email, "oferta_titulo": oferta_titulo, "scores": scores}
-        self.run_query(query, params)
+        self.run_write_query(query, {"oferta_id": oferta_id, "rows": rows})
+
+
+    # --- ESCRITURAS MASIVAS (UNWIND, una transaccion por lote) ---
+    def save_candidates_bulk(self, candidatos):
+        # candidatos: lista de {personal_data, skills, experiences} (mismo formato que la tool save_complete_candidate)
+        query = SAVE_CANDIDATES_BULK_QUERY
+        result = self.run_write_query(query, {"candidatos": candidatos})
+        return result[0]['candidatos_creados'] if result else 0
+
+    def save_candidate_bulk(self, personal_data, skills, experiences):
+        # Candidato nuevo + habilidades + experiencias en una sola consulta. Si el email ya existe
+        # no se escribe nada y devuelve 0 (para actualizar esta save_candidates_bulk)
+        query = SAVE_NEW_CANDIDATE_QUERY
+        params = {"candidato": {"personal_data": personal_data, "skills": skills, "experiences": experiences}}
+        try:
+            result = self.run_write_query(query, params)
+        except ConstraintError:
+            return 0  # otra transaccion creo el mismo email al mismo tiempo
+        return result[0]['candidatos_creados'] if result else 0
+
+    def save_offer_bulk(self, titulo, detalles, mults, email_empresa, requisitos):
+        # Oferta + requisitos en una sola consulta. requisitos: lista de {habilidad, nivel_minimo, es_critica}
+        query = SAVE_OFFER_BULK_QUERY
+        params = {
+            "titulo": titulo,
+            "email_empresa": email_empresa,
+            "detalles": detalles,
+            "mults": mults,
+            "requisitos": requisitos
+        }
+        return self.run_write_query(query, params)
+
+    def import_candidates_jsonl(self, path, chunk_size=500):
+        # Importa candidatos desde un JSONL (una linea = {personal_data, skills, experiences}) por lotes.
+        # Los emails que ya existen se actualizan; devuelve cuantos candidatos se crearon
+        total = 0
+        chunk = []
+        first_line = None
+
+        def save(last_line):
+            try:
+                return self.save_candidates_bulk(chunk)
+            except Neo4jError as e:
+                # Cada lote es una transaccion: los anteriores quedan guardados, este no
+                raise ValueError(
+                    f"Fallo el lote de las lineas {first_line}-{last_line} de {path} "
+                    f"({total} candidatos creados antes): {e}"
+                ) from e
+
+        with open(path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                first_line = first_line or number
+                chunk.append(json.loads(line))
+                if len(chunk) >= chunk_size:
+                    total += save(number)
+                    chunk, first_line = [], None
+        if chunk:
+            total += save(number)
+        return total
+
+
+
+#TODO: crear una funcion para actualizar una oferta?
 
 
+if __name__ == "__main__":
+    # Crea constraints e indices en la base configurada (NEO4J_URI, NEO4J_DATABASE, ...)
+    from src.database.driver import close_driver
 
-#TODO: crear una funcion para actualizar una oferta?
\ No newline at end of file
+    try:
+        Neo4jService().ensure_schema()
+        print(f"Esquema al dia: {len(SCHEMA_STATEMENTS)} constraints/indices")
+    finally:
+        close_driver()
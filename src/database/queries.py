@@ -0,0 +1,343 @@
+# Consultas Cypher compartidas entre Neo4jService y AsyncNeo4jService
+import re
+
+LUCENE_SPECIAL_CHARS = re.compile(r'([+\-!(){}\[\]^"~*?:\\/]|&&|\|\|)')
+
+
+def fulltext_query(text):
+    # "juan pe" -> "juan* AND pe*" (busqueda por prefijo de cada palabra, sin mayusculas)
+    tokens = [LUCENE_SPECIAL_CHARS.sub(r"\\\1", t) for t in (text or "").split()]
+    return " AND ".join(t + "*" for t in tokens)
+
+
+# --- CONSULTAR DATOS ---
+SEARCH_CANDIDATES_FULLTEXT_QUERY = """
+    CALL db.index.fulltext.queryNodes('candidato_nombre_ft', $busqueda) YIELD node AS c
+    RETURN c.nombre, c.apellido, c.email
+"""
+
+SEARCH_CANDIDATES_QUERY = """
+    MATCH (c:Candidato) 
+    WHERE c.nombre CONTAINS $criterio OR c.apellido CONTAINS $criterio
+    RETURN c.nombre, c.apellido, c.email
+"""
+
+# Paginado por cursor (email, que tiene indice unico): WHERE c.email > ultimo email de la pagina anterior
+SEARCH_CANDIDATES_PAGE_FULLTEXT_QUERY = """
+    CALL db.index.fulltext.queryNodes('candidato_nombre_ft', $busqueda) YIELD node AS c
+    WITH c WHERE $cursor IS NULL OR c.email > $cursor
+    RETURN c.nombre, c.apellido, c.email
+    ORDER BY c.email LIMIT $limit
+"""
+
+SEARCH_CANDIDATES_PAGE_QUERY = """
+    MATCH (c:Candidato)
+    WHERE (c.nombre CONTAINS $criterio OR c.apellido CONTAINS $criterio)
+        AND ($cursor IS NULL OR c.email > $cursor)
+    RETURN c.nombre, c.apellido, c.email
+    ORDER BY c.email LIMIT $limit
+"""
+
+# Parte comun de los perfiles de candidato: datos de 'c' + habilidades + experiencias
+CANDIDATE_PROFILE_RETURN = """
+    OPTIONAL MATCH (c)-[p:POSEE]->(h:Habilidad)
+    WITH c, collect({nombre: h.nombre, nivel: p.nivel, ultimo_uso: p.ultimo_uso, tipo: h.tipo}) AS habilidades
+    OPTIONAL MATCH (c)-[t:TRABAJO_EN]->(e:Empresa)
+    RETURN c.nombre + ' ' + c.apellido AS nombre_completo,
+           c.email AS email,
+           c.ubicacion AS ubicacion,
+           c.fecha_nacimiento AS fecha_nacimiento,
+           c.movilidad AS movilidad,
+           c.seniority AS seniority,
+           habilidades,
+           collect({puesto: t.puesto, fecha_inicio: t.fecha_inicio, fecha_fin: t.fecha_fin}) AS experiencias
+"""
+
+CANDIDATE_PROFILE_QUERY = """
+    MATCH (c:Candidato {email: $email})""" + CANDIDATE_PROFILE_RETURN
+
+CANDIDATE_PROFILES_BY_EMAIL_QUERY = """
+    MATCH (c:Candidato) WHERE c.email IN $emails""" + CANDIDATE_PROFILE_RETURN
+
+ALL_CANDIDATE_PROFILES_QUERY = """
+    MATCH (c:Candidato)""" + CANDIDATE_PROFILE_RETURN
+
+SEARCH_OFFERS_QUERY = """
+    MATCH (o:Oferta)
+        WHERE 1 = 1
+            AND ($titulo IS NULL OR o.titulo CONTAINS $titulo)
+            AND ($fecha_desde IS NULL OR o.fecha_publicacion >= date($fecha_desde))
+            AND ($fecha_hasta IS NULL OR o.fecha_publicacion <= date($fecha_hasta))
+        RETURN o
+        ORDER BY o.fecha_publicacion DESC
+"""
+
+# Paginado por cursor (fecha_publicacion, elementId) en el mismo orden que SEARCH_OFFERS_QUERY.
+# En orden DESC las ofertas sin fecha van primero: un cursor sin fecha ($cursor_fecha null y
+# $cursor_id no) sigue por las sin fecha que faltan y despues por todas las que tienen fecha
+SEARCH_OFFERS_PAGE_QUERY = """
+    MATCH (o:Oferta)
+        WHERE 1 = 1
+            AND ($titulo IS NULL OR o.titulo CONTAINS $titulo)
+            AND ($fecha_desde IS NULL OR o.fecha_publicacion >= date($fecha_desde))
+            AND ($fecha_hasta IS NULL OR o.fecha_publicacion <= date($fecha_hasta))
+            AND ($cursor_id IS NULL
+                OR ($cursor_fecha IS NULL AND (o.fecha_publicacion IS NOT NULL OR elementId(o) < $cursor_id))
+                OR o.fecha_publicacion < date($cursor_fecha)
+                OR (o.fecha_publicacion = date($cursor_fecha) AND elementId(o) < $cursor_id))
+        RETURN o, toString(o.fecha_publicacion) AS cursor_fecha, elementId(o) AS cursor_id
+        ORDER BY o.fecha_publicacion DESC, elementId(o) DESC
+        LIMIT $limit
+"""
+
+# Parte comun de get_offer_requirements: datos de la oferta 'o' + sus requisitos
+OFFER_REQUIREMENTS_RETURN = """
+    OPTIONAL MATCH (o)-[r:REQUIERE]->(h:Habilidad)
+    RETURN o.titulo AS titulo,
+           o.modalidad AS modalidad,
+           o.seniority_buscado AS seniority_buscado,
+           o.salario_max_usd AS salario,
+           o.fecha_publicacion AS fecha_publicacion,
+           o.meses_min_experiencia AS meses_min_experiencia,
+           o.mult_tecnico AS w_tec,
+           o.mult_blando AS w_blan,
+           o.mult_experiencia AS w_exp,
+           collect({nombre: h.nombre, nivel_minimo: r.nivel_minimo, es_critica: r.es_critica, tipo: h.tipo}) AS requisitos
+"""
+
+# Indice full-text: primero el titulo exacto, si no el de mejor score
+OFFER_REQUIREMENTS_FULLTEXT_QUERY = """
+    CALL db.index.fulltext.queryNodes('oferta_titulo_ft', $busqueda) YIELD node AS o, score
+    WITH o ORDER BY o.titulo = $titulo DESC, score DESC LIMIT 1
+""" + OFFER_REQUIREMENTS_RETURN
+
+# Sin indice (o si no encontro nada): la primera que contenga el titulo, tambien con el exacto primero
+OFFER_REQUIREMENTS_QUERY = """
+    MATCH (o:Oferta) WHERE o.titulo CONTAINS $titulo
+    WITH o ORDER BY o.titulo = $titulo DESC LIMIT 1
+""" + OFFER_REQUIREMENTS_RETURN
+
+OFFER_REQUIREMENTS_BY_ID_QUERY = """
+    MATCH (o:Oferta) WHERE elementId(o) = $oferta_id""" + OFFER_REQUIREMENTS_RETURN
+
+ALL_OFFER_REQUIREMENTS_QUERY = """
+    MATCH (o:Oferta)""" + OFFER_REQUIREMENTS_RETURN
+
+# Varias ofertas en una consulta, cada titulo resuelto como en OFFER_REQUIREMENTS_FULLTEXT_QUERY.
+# 'buscados' dice que titulos resolvio cada oferta (los que no aparecen se buscan por CONTAINS)
+OFFERS_REQUIREMENTS_BY_TITLES_FULLTEXT_QUERY = """
+    UNWIND $busquedas AS b
+    CALL {
+        WITH b
+        CALL db.index.fulltext.queryNodes('oferta_titulo_ft', b.busqueda) YIELD node AS o, score
+        RETURN o
+        ORDER BY o.titulo = b.titulo DESC, score DESC
+        LIMIT 1
+    }
+    WITH o, collect(b.titulo) AS buscados""" + OFFER_REQUIREMENTS_RETURN.rstrip() + """,
+           buscados
+"""
+
+# Como OFFER_REQUIREMENTS_QUERY pero para varios titulos: la oferta exacta o, si no hay, la primera que lo contenga
+OFFERS_REQUIREMENTS_BY_TITLES_QUERY = """
+    UNWIND $titulos AS buscado
+    CALL {
+        WITH buscado
+        MATCH (o:Oferta) WHERE o.titulo CONTAINS buscado
+        RETURN o
+        ORDER BY o.titulo = buscado DESC
+        LIMIT 1
+    }
+    WITH DISTINCT o""" + OFFER_REQUIREMENTS_RETURN
+
+# Scores tecnico y blando de una oferta contra todos los candidatos (o los de $emails) calculados
+# en Neo4j, con la misma cuenta que MatchingEngine.calculate_technical_score / calculate_soft_score.
+# Los meses sin usar la habilidad son los de relativedelta: diferencia de anio/mes, menos uno si el
+# dia de ultimo_uso es mayor al de hoy (salvo que hoy sea fin de mes). $hoy lo manda Python para
+# que la recencia no dependa del reloj del servidor. Solo se devuelven los puestos/fechas de las
+# experiencias, el score de experiencia (embeddings) se calcula en Python
+SKILL_SCORES_FOR_OFFER_QUERY = """
+    MATCH (o:Oferta {titulo: $titulo})
+    WITH o LIMIT 1
+    OPTIONAL MATCH (o)-[r:REQUIERE]->(h:Habilidad)
+    WITH collect({habilidad: h, tipo: h.tipo, nivel_minimo: r.nivel_minimo,
+                  peso: CASE WHEN r.es_critica THEN 1.5 ELSE 1.0 END}) AS requisitos
+    WITH [q IN requisitos WHERE q.habilidad IS NOT NULL AND q.tipo = 'Técnica'] AS tecnicos,
+         [q IN requisitos WHERE q.habilidad IS NOT NULL AND q.tipo = 'Blanda'] AS blandos
+    WITH tecnicos, blandos, reduce(total = 0.0, q IN tecnicos | total + q.peso) AS peso_tecnico
+    MATCH (c:Candidato)
+    WHERE $emails IS NULL OR c.email IN $emails
+    WITH c, tecnicos, blandos, peso_tecnico,
+         [(c)-[p:POSEE]->(ch:Habilidad) | {
+             habilidad: ch,
+             nivel: toFloat(p.nivel),
+             meses: CASE WHEN p.ultimo_uso IS NULL THEN NULL
+                         ELSE ($hoy.anio - p.ultimo_uso.year) * 12 + ($hoy.mes - p.ultimo_uso.month)
+                              - CASE WHEN p.ultimo_uso.day > $hoy.dia AND NOT $hoy.fin_de_mes THEN 1 ELSE 0 END
+                    END
+         }] AS habilidades
+    RETURN c.email AS email,
+           c.nombre + ' ' + c.apellido AS nombre_completo,
+           CASE WHEN size(tecnicos) = 0 THEN 1.0
+                ELSE reduce(total = 0.0, q IN tecnicos | total + coalesce(head(
+                    [s IN habilidades WHERE s.habilidad = q.habilidad |
+                        CASE WHEN s.nivel / q.nivel_minimo < 1.0 THEN s.nivel / q.nivel_minimo ELSE 1.0 END
+                        * CASE WHEN s.meses IS NULL THEN 0.5
+                               WHEN s.meses <= 6 THEN 1.0
+                               WHEN s.meses <= 12 THEN 0.8
+                               WHEN s.meses <= 24 THEN 0.6
+                               ELSE 0.4 END
+                        * q.peso]), 0.0)) / peso_tecnico
+           END AS score_tecnico,
+           CASE WHEN size(blandos) = 0 THEN 1.0
+                ELSE reduce(total = 0.0, q IN blandos | total + coalesce(head(
+                    [s IN habilidades WHERE s.habilidad = q.habilidad |
+                        CASE WHEN s.nivel / q.nivel_minimo < 1.0 THEN s.nivel / q.nivel_minimo ELSE 1.0 END]), 0.0)) / size(blandos)
+           END AS score_blando,
+           [(c)-[t:TRABAJO_EN]->(:Empresa) | {puesto: t.puesto, fecha_inicio: t.fecha_inicio, fecha_fin: t.fecha_fin}] AS experiencias
+"""
+
+# Oferta compilada (ver src/engine/compiled_offer.py), guardada como JSON en un nodo aparte
+# (Oferta)-[:COMPILADA]->(OfertaCompilada) para que no viaje en las consultas que devuelven 'o'
+COMPILED_OFFER_QUERY = """
+    MATCH (o:Oferta {titulo: $titulo})-[:COMPILADA]->(oc:OfertaCompilada)
+    RETURN oc.datos AS compilada
+    LIMIT 1
+"""
+
+ALL_SKILLS_QUERY = "MATCH (h:Habilidad) RETURN h.nombre AS nombre, h.tipo AS tipo ORDER BY nombre"
+
+COMPANY_EXISTS_QUERY = "MATCH (e:Empresa {email: $email}) RETURN count(e) > 0 AS existe"
+
+
+# --- ESCRITURAS ---
+SAVE_MATCHING_SCORE_QUERY = """
+    MATCH (c:Candidato {email: $email})
+    MATCH (o:Oferta {titulo: $oferta_titulo})
+    MERGE (c)-[a:ADECUACION]->(o)
+    SET a.score_final = $scores.final,
+        a.score_tecnico = $scores.tecnico,
+        a.score_blando = $scores.blando,
+        a.score_experiencia = $scores.exp,
+        a.fecha_calculo = datetime()
+    REMOVE a.desactualizada
+"""
+
+SAVE_MATCHING_SCORES_QUERY = """
+    MATCH (o:Oferta {titulo: $oferta_titulo})
+    UNWIND $rows AS row
+    MATCH (c:Candidato {email: row.email})
+    MERGE (c)-[a:ADECUACION]->(o)
+    SET a.score_final = row.scores.final,
+        a.score_tecnico = row.scores.tecnico,
+        a.score_blando = row.scores.blando,
+        a.score_experiencia = row.scores.exp,
+        a.fecha_calculo = datetime()
+    REMOVE a.desactualizada
+"""
+
+# Datos, habilidades y experiencias del candidato 'c' a partir de 'cand' ({personal_data, skills, experiences})
+CANDIDATE_DATA_WRITE = """
+    SET c.nombre = cand.personal_data.nombre,
+        c.apellido = cand.personal_data.apellido,
+        c.ubicacion = cand.personal_data.ubicacion,
+        c.fecha_nacimiento = date(coalesce(cand.personal_data.fecha_nac, cand.personal_data.fecha_nacimiento)),
+        c.seniority = cand.personal_data.seniority,
+        c.movilidad = cand.personal_data.movilidad
+    FOREACH (s IN coalesce(cand.skills, []) |
+        MERGE (h:Habilidad {nombre: s.nombre})
+        MERGE (c)-[p:POSEE]->(h)
+        SET p.nivel = s.nivel,
+            p.ultimo_uso = date()
+    )
+    FOREACH (experiencia IN coalesce(cand.experiences, []) |
+        MERGE (e:Empresa {email: experiencia.empresa_email})
+        MERGE (c)-[t:TRABAJO_EN {puesto: experiencia.puesto}]->(e)
+        SET t.fecha_inicio = date(experiencia.fecha_inicio), t.fecha_fin = date(experiencia.fecha_fin)
+    )"""
+
+# MERGE por email (constraint unico): un candidato que ya existe se actualiza en vez de hacer fallar
+# todo el lote, y sus ADECUACION quedan desactualizadas. Solo se cuentan como creados los que no existian
+SAVE_CANDIDATES_BULK_QUERY = """
+    UNWIND $candidatos AS cand
+    OPTIONAL MATCH (previo:Candidato {email: cand.personal_data.email})
+    WITH cand, previo IS NULL AS nuevo
+    MERGE (c:Candidato {email: cand.personal_data.email})""" + CANDIDATE_DATA_WRITE + """
+    WITH c, nuevo
+    OPTIONAL MATCH (c)-[a:ADECUACION]->(:Oferta)
+    WHERE NOT nuevo
+    SET a.desactualizada = datetime()
+    WITH DISTINCT c, nuevo
+    RETURN sum(CASE WHEN nuevo THEN 1 ELSE 0 END) AS candidatos_creados
+"""
+
+# Solo crea: si el email ya existe no escribe nada (y con el constraint unico de ensure_schema,
+# un CREATE concurrente del mismo email falla en vez de duplicarlo). Devuelve 0 o 1
+SAVE_NEW_CANDIDATE_QUERY = """
+    WITH $candidato AS cand
+    OPTIONAL MATCH (previo:Candidato {email: cand.personal_data.email})
+    WITH cand WHERE previo IS NULL
+    CREATE (c:Candidato {email: cand.personal_data.email})""" + CANDIDATE_DATA_WRITE + """
+    RETURN count(c) AS candidatos_creados
+"""
+
+# Adecuaciones de varias ofertas a la vez: rows es una lista de {email, oferta_titulo, scores}
+SAVE_MATCHING_MATRIX_QUERY = """
+    UNWIND $rows AS row
+    MATCH (c:Candidato {email: row.email})
+    MATCH (o:Oferta {titulo: row.oferta_titulo})
+    MERGE (c)-[a:ADECUACION]->(o)
+    SET a.score_final = row.scores.final,
+        a.score_tecnico = row.scores.tecnico,
+        a.score_blando = row.scores.blando,
+        a.score_experiencia = row.scores.exp,
+        a.fecha_calculo = datetime()
+    REMOVE a.desactualizada
+"""
+
+SAVE_COMPILED_OFFER_QUERY = """
+    MATCH (o:Oferta {titulo: $titulo})
+    MERGE (o)-[:COMPILADA]->(oc:OfertaCompilada)
+    SET oc.datos = $compilada
+"""
+
+# Borra la oferta compilada de 'o' (se usa despues de cambiar requisitos o multiplicadores)
+DELETE_COMPILED_OFFER = """
+    WITH o
+    OPTIONAL MATCH (o)-[:COMPILADA]->(oc:OfertaCompilada)
+    DETACH DELETE oc
+    WITH DISTINCT o"""
+
+# Cambiar los multiplicadores invalida la oferta compilada y deja desactualizadas sus adecuaciones
+UPDATE_OFFER_WEIGHTS_QUERY = """
+    MATCH (o:Oferta {titulo: $titulo})
+    SET o.mult_tecnico = toFloat(coalesce($mults.tecnico, o.mult_tecnico)),
+        o.mult_blando = toFloat(coalesce($mults.blando, o.mult_blando)),
+        o.mult_experiencia = toFloat(coalesce($mults.experiencia, o.mult_experiencia))""" + DELETE_COMPILED_OFFER + """
+    OPTIONAL MATCH (:Candidato)-[a:ADECUACION]->(o)
+    SET a.desactualizada = datetime()
+    RETURN count(a) AS adecuaciones_desactualizadas
+"""
+
+SAVE_OFFER_BULK_QUERY = """
+    MATCH (e:Empresa {email: $email_empresa})
+    CREATE (o:Oferta {
+        titulo: $titulo,
+        descripcion: $detalles.descripcion,
+        modalidad: $detalles.modalidad,
+        seniority_buscado: $detalles.seniority_buscado,
+        salario_max_usd: $detalles.salario_max_usd,
+        meses_min_experiencia: toInteger($detalles.meses_min_experiencia),
+        fecha_publicacion: date(),
+        mult_tecnico: toFloat($mults.tecnico),
+        mult_blando: toFloat($mults.blando),
+        mult_experiencia: toFloat($mults.experiencia)
+    })
+    MERGE (e)-[:PUBLICA {fecha_inicio: date()}]->(o)
+    FOREACH (req IN $requisitos |
+        MERGE (h:Habilidad {nombre: req.habilidad})
+        MERGE (o)-[r:REQUIERE]->(h)
+        SET r.nivel_minimo = req.nivel_minimo, r.es_critica = req.es_critica
+    )
+    RETURN o.titulo AS oferta_creada
+"""
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from src.engine.records import OfferRequirements
+
+
+@dataclass(slots=True)
+class CompiledOffer:
+    """
+    Lo que el scoring necesita de una oferta, calculado una sola vez:
+    requisitos tecnicos con su peso por criticidad y la suma de pesos, requisitos blandos,
+    y el embedding del titulo. 'huella' resume requisitos, multiplicadores y modelo:
+    si cambia alguno la oferta compilada deja de valer.
+    Con __getitem__ se puede usar donde se espera la oferta (delegando en 'offer').
+    """
+    offer: OfferRequirements
+    huella: str
+    tecnicos: list  # (nombre, nivel_minimo, peso) en el orden de los requisitos
+    peso_tecnico: float
+    blandos: list  # (nombre, nivel_minimo)
+    titulo_embedding: np.ndarray
+
+    def __getitem__(self, key):
+        return self.offer[key]
+
+    @property
+    def titulo(self):
+        return self.offer.titulo
+
+    def to_json(self):
+        # Lo que se guarda en el nodo OfertaCompilada de la oferta (propiedad 'datos')
+        return json.dumps({
+            "huella": self.huella,
+            "tecnicos": self.tecnicos,
+            "peso_tecnico": self.peso_tecnico,
+            "blandos": self.blandos,
+            "titulo_embedding": self.titulo_embedding.tolist(),
+        })
+
+    @classmethod
+    def from_json(cls, offer, data):
+        data = json.loads(data)
+        return cls(
+            offer=offer,
+            huella=data["huella"],
+            tecnicos=[tuple(t) for t in data["tecnicos"]],
+            peso_tecnico=data["peso_tecnico"],
+            blandos=[tuple(b) for b in data["blandos"]],
+            titulo_embedding=np.asarray(data["titulo_embedding"], dtype=np.float32),
+        )
+
+
+def offer_fingerprint(offer, model_name=None):
+    payload = json.dumps([
+        offer.titulo, offer.meses_min_experiencia, offer.w_tec, offer.w_blan, offer.w_exp, model_name,
+        [(r.nombre, r.tipo, r.nivel_minimo, bool(r.es_critica)) for r in offer.requisitos],
+    ], default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class OfferCompiler:
+    """
+    Compila ofertas y guarda las compiladas en memoria (LRU por titulo).
+    Con 'db' tambien se leen / guardan en Neo4j (nodo OfertaCompilada), asi otro proceso no
+    vuelve a pasar el titulo por el modelo. Nunca se devuelve una compilada con otra huella: si la oferta
+    cambio (add_requirement_to_offer, otros multiplicadores) se recompila sola.
+    """
+
+    def __init__(self, embedding_cache, max_size=256):
+        self.embedding_cache = embedding_cache
+        self.max_size = max_size
+        self._compiled = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(self, offer, db=None):
+        if isinstance(offer, CompiledOffer):
+            return offer
+        offer = OfferRequirements.from_record(offer)
+        huella = offer_fingerprint(offer, getattr(self.embedding_cache, "model_name", None))
+
+        with self._lock:
+            compiled = self._compiled.get(offer.titulo)
+            if compiled is not None and compiled.huella == huella:
+                self._compiled.move_to_end(offer.titulo)
+                return replace(compiled, offer=offer)
+
+        compiled = None
+        if db is not None:
+            stored = db.get_compiled_offer(offer.titulo)
+            if stored:
+                compiled = CompiledOffer.from_json(offer, stored)
+                if compiled.huella != huella:
+                    compiled = None
+
+        if compiled is None:
+            compiled = self._build(offer, huella)
+            if db is not None:
+                db.save_compiled_offer(offer.titulo, compiled.to_json())
+
+        with self._lock:
+            self._compiled[offer.titulo] = compiled
+            self._compiled.move_to_end(offer.titulo)
+            while len(self._compiled) > self.max_size:
+                self._compiled.popitem(last=False)
+        return compiled
+
+    def invalidate(self, titulo=None):
+        with self._lock:
+            if titulo is None:
+                self._compiled.clear()
+            else:
+                self._compiled.pop(titulo, None)
+
+    def _build(self, offer, huella):
+        tecnicos = [(r.nombre, r.nivel_minimo, 1.5 if r.es_critica else 1.0) for r in offer.tecnicos]
+        peso_tecnico = 0
+        for _, _, peso in tecnicos:
+            peso_tecnico += peso  # misma suma (y orden) que calculate_technical_score
+
+        return CompiledOffer(
+            offer=offer,
+            huella=huella,
+            tecnicos=tecnicos,
+            peso_tecnico=peso_tecnico,
+            blandos=[(r.nombre, r.nivel_minimo) for r in offer.blandos],
+            titulo_embedding=self.embedding_cache.get(offer.titulo),
+        )
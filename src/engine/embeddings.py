@@ -0,0 +1,294 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+from src.utils.metrics import METRICS
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos (un solo proceso por carpeta)
+    fcntl = None
+
+
+def normalize_role(text):
+    # El modelo es uncased, asi que pasar a minusculas y colapsar espacios no cambia el embedding
+    return re.sub(r"\s+", " ", str(text or "")).strip().lower()
+
+
+def model_store_dir(disk_dir, model_name):
+    # Subcarpeta del almacen de un modelo: "all-MiniLM-L6-v2:onnx" -> <disk_dir>/all-MiniLM-L6-v2_onnx
+    if not model_name:
+        return disk_dir
+    return os.path.join(disk_dir, re.sub(r"[^A-Za-z0-9._-]+", "_", model_name).strip("._") or "_")
+
+
+class EmbeddingCache:
+    """
+    Cache de embeddings de roles indexado por texto normalizado.
+    Tiene un LRU en memoria y, opcionalmente, un almacen en disco
+    (matriz float32 memory-mapped + indice texto -> fila) que sobrevive reinicios. Con model_name
+    cada modelo/backend tiene su propia subcarpeta de disk_dir, asi cambiar de modelo no borra nada.
+    Los vectores se guardan normalizados, asi el coseno es un producto punto.
+    """
+
+    MATRIX_FILE = "embeddings.f32"
+    INDEX_FILE = "index.json"
+    LOCK_FILE = "store.lock"
+
+    def __init__(self, model, max_size=2048, disk_dir=None, model_name=None):
+        self.model = model
+        self.max_size = max_size
+        self.disk_dir = model_store_dir(disk_dir, model_name) if disk_dir else None
+        self.model_name = model_name
+
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializa las escrituras a disco de este proceso, sin frenar a los que leen (_lock)
+        self._write_lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        # Estado del almacen en disco
+        self._disk_rows = {}
+        self._disk_dim = None
+        self._disk_matrix = None
+
+        if self.disk_dir:
+            self._load_disk()
+
+
+    # --- API PUBLICA ---
+    def get(self, text):
+        return self.get_many([text])[0]
+
+    def get_many(self, texts, batch_size=64):
+        # Devuelve una matriz (len(texts) x dim); los textos que faltan se codifican en una sola llamada
+        keys = [normalize_role(t) for t in texts]
+        with self._lock:
+            found = {}
+            missing = {}  # dict para deduplicar manteniendo el orden
+            for key in keys:
+                if key in found or key in missing:
+                    continue
+                emb = self._lookup(key)
+                if emb is None:
+                    missing[key] = None
+                else:
+                    found[key] = emb
+            self.misses += len(missing)
+
+        if missing:
+            # El modelo y la escritura a disco van sin el lock: los otros hilos siguen leyendo
+            # del cache mientras tanto (dos hilos pueden codificar el mismo texto, da igual)
+            new_embs = dict(zip(missing, self._encode(list(missing), batch_size)))
+            self._store(new_embs)
+            found.update(new_embs)
+
+        if not keys:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+    def peek_many(self, texts):
+        # Los vectores que ya estan (en memoria o en disco), sin codificar los que faltan:
+        # {texto normalizado: vector}
+        with self._lock:
+            found = {}
+            for key in map(normalize_role, texts):
+                if key not in found:
+                    emb = self._lookup(key)
+                    if emb is not None:
+                        found[key] = emb
+        return found
+
+    def put_many(self, texts, embeddings):
+        # Guarda (en memoria y en disco) vectores codificados en otro lado, por ej. en los workers
+        # de ParallelMatcher. Tienen que ser del mismo modelo y estar normalizados
+        self._store({normalize_role(t): np.asarray(e, dtype=np.float32) for t, e in zip(texts, embeddings)})
+
+    def memory_only(self):
+        # Cache vacio con el mismo modelo pero sin almacen en disco (para procesos que no deben escribirlo)
+        return EmbeddingCache(self.model, max_size=self.max_size, model_name=self.model_name)
+
+    def preload(self, texts, embeddings):
+        # Carga vectores ya calculados (por ej. de un MatchingSnapshot) sin pasar por el modelo.
+        # Tienen que ser del mismo modelo y estar normalizados; si no entran en el LRU quedan los ultimos
+        with self._lock:
+            for text, emb in zip(texts, embeddings):
+                self._remember(normalize_role(text), np.asarray(emb, dtype=np.float32))
+
+    def stats(self):
+        total = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / total if total else 0.0,
+            "size": len(self._lru),
+            "max_size": self.max_size,
+            "disk_size": len(self._disk_rows),
+        }
+
+    def clear(self):
+        # Solo limpia memoria y contadores, el almacen en disco se mantiene
+        with self._lock:
+            self._lru.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+
+    # --- INTERNOS ---
+    def _lookup(self, key):
+        emb = self._lru.get(key)
+        if emb is not None:
+            self._lru.move_to_end(key)
+            self.hits += 1
+            return emb
+
+        row = self._disk_rows.get(key)
+        if row is not None:
+            emb = np.array(self._disk_matrix[row], dtype=np.float32)
+            self._remember(key, emb)
+            self.disk_hits += 1
+            return emb
+
+        return None
+
+    def _encode(self, texts, batch_size=32):
+        METRICS.inc("encode_calls")
+        METRICS.inc("encoded_texts", len(texts))
+        METRICS.observe("encode_batch_size", len(texts))
+        with METRICS.timer("model_encode_seconds"):
+            embs = np.asarray(self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True), dtype=np.float32)
+        norms = np.linalg.norm(embs, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return embs / norms
+
+    def _remember(self, key, emb):
+        self._lru[key] = emb
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+
+    def _store(self, new_embs):
+        # Se llama sin el lock: lo toma solo para actualizar el LRU
+        with self._lock:
+            for key, emb in new_embs.items():
+                self._remember(key, emb)
+        if self.disk_dir:
+            self._append_disk(new_embs)
+
+
+    # --- ALMACEN EN DISCO ---
+    # Lo pueden compartir varios procesos: cada escritura (y la carga) toma un lock de archivo,
+    # relee el indice, escribe las filas nuevas en su offset exacto y recien despues reescribe
+    # el indice. Lo que quede en la matriz sin estar en el indice (una escritura cortada) se descarta.
+    # Las lecturas siguen usando el memmap anterior (las filas solo se agregan al final) hasta que
+    # la escritura termina y se cambia el estado (_disk_rows, _disk_dim, _disk_matrix) bajo _lock.
+    def _paths(self):
+        return (os.path.join(self.disk_dir, self.MATRIX_FILE),
+                os.path.join(self.disk_dir, self.INDEX_FILE))
+
+    @contextmanager
+    def _disk_lock(self):
+        with open(os.path.join(self.disk_dir, self.LOCK_FILE), "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load_disk(self):
+        os.makedirs(self.disk_dir, exist_ok=True)
+        with self._disk_lock():
+            rows, dim = self._read_index()
+            rows = self._trim_matrix(rows, dim)
+        self._disk_rows, self._disk_dim = rows, dim
+        self._disk_matrix = self._map_matrix(self._paths()[0], rows, dim)
+
+    def _read_index(self):
+        # (filas, dim) del indice en disco (hay que tener el lock). Si es de otro modelo se ignora
+        _, index_path = self._paths()
+        if not os.path.exists(index_path):
+            return {}, None
+
+        with open(index_path, encoding="utf-8") as f:
+            meta = json.load(f)
+
+        # Cada modelo usa su subcarpeta; esto solo cubre nombres que quedan iguales al sanitizarlos
+        if self.model_name and meta.get("model_name") not in (None, self.model_name):
+            return {}, None
+
+        return meta["rows"], meta["dim"]
+
+    def _trim_matrix(self, rows, dim):
+        # La matriz tiene que tener exactamente las filas del indice (hay que tener el lock).
+        # Devuelve las filas que quedan
+        matrix_path, _ = self._paths()
+        if dim is None:
+            return rows  # sin indice (o de otro modelo): la proxima escritura arranca de cero
+        if not os.path.exists(matrix_path):
+            return {}
+        size = os.path.getsize(matrix_path)
+        row_bytes = dim * 4
+        if size < len(rows) * row_bytes:
+            # Indice con filas que no llegaron a la matriz: se quedan solo las que estan completas
+            available = size // row_bytes
+            rows = {k: r for k, r in rows.items() if r < available}
+        expected = len(rows) * row_bytes
+        if size > expected:
+            with open(matrix_path, "r+b") as f:
+                f.truncate(expected)
+        return rows
+
+    @staticmethod
+    def _map_matrix(matrix_path, rows, dim):
+        if not rows:
+            return None
+        return np.memmap(matrix_path, dtype=np.float32, mode="r", shape=(len(rows), dim))
+
+    def _append_disk(self, new_embs):
+        matrix_path, index_path = self._paths()
+
+        with self._write_lock, self._disk_lock():
+            # Otro proceso pudo haber agregado filas desde la ultima lectura
+            rows, dim = self._read_index()
+            rows = self._trim_matrix(rows, dim)
+            new_embs = {k: v for k, v in new_embs.items() if k not in rows}
+
+            if new_embs:
+                new_dim = len(next(iter(new_embs.values())))
+                if dim is None or not rows:
+                    # Arrancamos de cero por si quedo una matriz de otro modelo: la matriz se
+                    # reescribe desde la primera fila, asi que se suelta el memmap de las lecturas
+                    dim, rows = new_dim, {}
+                    with self._lock:
+                        self._disk_rows, self._disk_dim, self._disk_matrix = {}, None, None
+
+                rows = dict(rows)
+                mode = "r+b" if os.path.exists(matrix_path) else "w+b"
+                with open(matrix_path, mode) as f:
+                    f.seek(len(rows) * dim * 4)
+                    for key, emb in new_embs.items():
+                        rows[key] = len(rows)
+                        f.write(np.asarray(emb, dtype=np.float32).tobytes())
+                    f.truncate()
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                tmp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"model_name": self.model_name, "dim": dim, "rows": rows}, f)
+                os.replace(tmp_path, index_path)
+
+            matrix = self._map_matrix(matrix_path, rows, dim)
+
+        with self._lock:
+            self._disk_rows, self._disk_dim, self._disk_matrix = rows, dim, matrix
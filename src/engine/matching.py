@@ -1,64 +1,124 @@
+import heapq
+import os
 from datetime import date
-from dateutil.relativedelta import relativedelta
-from sentence_transformers import SentenceTransformer, util
+import numpy as np
+
+from src.engine.compiled_offer import CompiledOffer, OfferCompiler
+from src.engine.embeddings import EmbeddingCache
+from src.engine.role_index import LazyRoleIndex, RoleIndex
+from src.engine.records import CandidateProfile, OfferRequirements, Experience
+from src.engine.role_model import DRIFT_FILE, LazyRoleModel
+from src.engine.skill_matrix import (
+    SkillVocabulary, CandidateSkillMatrix, OfferRequirementVectors, technical_scores, soft_scores
+)
+from src.utils.helpers import ScoringClock, months_between as _months_between, recency_bucket, to_date
+from src.utils.metrics import METRICS
+
+ROLE_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# El modelo se carga recien en el primer encode (ROLE_MODEL_BACKEND: torch | onnx | onnx-int8).
+# Un backend ONNX se valida una vez con "python -m src.engine.role_model" (en CI o al desplegar).
+# Con ROLE_MODEL_VERIFY=1 tambien se valida al cargarse, midiendo el desvio solo si no esta
+# guardado en ROLE_CACHE_DIR
+ROLE_MODEL = LazyRoleModel(
+    ROLE_MODEL_NAME,
+    backend=os.getenv("ROLE_MODEL_BACKEND", "torch"),
+    onnx_file=os.getenv("ROLE_MODEL_ONNX_FILE") or None,
+    verify=os.getenv("ROLE_MODEL_VERIFY") == "1",
+    drift_file=os.path.join(os.getenv("ROLE_CACHE_DIR"), DRIFT_FILE) if os.getenv("ROLE_CACHE_DIR") else None,
+)
+
+# Con ROLE_MODEL_PRELOAD=1 se carga en segundo plano al importar (worker ya caliente para el primer pedido)
+if os.getenv("ROLE_MODEL_PRELOAD") == "1":
+    ROLE_MODEL.warm_up(background=True)
+
+# Cache compartido de embeddings de roles (tamaño y carpeta en disco configurables)
+ROLE_CACHE = EmbeddingCache(
+    ROLE_MODEL,
+    max_size=int(os.getenv("ROLE_CACHE_SIZE", "2048")),
+    disk_dir=os.getenv("ROLE_CACHE_DIR") or None,
+    model_name=ROLE_MODEL.cache_key,
+)
+
+# Prefiltro por puestos del ranking masivo: con mas de ROLE_INDEX_MIN_ROLES puestos distintos solo se
+# puntuan los candidatos con experiencia mas afin al titulo. Se rearma cada ROLE_INDEX_TTL segundos;
+# con ROLE_INDEX_ENABLED=0 siempre se puntua a todos
+ROLE_INDEX = LazyRoleIndex(
+    ROLE_CACHE,
+    min_roles=int(os.getenv("ROLE_INDEX_MIN_ROLES", str(RoleIndex.BRUTE_FORCE_LIMIT))),
+    ttl=float(os.getenv("ROLE_INDEX_TTL", "600")),
+    enabled=os.getenv("ROLE_INDEX_ENABLED", "1") != "0",
+)
+
+
+def _skill_recency(skill):
+    return skill.recencia  # SkillLevel: calculada al cargar
+
+
+def rounded_scores(final, tech, soft, exp, indices=None):
+    # Scores redondeados (mismo formato que calculate_total_score) de cada candidato, o solo de
+    # 'indices', a partir de vectores con un valor por candidato
+    if indices is None:
+        indices = range(len(final))
+    return [
+        {
+            "final_score": round(float(final[i]), 2),
+            "tech_score": round(float(tech[i]), 2),
+            "soft_score": round(float(soft[i]), 2),
+            "exp_score": round(float(exp[i]), 2)
+        }
+        for i in indices
+    ]
+
 
-ROLE_MODEL = SentenceTransformer("all-MiniLM-L6-v2")
+def top_indices(final, top_k=None):
+    # Indices de los candidatos de mayor a menor score final redondeado (los empates quedan
+    # en el orden original, igual que ordenar los resultados de rounded_scores)
+    final = [round(v, 2) for v in np.asarray(final, dtype=np.float64).tolist()]
+    if top_k is None:
+        return sorted(range(len(final)), key=final.__getitem__, reverse=True)
+    return heapq.nlargest(top_k, range(len(final)), key=final.__getitem__)
 
 
 class MatchingEngine:
 
     EXPERIENCE_AFFINITY_THRESHOLD = 0.6
 
-    def __init__(self):
-        pass
+    def __init__(self, embedding_cache=None, offer_compiler=None):
+        self.embedding_cache = embedding_cache or ROLE_CACHE
+        self.offer_compiler = offer_compiler or OfferCompiler(self.embedding_cache)
+
+    def compile_offer(self, offer_data, db=None):
+        # Oferta compilada (requisitos, pesos y embedding del titulo calculados una vez).
+        # Con db se reutiliza / guarda la compilada en su nodo OfertaCompilada
+        return self.offer_compiler.compile(offer_data, db)
 
     
     # Calculo de meses
     @staticmethod
-    def months_between(start, end):
-        # Función auxiliar para convertir fechas de Neo4j a Python
-        def to_python_date(d):
-            if d is None:
-                return None
-            # Si tiene el método to_native (caso de objetos Neo4j), lo usamos
-            if hasattr(d, "to_native"):
-                return d.to_native()
-            return d
-
-        # Convertimos ambos parámetros
-        start = to_python_date(start)
-        end = to_python_date(end)
-        
+    def months_between(start, end, today=None):
+        # Acepta fechas de Neo4j o de Python. Sin end se cuenta hasta hoy ('today' si viene,
+        # asi una corrida usa siempre la misma fecha); sin start no hay meses
+        start = to_date(start)
+        end = to_date(end)
+
         if not start:
             return 0
         if not end:
-            end = date.today()
-        delta = relativedelta(end, start)
-        return delta.years * 12 + delta.months
+            end = today or date.today()
+        return _months_between(start, end)
 
     # Calculo del peso del uso de habilidad
     @staticmethod
-    def recency_factor(ultimo_uso):
+    def recency_factor(ultimo_uso, today=None):
         if not ultimo_uso:
             return 0.5
 
-        months = MatchingEngine.months_between(ultimo_uso, date.today())
-
-        if months <= 6:
-            return 1.0
-        elif months <= 12:
-            return 0.8
-        elif months <= 24:
-            return 0.6
-        else:
-            return 0.4
+        return recency_bucket(MatchingEngine.months_between(ultimo_uso, today or date.today()))
 
     
     # ------- CALCULO DE SCORE TECNICO -------
     def calculate_technical_score(self, candidate_skills, offer_requirements):
-        total_score = 0
-        total_weight = 0
-
         tech_reqs = [r for r in offer_requirements if r['tipo'] == 'Técnica']
         
         if not tech_reqs:
@@ -67,7 +127,18 @@ class MatchingEngine:
         tech_skills_cand = {
             h["nombre"]: h for h in candidate_skills if h["tipo"] == "Técnica"
         }
-        
+
+        clock = ScoringClock()
+        return self._technical_score(tech_skills_cand, tech_reqs, lambda h: clock.recency(h['ultimo_uso']))
+
+    def _technical_score(self, tech_skills_cand, tech_reqs, recency_fn):
+        # tech_skills_cand: nombre -> habilidad tecnica del candidato; recency_fn: habilidad -> factor
+        total_score = 0
+        total_weight = 0
+
+        if not tech_reqs:
+            return 1.0
+
         for req in tech_reqs:
             min_req_level = req['nivel_minimo']
             critical = req['es_critica']
@@ -82,10 +153,9 @@ class MatchingEngine:
 
 
             cand_level = skill_cand['nivel']
-            last_used = skill_cand['ultimo_uso']
 
             level_match = min(cand_level / min_req_level, 1)
-            recency = MatchingEngine.recency_factor(last_used)
+            recency = recency_fn(skill_cand)
 
             total_score += level_match * recency * w_crit
 
@@ -94,11 +164,15 @@ class MatchingEngine:
 
     # ------- CALCULO DEL SCORE BLANDO -----
     def calculate_soft_score(self, candidate_skills, offer_requirements):
-        scores = []
         soft_reqs = [r for r in offer_requirements if r['tipo'] == 'Blanda']
         
         cand_skills_dict = {h["nombre"]: h for h in candidate_skills if h["tipo"] == "Blanda"}
-        
+
+        return self._soft_score(cand_skills_dict, soft_reqs)
+
+    def _soft_score(self, cand_skills_dict, soft_reqs):
+        scores = []
+
         if not soft_reqs:
             return 1.0
         
@@ -115,58 +189,343 @@ class MatchingEngine:
             scores.append(min(cand_level / req_level, 1))
 
         return sum(scores) / len(scores) if scores else 0
+
+    @staticmethod
+    def _technical_score_compiled(candidate, compiled):
+        # Misma cuenta que _technical_score con los pesos ya calculados en la oferta compilada
+        if not compiled.tecnicos:
+            return 1.0
+
+        total_score = 0
+        for nombre, min_req_level, w_crit in compiled.tecnicos:
+            skill_cand = candidate.tecnicas.get(nombre)
+            if not skill_cand:
+                continue
+            total_score += min(skill_cand.nivel / min_req_level, 1) * skill_cand.recencia * w_crit
+
+        return total_score / compiled.peso_tecnico if compiled.peso_tecnico > 0 else 0
+
+    @staticmethod
+    def _soft_score_compiled(candidate, compiled):
+        if not compiled.blandos:
+            return 1.0
+
+        scores = []
+        for nombre, req_level in compiled.blandos:
+            skill_cand = candidate.blandas.get(nombre)
+            scores.append(min(skill_cand.nivel / req_level, 1) if skill_cand else 0)
+
+        return sum(scores) / len(scores)
     
 
     # ------ CALCULO DEL SCORE EXPERIENCIA -------
     def role_affinity(self, candidate_role, offer_role):
-        emb_cand = ROLE_MODEL.encode(candidate_role, convert_to_tensor=True)
-        emb_offer = ROLE_MODEL.encode(offer_role, convert_to_tensor=True)
+        return self.role_affinities([candidate_role], offer_role)[0]
 
-        similarity = util.cos_sim(emb_cand, emb_offer).item()
+    def role_affinities(self, candidate_roles, offer_role, batch_size=64, offer_embedding=None):
+        # Todos los roles + el de la oferta en una sola llamada al modelo
+        # (si viene offer_embedding, de una oferta compilada, el titulo no se busca)
+        with METRICS.timer("engine_stage_seconds", stage="embedding_lookup"):
+            if offer_embedding is None:
+                embs = self.embedding_cache.get_many(list(candidate_roles) + [offer_role], batch_size)
+                embs, offer_embedding = embs[:-1], embs[-1]
+            else:
+                embs = self.embedding_cache.get_many(list(candidate_roles), batch_size)
 
-        # se podria mejorar usando cacje de embeddings, evitando recalcular, VER para despues
+        # Los embeddings vienen normalizados, el coseno es el producto punto (en float64 para que
+        # el resultado no dependa de cuantos roles se calculen juntos)
+        with METRICS.timer("engine_stage_seconds", stage="similarity"):
+            similarities = (embs.astype(np.float64) * offer_embedding.astype(np.float64)).sum(axis=1)
 
-        return max(0.0, min(float(similarity), 1.0)) # entre 0 y 1
+        return np.clip(similarities, 0.0, 1.0).tolist() # entre 0 y 1
 
 
-    def calculate_experience_score(self, candidate_experiences, offer_title, min_required_months):
+    def calculate_experience_score(self, candidate_experiences, offer_title, min_required_months, offer_embedding=None):
+        return self.calculate_experience_scores([candidate_experiences], offer_title, min_required_months, offer_embedding=offer_embedding)[0]
+
+    def calculate_experience_scores(self, experiences_by_candidate, offer_title, min_required_months, batch_size=64, offer_embedding=None):
+        # Version por lotes: un solo encode para los roles de todos los candidatos
         if min_required_months <= 0:
-            return 1.0
-        if not candidate_experiences:
-            return 0.0
-        
-        total_weighted_months = 0.0
+            return [1.0] * len(experiences_by_candidate)
 
-        for exp in candidate_experiences:
-            role_exp = exp['puesto']
-            start = exp['fecha_inicio']
-            end = exp['fecha_fin']
+        clock = ScoringClock()  # las experiencias en curso cuentan hasta el mismo 'hoy'
+        valid_exps = [] # (indice del candidato, meses, puesto)
+        for i, candidate_experiences in enumerate(experiences_by_candidate):
+            for exp in candidate_experiences or []:
+                if isinstance(exp, Experience):
+                    months = exp.meses  # ya calculado al cargar el perfil
+                else:
+                    months = clock.months_until_today(exp['fecha_inicio'], exp['fecha_fin'])
+                if months <= 0: # no cuenta si es menos de un mes (por ej 25 dias)
+                    continue
+                valid_exps.append((i, months, exp['puesto']))
 
-            months = MatchingEngine.months_between(start, end)
-            if months <= 0: # no cuenta si es menos de un mes (por ej 25 dias)
-                continue
+        total_weighted_months = [0.0] * len(experiences_by_candidate)
 
-            affinity = self.role_affinity(role_exp, offer_title)
-            
-            if affinity >= self.EXPERIENCE_AFFINITY_THRESHOLD:
-                total_weighted_months += months * affinity  # podria simplemente sumar los meses pero quiero que cuente la afinidad, aunque podria penalizar roles muy similares pero no iguales
+        if valid_exps:
+            affinities = self.role_affinities([role for _, _, role in valid_exps], offer_title, batch_size, offer_embedding)
+
+            for (i, months, _), affinity in zip(valid_exps, affinities):
+                if affinity >= self.EXPERIENCE_AFFINITY_THRESHOLD:
+                    total_weighted_months[i] += months * affinity  # podria simplemente sumar los meses pero quiero que cuente la afinidad, aunque podria penalizar roles muy similares pero no iguales
+
+        scores = []
+        for candidate_experiences, weighted_months in zip(experiences_by_candidate, total_weighted_months):
+            if not candidate_experiences:
+                scores.append(0.0)
+                continue
+            scores.append(min(weighted_months / min_required_months, 1.0))
 
-        score = total_weighted_months / min_required_months
+        return scores
 
-        return min(score, 1.0)
+    def experience_scores_from_arrays(self, owners, months, role_embeddings, title_embedding, min_required_months, n_candidates):
+        # Misma cuenta que calculate_experience_scores sobre experiencias ya aplanadas (solo las de
+        # mas de un mes): owners[k] es el candidato de la experiencia k, months[k] sus meses y
+        # role_embeddings[k] el embedding (float64) de su puesto. Afinidad en float64, suma en orden
+        if min_required_months <= 0:
+            return np.ones(n_candidates)
+        affinities = np.clip((role_embeddings * np.asarray(title_embedding, dtype=np.float64)).sum(axis=1), 0.0, 1.0)
+        weighted = np.where(affinities >= self.EXPERIENCE_AFFINITY_THRESHOLD, months * affinities, 0.0)
+        total = np.zeros(n_candidates)
+        np.add.at(total, owners, weighted)
+        # Sin experiencias validas el total es 0, igual que un candidato sin experiencias
+        return np.minimum(total / min_required_months, 1.0)
     
 
     # -------- CALCULO DEL SCORE FINAL ------
     def calculate_total_score(self, candidate_data, offer_data):
-        tech_score = self.calculate_technical_score(candidate_data['habilidades'], offer_data['requisitos'])
-        soft_score = self.calculate_soft_score(candidate_data['habilidades'], offer_data['requisitos'])
-        exp_score = self.calculate_experience_score(candidate_data['experiencias'], offer_data['titulo'], offer_data['meses_min_experiencia'])
+        # Con CandidateProfile / OfferRequirements se usan las habilidades ya separadas por tipo,
+        # y con una CompiledOffer ademas los pesos y el embedding del titulo ya calculados
+        is_record = isinstance(candidate_data, CandidateProfile)
+        compiled = offer_data if isinstance(offer_data, CompiledOffer) else None
+        records = is_record and isinstance(offer_data, OfferRequirements)
+        with METRICS.timer("engine_stage_seconds", stage="technical"):
+            if is_record and compiled:
+                tech_score = self._technical_score_compiled(candidate_data, compiled)
+            elif records:
+                tech_score = self._technical_score(candidate_data.tecnicas, offer_data.tecnicos, _skill_recency)
+            else:
+                tech_score = self.calculate_technical_score(candidate_data['habilidades'], offer_data['requisitos'])
+        with METRICS.timer("engine_stage_seconds", stage="soft"):
+            if is_record and compiled:
+                soft_score = self._soft_score_compiled(candidate_data, compiled)
+            elif records:
+                soft_score = self._soft_score(candidate_data.blandas, offer_data.blandos)
+            else:
+                soft_score = self.calculate_soft_score(candidate_data['habilidades'], offer_data['requisitos'])
+        with METRICS.timer("engine_stage_seconds", stage="experience"):
+            exp_score = self.calculate_experience_score(
+                candidate_data['experiencias'], offer_data['titulo'], offer_data['meses_min_experiencia'],
+                offer_embedding=compiled.titulo_embedding if compiled else None
+            )
         
         final_score = (offer_data['w_tec'] * tech_score + offer_data['w_blan'] * soft_score + offer_data['w_exp'] * exp_score)
+        METRICS.inc("engine_scored_pairs", 1, path="single")
         return {
             "final_score": round(final_score, 2),
             "tech_score": round(tech_score, 2),
             "soft_score": round(soft_score, 2),
             "exp_score": round(exp_score, 2)
         }
-    
\ No newline at end of file
+    
+
+    # -------- RANKING MASIVO (una oferta vs muchos candidatos) ------
+    def skill_score_matrices(self, candidates, offers, vocabulary=None):
+        # Scores tecnico y blando de N candidatos contra M ofertas como matrices (N x M).
+        # Da exactamente lo mismo que calculate_technical_score / calculate_soft_score
+        if vocabulary is None:
+            vocabulary = SkillVocabulary()
+        with METRICS.timer("engine_stage_seconds", stage="skill_matrices_build"):
+            cand_matrix = CandidateSkillMatrix(vocabulary, candidates, ScoringClock())
+            offer_vectors = OfferRequirementVectors(vocabulary, offers)
+        with METRICS.timer("engine_stage_seconds", stage="skill_matrices_score"):
+            return technical_scores(cand_matrix, offer_vectors), soft_scores(cand_matrix, offer_vectors)
+
+    def score_candidates(self, candidates, offer_data):
+        # Mismo resultado que calculate_total_score para cada candidato, pero en una sola pasada
+        tech, soft = self.skill_score_matrices(candidates, [offer_data])
+        tech, soft = tech[:, 0], soft[:, 0]
+        with METRICS.timer("engine_stage_seconds", stage="experience_batch"):
+            exp = np.array(self.calculate_experience_scores(
+                [c['experiencias'] for c in candidates], offer_data['titulo'], offer_data['meses_min_experiencia'],
+                offer_embedding=offer_data.titulo_embedding if isinstance(offer_data, CompiledOffer) else None
+            ))
+
+        final = offer_data['w_tec'] * tech + offer_data['w_blan'] * soft + offer_data['w_exp'] * exp
+        METRICS.inc("engine_scored_pairs", len(candidates), path="batch")
+
+        return rounded_scores(final, tech, soft, exp)
+
+    def rank_candidates(self, candidates, offer_data, top_k=20):
+        # Ranking (mayor a menor) de los candidatos para la oferta, solo los top_k mejores
+        if not candidates:
+            return []
+
+        scores = self.score_candidates(candidates, offer_data)
+
+        return sorted(
+            ({"email": c['email'], "nombre_completo": c['nombre_completo'], **s} for c, s in zip(candidates, scores)),
+            key=lambda r: r['final_score'],
+            reverse=True
+        )[:top_k]
+
+    def rank_skill_scores(self, rows, offer_data, top_k=20):
+        # Ranking a partir de Neo4jService.stream_skill_scores_for_offer: los scores tecnico y blando
+        # ya vienen calculados en Neo4j, aca solo se calcula el de experiencia (embeddings)
+        rows = list(rows)
+        if not rows:
+            return []
+
+        tech = np.array([r['score_tecnico'] for r in rows], dtype=np.float64)
+        soft = np.array([r['score_blando'] for r in rows], dtype=np.float64)
+        with METRICS.timer("engine_stage_seconds", stage="experience_batch"):
+            exp = np.array(self.calculate_experience_scores(
+                [r['experiencias'] for r in rows], offer_data['titulo'], offer_data['meses_min_experiencia'],
+                offer_embedding=offer_data.titulo_embedding if isinstance(offer_data, CompiledOffer) else None
+            ))
+
+        final = offer_data['w_tec'] * tech + offer_data['w_blan'] * soft + offer_data['w_exp'] * exp
+        METRICS.inc("engine_scored_pairs", len(rows), path="pushdown")
+
+        best = top_indices(final, top_k)
+        return [
+            {"email": rows[i]['email'], "nombre_completo": rows[i]['nombre_completo'], **s}
+            for i, s in zip(best, rounded_scores(final, tech, soft, exp, best))
+        ]
+
+    def score_matrix(self, candidates, offers):
+        # N candidatos x M ofertas en una sola pasada (skills de todos contra todas juntas).
+        # Devuelve una fila por par: {email, nombre_completo, oferta, *_score}, ordenadas
+        # por oferta y de mayor a menor score final dentro de cada oferta
+        if not candidates or not offers:
+            return []
+
+        candidates = CandidateProfile.from_records(candidates)
+        offers = [self.compile_offer(o) for o in offers]
+        tech, soft = self.skill_score_matrices(candidates, offers)
+        experiences = [c.experiencias for c in candidates]
+
+        rows = []
+        for m, offer in enumerate(offers):
+            exp = np.array(self.calculate_experience_scores(
+                experiences, offer.titulo, offer['meses_min_experiencia'], offer_embedding=offer.titulo_embedding
+            ))
+            final = offer['w_tec'] * tech[:, m] + offer['w_blan'] * soft[:, m] + offer['w_exp'] * exp
+            order = top_indices(final)
+            rows.extend(
+                {"email": candidates[i].email, "nombre_completo": candidates[i].nombre_completo, "oferta": offer.titulo, **s}
+                for i, s in zip(order, rounded_scores(final, tech[:, m], soft[:, m], exp, order))
+            )
+
+        return rows
+
+    def rank_snapshot(self, snapshot, offer_titles=None, weights=None, top_k=20, today=None):
+        # Ranking offline desde un MatchingSnapshot (src/engine/snapshot.py): todas sus ofertas
+        # (o las de offer_titles) contra todos sus candidatos, sin Neo4j y con los embeddings de la foto.
+        # weights: {titulo: {tecnico, blando, experiencia}} para probar otros multiplicadores.
+        # Da lo mismo que rank_candidates con los mismos datos. Devuelve {titulo: ranking}
+        if not snapshot.same_model(self.embedding_cache.model_name):
+            raise ValueError(
+                f"El snapshot tiene embeddings de {snapshot.model_name} y el motor usa {self.embedding_cache.model_name}"
+            )
+        # Los titulos se compilan con un cache propio sembrado con la foto (el compartido no se toca)
+        compiler = OfferCompiler(snapshot.embedding_cache(self.embedding_cache.model))
+        clock = ScoringClock(today)
+        offers = [compiler.compile(o) for o in snapshot.offers(offer_titles, weights)]
+        if not offers or not len(snapshot):
+            return {o.titulo: [] for o in offers}
+
+        with METRICS.timer("engine_stage_seconds", stage="skill_matrices_build"):
+            vocabulary = snapshot.vocabulary()
+            cand_matrix = snapshot.skill_matrix(vocabulary, clock)
+            offer_vectors = OfferRequirementVectors(vocabulary, offers)
+        with METRICS.timer("engine_stage_seconds", stage="skill_matrices_score"):
+            tech, soft = technical_scores(cand_matrix, offer_vectors), soft_scores(cand_matrix, offer_vectors)
+
+        owners, months, roles = snapshot.experiences(clock)
+        role_embs = np.asarray(snapshot.arrays["embeddings"])[roles].astype(np.float64)
+        emails, names = snapshot.emails(), snapshot.names()
+
+        rankings = {}
+        for m, offer in enumerate(offers):
+            min_months = offer['meses_min_experiencia']
+            with METRICS.timer("engine_stage_seconds", stage="experience_batch"):
+                exp = self.experience_scores_from_arrays(
+                    owners, months, role_embs, offer.titulo_embedding, min_months, len(emails)
+                )
+
+            final = offer['w_tec'] * tech[:, m] + offer['w_blan'] * soft[:, m] + offer['w_exp'] * exp
+            METRICS.inc("engine_scored_pairs", len(emails), path="snapshot")
+            best = top_indices(final, top_k)
+            rankings[offer.titulo] = [
+                {"email": emails[i], "nombre_completo": names[i], **s}
+                for i, s in zip(best, rounded_scores(final, tech[:, m], soft[:, m], exp, best))
+            ]
+
+        return rankings
+
+    @staticmethod
+    def score_rows(ranking):
+        # Formato que espera Neo4jService.save_matching_scores
+        return [
+            {"email": r['email'], "scores": {
+                "final": r['final_score'],
+                "tecnico": r['tech_score'],
+                "blando": r['soft_score'],
+                "exp": r['exp_score']
+            }}
+            for r in ranking
+        ]
+
+    @staticmethod
+    def matrix_rows(rows):
+        # Filas de score_matrix en el formato de Neo4jService.save_matching_matrix
+        return [
+            {"email": r['email'], "oferta_titulo": r['oferta'], "scores": {
+                "final": r['final_score'],
+                "tecnico": r['tech_score'],
+                "blando": r['soft_score'],
+                "exp": r['exp_score']
+            }}
+            for r in rows
+        ]
+
+    @staticmethod
+    def matrix_table(rows):
+        # Tabla compacta (columnas + filas) para devolverle al agente
+        return {
+            "columnas": ["oferta", "email", "candidato", "final", "tecnico", "blando", "experiencia"],
+            "filas": [
+                [r['oferta'], r['email'], r['nombre_completo'], r['final_score'], r['tech_score'], r['soft_score'], r['exp_score']]
+                for r in rows
+            ]
+        }
+
+    def rank_candidates_for_offer(self, db, offer_title, top_k=20, save=True, role_index=None, prefilter_size=500,
+                                  pushdown=False):
+        # Carga todos los candidatos en una consulta, puntua todo junto y guarda solo el top-K.
+        # Con un RoleIndex solo se puntuan los 'prefilter_size' candidatos con puestos mas parecidos
+        # al titulo (ojo: deja afuera a quien no tenga experiencia afin aunque tenga las habilidades).
+        # Con pushdown=True los scores tecnico y blando se calculan en Neo4j y solo viajan las experiencias
+        offer = db.get_offer_requirements(offer_title)
+        if not offer:
+            return []
+        offer = self.compile_offer(offer, db if save else None)
+
+        emails = None
+        if role_index is not None:
+            emails = [email for email, _ in role_index.search(offer.titulo, prefilter_size)]
+
+        if pushdown:
+            ranking = self.rank_skill_scores(db.stream_skill_scores_for_offer(offer.titulo, emails), offer, top_k)
+        else:
+            if emails is not None:
+                candidates = CandidateProfile.from_records(db.get_candidate_profiles(emails))
+            else:
+                candidates = CandidateProfile.from_records(db.stream_candidate_profiles())
+            ranking = self.rank_candidates(candidates, offer, top_k)
+
+        if save and ranking:
+            db.save_matching_scores(offer.titulo, self.score_rows(ranking))
+
+        return ranking
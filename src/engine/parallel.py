@@ -0,0 +1,257 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.engine.embeddings import normalize_role
+from src.engine.matching import MatchingEngine, ROLE_CACHE, rounded_scores, top_indices
+from src.engine.records import CandidateProfile, OfferRequirements, Experience
+from src.engine.skill_matrix import (
+    SkillVocabulary, CandidateSkillMatrix, OfferRequirementVectors, technical_scores, soft_scores
+)
+from src.utils.helpers import ScoringClock
+
+SCORE_KEYS = ("final", "tecnico", "blando", "exp")
+
+# Estado de cada proceso del pool: el engine (y su modelo) se crea una sola vez por worker,
+# y los arrays compartidos se abren como memmap (solo lectura) la primera vez que se usan
+_WORKER = {}
+
+
+def _init_worker(engine_factory, threads):
+    if threads:
+        # Con N procesos, cada uno con todos los hilos de torch, se pisan entre si
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+    _WORKER["engine"] = engine_factory()
+    # Los workers codifican con un cache solo en memoria: el almacen en disco lo escribe el proceso padre
+    _WORKER["cache"] = _WORKER["engine"].embedding_cache.memory_only()
+    _WORKER["dir"] = None
+
+
+def _shared(data_dir, name):
+    if _WORKER.get("dir") != data_dir:
+        _WORKER["dir"] = data_dir
+        _WORKER["arrays"] = {}
+    arrays = _WORKER["arrays"]
+    if name not in arrays:
+        arrays[name] = np.load(os.path.join(data_dir, name + ".npy"), mmap_mode="r")
+    return arrays[name]
+
+
+def _encode_texts(texts):
+    return _WORKER["cache"].get_many(texts)
+
+
+def _score_block(data_dir, start, stop, offers):
+    # Puntua los candidatos [start, stop) contra un grupo de ofertas y escribe en results.npy.
+    # offers: lista de (columna, req_columns, w_tec, w_blan, w_exp, meses_min, fila del titulo)
+    engine = _WORKER["engine"]
+    levels = _shared(data_dir, "levels")[start:stop]
+    recency = _shared(data_dir, "recency")[start:stop]
+    offer_levels = _shared(data_dir, "offer_levels")
+    offer_critical = _shared(data_dir, "offer_critical")
+    embeddings = _shared(data_dir, "embeddings")
+
+    columns = [o[0] for o in offers]
+    cand_matrix = CandidateSkillMatrix.from_arrays(levels, recency)
+    offer_vectors = OfferRequirementVectors.from_arrays(
+        [o[1] for o in offers], offer_levels[columns], offer_critical[columns]
+    )
+    tech = technical_scores(cand_matrix, offer_vectors)
+    soft = soft_scores(cand_matrix, offer_vectors)
+
+    # Experiencias del bloque (vienen agrupadas por candidato, en el orden original)
+    offsets = _shared(data_dir, "exp_offsets")
+    e0, e1 = offsets[start], offsets[stop]
+    owners = _shared(data_dir, "exp_candidate")[e0:e1] - start
+    months = _shared(data_dir, "exp_months")[e0:e1]
+    role_embs = embeddings[_shared(data_dir, "exp_role")[e0:e1]].astype(np.float64)
+
+    results = np.load(os.path.join(data_dir, "results.npy"), mmap_mode="r+")
+    for j, (col, _, w_tec, w_blan, w_exp, min_months, title_row) in enumerate(offers):
+        exp = engine.experience_scores_from_arrays(owners, months, role_embs, embeddings[title_row], min_months, stop - start)
+
+        results[0, start:stop, col] = w_tec * tech[:, j] + w_blan * soft[:, j] + w_exp * exp
+        results[1, start:stop, col] = tech[:, j]
+        results[2, start:stop, col] = soft[:, j]
+        results[3, start:stop, col] = exp
+
+    results.flush()
+    return stop - start
+
+
+class ParallelMatcher:
+    """
+    Scoring de muchos candidatos contra muchas ofertas repartido en un pool de procesos.
+    Los datos de los candidatos se pasan una sola vez como arrays .npy en una carpeta temporal
+    que los workers abren como memmap (nada se serializa por tarea), y cada worker escribe
+    su bloque de scores en una matriz compartida. Cada worker carga el modelo una sola vez
+    y el pool se reutiliza entre corridas hasta close().
+    Los embeddings que ya estan en 'embedding_cache' (por defecto ROLE_CACHE si los workers usan
+    MatchingEngine) no se recalculan, y los nuevos se guardan ahi desde el proceso padre.
+    Da los mismos scores que MatchingEngine.score_candidates (salvo el ruido del encoder).
+    """
+
+    def __init__(self, workers=None, engine_factory=MatchingEngine, block_size=5000, offers_per_task=4,
+                 threads_per_worker=1, mp_context="spawn", embedding_cache=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.engine_factory = engine_factory  # tiene que poder serializarse (funcion o clase de modulo)
+        # Tiene que ser del mismo modelo que el engine de los workers (None = no se reutiliza ni guarda nada)
+        if embedding_cache is None and engine_factory is MatchingEngine:
+            embedding_cache = ROLE_CACHE
+        self.embedding_cache = embedding_cache
+        self.block_size = block_size
+        self.offers_per_task = offers_per_task
+        self.threads_per_worker = threads_per_worker
+        self.mp_context = mp_context
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _map(self, fn, *iterables):
+        # Con un solo worker se corre en el mismo proceso (sin pool)
+        if self.workers == 1:
+            if "engine" not in _WORKER:
+                _init_worker(self.engine_factory, None)
+            return list(map(fn, *iterables))
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.mp_context),
+                initializer=_init_worker,
+                initargs=(self.engine_factory, self.threads_per_worker),
+            )
+        return list(self._pool.map(fn, *iterables))
+
+    def score_matrix(self, candidates, offers):
+        # Devuelve {"final", "tecnico", "blando", "exp"}: matrices candidatos x ofertas sin redondear
+        n, m = len(candidates), len(offers)
+        if not n or not m:
+            return {key: np.zeros((n, m)) for key in SCORE_KEYS}
+
+        vocabulary = SkillVocabulary()
+        clock = ScoringClock()  # mismo 'hoy' para recencias y experiencias en curso
+        cand_matrix = CandidateSkillMatrix(vocabulary, candidates, clock)
+        offer_vectors = OfferRequirementVectors(vocabulary, offers)
+        levels, recency = cand_matrix.columns(len(vocabulary))
+
+        # Experiencias validas aplanadas: candidato, meses y puesto (indice en la lista de textos)
+        texts, text_rows = [], {}
+
+        def text_row(text):
+            key = normalize_role(text)
+            if key not in text_rows:
+                text_rows[key] = len(texts)
+                texts.append(key)
+            return text_rows[key]
+
+        exp_candidate, exp_months, exp_role = [], [], []
+        exp_offsets = [0]
+        for i, cand in enumerate(candidates):
+            for exp in cand['experiencias'] or []:
+                if isinstance(exp, Experience):
+                    months = exp.meses
+                else:
+                    months = clock.months_until_today(exp['fecha_inicio'], exp['fecha_fin'])
+                if months <= 0:
+                    continue
+                exp_candidate.append(i)
+                exp_months.append(months)
+                exp_role.append(text_row(exp['puesto']))
+            exp_offsets.append(len(exp_candidate))
+
+        title_rows = [text_row(o['titulo']) for o in offers]
+
+        embeddings = self._embeddings(texts)
+
+        data_dir = tempfile.mkdtemp(prefix="workia-match-")
+        try:
+            arrays = {
+                "levels": levels,
+                "recency": recency,
+                "offer_levels": offer_vectors.levels,
+                "offer_critical": offer_vectors.critical,
+                "embeddings": embeddings,
+                "exp_offsets": np.array(exp_offsets, dtype=np.int64),
+                "exp_candidate": np.array(exp_candidate, dtype=np.int64),
+                "exp_months": np.array(exp_months, dtype=np.float64),
+                "exp_role": np.array(exp_role, dtype=np.int64),
+            }
+            for name, array in arrays.items():
+                np.save(os.path.join(data_dir, name + ".npy"), array)
+            results = np.lib.format.open_memmap(os.path.join(data_dir, "results.npy"), mode="w+", shape=(4, n, m))
+            del results
+
+            offer_args = [
+                (col, offer_vectors.req_columns[col], o['w_tec'], o['w_blan'], o['w_exp'], o['meses_min_experiencia'], title_rows[col])
+                for col, o in enumerate(offers)
+            ]
+            tasks = [
+                (start, min(start + self.block_size, n), offer_args[k:k + self.offers_per_task])
+                for start in range(0, n, self.block_size)
+                for k in range(0, m, self.offers_per_task)
+            ]
+            self._map(_score_block, [data_dir] * len(tasks), *zip(*tasks))
+
+            results = np.load(os.path.join(data_dir, "results.npy"))
+            return {key: results[k] for k, key in enumerate(SCORE_KEYS)}
+        finally:
+            _WORKER.pop("arrays", None)
+            _WORKER["dir"] = None
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    def _embeddings(self, texts):
+        # Embeddings de todos los puestos y titulos: los que faltan en el cache se codifican
+        # repartidos entre los workers y se guardan en el cache desde aca (un solo escritor)
+        found = self.embedding_cache.peek_many(texts) if self.embedding_cache is not None else {}
+        missing = [t for t in texts if t not in found]
+        if missing:
+            chunk = max(64, -(-len(missing) // (self.workers * 4)))
+            encoded = np.concatenate(self._map(_encode_texts, [missing[i:i + chunk] for i in range(0, len(missing), chunk)]))
+            if self.embedding_cache is not None:
+                self.embedding_cache.put_many(missing, encoded)
+            found.update(zip(missing, encoded))
+        return np.stack([found[t] for t in texts])
+
+    def rank_offers(self, candidates, offers, top_k=20):
+        # {titulo: ranking} con el mismo formato y orden que MatchingEngine.rank_candidates
+        scores = self.score_matrix(candidates, offers)
+        rankings = {}
+        for col, offer in enumerate(offers):
+            final, tech, soft, exp = (scores[key][:, col] for key in SCORE_KEYS)
+            best = top_indices(final, top_k)
+            rankings[offer['titulo']] = [
+                {"email": candidates[i]['email'], "nombre_completo": candidates[i]['nombre_completo'], **s}
+                for i, s in zip(best, rounded_scores(final, tech, soft, exp, best))
+            ]
+        return rankings
+
+    def rerank_all(self, db, top_k=20, save=True, batch_size=500):
+        # Re-ranking completo (job nocturno): todos los candidatos contra todas las ofertas,
+        # guardando el top-K de cada oferta con escrituras por lotes
+        candidates = CandidateProfile.from_records(db.stream_candidate_profiles())
+        offers = [OfferRequirements.from_record(o) for o in db.stream_offer_requirements()]
+        rankings = self.rank_offers(candidates, offers, top_k)
+
+        if save:
+            for titulo, ranking in rankings.items():
+                if ranking:
+                    db.save_matching_scores(titulo, MatchingEngine.score_rows(ranking), batch_size)
+
+        return rankings
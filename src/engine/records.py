@@ -0,0 +1,153 @@
+from dataclasses import dataclass, field
+from datetime import date
+
+from src.utils.helpers import ScoringClock, to_date
+
+TECNICA = 'Técnica'
+BLANDA = 'Blanda'
+
+# Registros compactos (con __slots__) de candidatos y ofertas para el scoring.
+# Se arman una sola vez al cargar los datos de Neo4j: fechas ya convertidas a date,
+# habilidades separadas por tipo e indexadas por nombre, y los meses ya calculados.
+# __getitem__ permite seguir usandolos donde se espera el dict de record.data().
+
+
+@dataclass(slots=True)
+class SkillLevel:
+    nombre: str
+    tipo: str | None
+    nivel: int | None
+    ultimo_uso: date | None
+    meses_sin_uso: int | None  # None si no hay ultimo_uso
+    recencia: float
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+@dataclass(slots=True)
+class Experience:
+    puesto: str | None
+    fecha_inicio: date | None
+    fecha_fin: date | None
+    meses: int
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+@dataclass(slots=True)
+class Requirement:
+    nombre: str
+    tipo: str | None
+    nivel_minimo: int
+    es_critica: bool
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+@dataclass(slots=True)
+class CandidateProfile:
+    email: str
+    nombre_completo: str | None
+    ubicacion: str | None = None
+    fecha_nacimiento: date | None = None
+    movilidad: bool | None = None
+    seniority: str | None = None
+    habilidades: list = field(default_factory=list)
+    experiencias: list = field(default_factory=list)
+    tecnicas: dict = field(default_factory=dict)  # nombre -> SkillLevel
+    blandas: dict = field(default_factory=dict)
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    @classmethod
+    def from_record(cls, data, today=None):
+        # data: un registro de get_candidate_profile / stream_candidate_profiles.
+        # today: date o ScoringClock (from_records comparte uno entre todos los perfiles)
+        if isinstance(data, cls):
+            return data
+        clock = today if isinstance(today, ScoringClock) else ScoringClock(today)
+
+        habilidades = []
+        by_type = {TECNICA: {}, BLANDA: {}}
+        for h in data.get('habilidades') or []:
+            if h['nombre'] is None:
+                continue  # fila vacia del OPTIONAL MATCH
+            ultimo_uso = to_date(h['ultimo_uso'])
+            meses = clock.months_since(ultimo_uso)
+            skill = SkillLevel(h['nombre'], h['tipo'], h['nivel'], ultimo_uso, meses, clock.recency(ultimo_uso))
+            habilidades.append(skill)
+            if skill.tipo in by_type:
+                by_type[skill.tipo][skill.nombre] = skill  # si se repite gana la ultima, como el dict original
+
+        experiencias = []
+        for e in data.get('experiencias') or []:
+            if e['puesto'] is None and e['fecha_inicio'] is None and e['fecha_fin'] is None:
+                continue
+            inicio, fin = to_date(e['fecha_inicio']), to_date(e['fecha_fin'])
+            experiencias.append(Experience(e['puesto'], inicio, fin, clock.months_until_today(inicio, fin)))
+
+        return cls(
+            email=data.get('email'),
+            nombre_completo=data.get('nombre_completo'),
+            ubicacion=data.get('ubicacion'),
+            fecha_nacimiento=to_date(data.get('fecha_nacimiento')),
+            movilidad=data.get('movilidad'),
+            seniority=data.get('seniority'),
+            habilidades=habilidades,
+            experiencias=experiencias,
+            tecnicas=by_type[TECNICA],
+            blandas=by_type[BLANDA],
+        )
+
+    @classmethod
+    def from_records(cls, rows, today=None):
+        clock = today if isinstance(today, ScoringClock) else ScoringClock(today)
+        return [cls.from_record(row, clock) for row in rows]
+
+
+@dataclass(slots=True)
+class OfferRequirements:
+    titulo: str
+    meses_min_experiencia: int
+    w_tec: float
+    w_blan: float
+    w_exp: float
+    modalidad: str | None = None
+    seniority_buscado: str | None = None
+    salario: float | None = None
+    fecha_publicacion: date | None = None
+    requisitos: list = field(default_factory=list)
+    tecnicos: list = field(default_factory=list)  # Requirement tecnicos, en el orden original
+    blandos: list = field(default_factory=list)
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    @classmethod
+    def from_record(cls, data):
+        # data: un registro de get_offer_requirements
+        if isinstance(data, cls):
+            return data
+        requisitos = [
+            Requirement(r['nombre'], r['tipo'], r['nivel_minimo'], r['es_critica'])
+            for r in data.get('requisitos') or []
+            if r['nombre'] is not None
+        ]
+        return cls(
+            titulo=data['titulo'],
+            meses_min_experiencia=data['meses_min_experiencia'],
+            w_tec=data['w_tec'],
+            w_blan=data['w_blan'],
+            w_exp=data['w_exp'],
+            modalidad=data.get('modalidad'),
+            seniority_buscado=data.get('seniority_buscado'),
+            salario=data.get('salario'),
+            fecha_publicacion=to_date(data.get('fecha_publicacion')),
+            requisitos=requisitos,
+            tecnicos=[r for r in requisitos if r.tipo == TECNICA],
+            blandos=[r for r in requisitos if r.tipo == BLANDA],
+        )
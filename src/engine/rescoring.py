@@ -0,0 +1,93 @@
+import logging
+import threading
+from collections import defaultdict
+
+from src.engine.records import CandidateProfile, OfferRequirements
+from src.utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+
+class Rescorer:
+    """
+    Recalcula solo las ADECUACION marcadas como desactualizadas (a.desactualizada),
+    por lotes y agrupando por oferta para puntuar cada grupo en una sola pasada.
+    Se puede correr a mano (run_once / run_until_clean) o en un hilo de fondo (start / stop).
+    """
+
+    def __init__(self, db, engine, batch_size=500, interval=60):
+        self.db = db
+        self.engine = engine
+        self.batch_size = batch_size
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None  # ultima excepcion del hilo de fondo (None si la ultima vuelta anduvo)
+
+    def run_once(self):
+        # Procesa un lote de pares desactualizados y devuelve cuantos se recalcularon
+        stale = self.db.get_stale_matches(self.batch_size)
+        if not stale:
+            return 0
+
+        by_offer = defaultdict(list)
+        for row in stale:
+            by_offer[row['oferta_id']].append(row)
+
+        profiles = {p.email: p for p in CandidateProfile.from_records(self.db.get_candidate_profiles({row['email'] for row in stale}))}
+
+        rescored = 0
+        for oferta_id, rows in by_offer.items():
+            offer = self.db.get_offer_requirements_by_id(oferta_id)
+            rows = [row for row in rows if row['email'] in profiles]
+            if not offer or not rows:
+                continue
+            offer = OfferRequirements.from_record(offer)
+
+            scores = self.engine.score_candidates([profiles[row['email']] for row in rows], offer)
+
+            self.db.save_rescored_matches(oferta_id, [
+                {"email": row['email'], "marca": row['marca'], "scores": {
+                    "final": s['final_score'],
+                    "tecnico": s['tech_score'],
+                    "blando": s['soft_score'],
+                    "exp": s['exp_score']
+                }}
+                for row, s in zip(rows, scores)
+            ])
+            rescored += len(rows)
+
+        return rescored
+
+    def run_until_clean(self):
+        total = 0
+        while not self._stop.is_set():
+            done = self.run_once()
+            if not done:
+                break
+            total += done
+        return total
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self._thread
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="adecuacion-rescorer", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_until_clean()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                METRICS.inc("rescorer_errors")
+                logger.exception("Error al recalcular adecuaciones")
+            self._stop.wait(self.interval)
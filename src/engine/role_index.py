@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from src.engine.embeddings import normalize_role
+
+
+class RoleIndex:
+    """
+    Indice ANN (IVF) de los puestos de experiencia (TRABAJO_EN.puesto) de los candidatos.
+    Se indexan los puestos distintos (muchos candidatos comparten puesto) y cada uno
+    apunta a los emails que lo tuvieron. Sirve de prefiltro antes del scoring completo:
+    devuelve los candidatos cuyos puestos se parecen mas al titulo de la oferta.
+    Los embeddings salen del EmbeddingCache, asi que reconstruirlo no vuelve a pasar por el modelo.
+    """
+
+    # Por debajo de esta cantidad de puestos se busca por fuerza bruta (exacto)
+    BRUTE_FORCE_LIMIT = 2000
+
+    def __init__(self, embedding_cache, n_probe=8, kmeans_iters=10, seed=0):
+        self.embedding_cache = embedding_cache
+        self.n_probe = n_probe
+        self.kmeans_iters = kmeans_iters
+        self.seed = seed
+
+        self.roles = []
+        self.emails_by_role = []
+        self.embeddings = None
+        self.centroids = None
+        self.lists = None
+
+    @classmethod
+    def from_db(cls, db, embedding_cache, **kwargs):
+        index = cls(embedding_cache, **kwargs)
+        index.build((row['email'], row['puesto']) for row in db.stream_candidate_roles())
+        return index
+
+    def __len__(self):
+        return len(self.roles)
+
+    def build(self, pairs):
+        # pairs: iterable de (email, puesto)
+        emails_by_role = defaultdict(set)
+        for email, puesto in pairs:
+            if email and puesto:
+                emails_by_role[normalize_role(puesto)].add(email)
+
+        self.roles = list(emails_by_role)
+        self.emails_by_role = [sorted(emails_by_role[r]) for r in self.roles]
+        if not self.roles:
+            self.embeddings = self.centroids = self.lists = None
+            return self
+
+        self.embeddings = self.embedding_cache.get_many(self.roles)
+
+        if len(self.roles) <= self.BRUTE_FORCE_LIMIT:
+            self.centroids = self.lists = None
+        else:
+            self._train_ivf()
+        return self
+
+    def _train_ivf(self):
+        # k-means esferico (los embeddings estan normalizados) con ~sqrt(n) listas
+        n = len(self.roles)
+        n_lists = max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(self.seed)
+        centroids = self.embeddings[rng.choice(n, n_lists, replace=False)].copy()
+
+        for _ in range(self.kmeans_iters):
+            assign = np.argmax(self.embeddings @ centroids.T, axis=1)
+            for k in range(n_lists):
+                members = self.embeddings[assign == k]
+                if len(members):
+                    c = members.sum(axis=0)
+                    centroids[k] = c / (np.linalg.norm(c) or 1.0)
+
+        assign = np.argmax(self.embeddings @ centroids.T, axis=1)
+        self.centroids = centroids
+        self.lists = [np.flatnonzero(assign == k) for k in range(n_lists)]
+
+    def search(self, offer_title, n=100, min_affinity=0.0):
+        # Top-n candidatos por afinidad maxima entre sus puestos y el titulo: [(email, afinidad)]
+        if not self.roles:
+            return []
+
+        query = self.embedding_cache.get(offer_title)
+
+        if self.centroids is None:
+            rows = np.arange(len(self.roles))
+        else:
+            probe = np.argsort(-(self.centroids @ query))[:self.n_probe]
+            rows = np.concatenate([self.lists[k] for k in probe])
+
+        sims = self.embeddings[rows] @ query
+        order = np.argsort(-sims)
+
+        found = {}
+        for pos in order:
+            affinity = float(sims[pos])
+            if affinity < min_affinity:
+                break
+            for email in self.emails_by_role[rows[pos]]:
+                if email not in found:
+                    found[email] = affinity # el primero que aparece es el de mayor afinidad
+            if len(found) >= n:
+                break
+
+        return list(found.items())[:n]
+
+
+class LazyRoleIndex:
+    """
+    Arma el RoleIndex recien cuando se pide y solo si hay mas de 'min_roles' puestos distintos
+    (con menos, puntuar a todos es barato y exacto: get devuelve None). Se reconstruye cada
+    'ttl' segundos para incluir a los candidatos nuevos. Es thread-safe.
+    """
+
+    def __init__(self, embedding_cache, min_roles=RoleIndex.BRUTE_FORCE_LIMIT, ttl=600, enabled=True):
+        self.embedding_cache = embedding_cache
+        self.min_roles = min_roles
+        self.ttl = ttl
+        self.enabled = enabled
+        self._index = None
+        self._built_at = None
+        self._lock = threading.Lock()
+
+    def get(self, db):
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self._built_at is None or time.monotonic() - self._built_at > self.ttl:
+                self._index = self._build(db)
+                self._built_at = time.monotonic()
+            return self._index
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def _build(self, db):
+        # Primero se cuentan los puestos (sin pasar por el modelo); se embeben solo si hace falta el indice
+        pairs = [(row['email'], row['puesto']) for row in db.stream_candidate_roles()]
+        roles = {normalize_role(puesto) for email, puesto in pairs if email and puesto}
+        if len(roles) <= self.min_roles:
+            return None
+        return RoleIndex(self.embedding_cache).build(pairs)
@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+# Backends del encoder de roles:
+#   "torch"     -> SentenceTransformer normal (float32, referencia)
+#   "onnx"      -> ONNX Runtime en CPU, mismo modelo float32
+#   "onnx-int8" -> ONNX Runtime con el modelo cuantizado a int8 (mas rapido en CPU)
+# Los backends ONNX necesitan sentence-transformers[onnx] (onnxruntime + optimum).
+ROLE_MODEL_BACKENDS = ("torch", "onnx", "onnx-int8")
+DEFAULT_ONNX_INT8_FILE = "onnx/model_quint8_avx2.onnx"
+
+# Tolerancia aceptada frente al modelo torch: diferencia maxima de afinidad (coseno)
+# entre dos roles de REFERENCE_ROLES. Un backend se valida una vez (verify_backend, o
+# "python -m src.engine.role_model") y el desvio medido se guarda en disco; el umbral de
+# afinidad de experiencia es 0.6.
+ROLE_MODEL_TOLERANCE = 0.02
+DRIFT_FILE = "role_model_drift.json"
+
+# Titulos usados para validar un backend contra la referencia
+REFERENCE_ROLES = [
+    "Desarrollador Backend", "Backend Developer", "Desarrollador Frontend", "Full Stack Developer",
+    "Data Scientist", "Analista de Datos", "Ingeniero de Machine Learning", "DevOps Engineer",
+    "QA Tester", "Project Manager", "Product Owner", "Diseñador UX/UI",
+    "Administrador de Sistemas", "Soporte Técnico", "Contador", "Vendedor",
+]
+
+
+class LazyRoleModel:
+    """
+    Envuelve al SentenceTransformer para cargarlo recien en el primer encode
+    (importar el motor no carga torch ni el modelo). Es thread-safe.
+    Con verify un backend ONNX se compara contra torch al cargarse y, si se desvia mas
+    que ROLE_MODEL_TOLERANCE, la carga falla en vez de dar afinidades distintas. Con
+    drift_file el desvio se mide una sola vez: las cargas siguientes usan el guardado.
+    """
+
+    def __init__(self, model_name, backend="torch", onnx_file=None, verify=False, drift_file=None):
+        if backend not in ROLE_MODEL_BACKENDS:
+            raise ValueError(f"Backend de modelo desconocido: {backend}. Opciones: {ROLE_MODEL_BACKENDS}")
+        self.model_name = model_name
+        self.backend = backend
+        self.onnx_file = onnx_file or DEFAULT_ONNX_INT8_FILE
+        self.verify = verify
+        self.drift_file = drift_file
+        self.drift = None  # desvio medido contra torch al cargar (None si no se valido)
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache_key(self):
+        # Para no mezclar en disco embeddings de backends distintos
+        return self.model_name if self.backend == "torch" else f"{self.model_name}:{self.backend}"
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    model = self._build()
+                    if self.verify and self.backend != "torch":
+                        drift = read_drift(self.drift_file, self.cache_key)
+                        if drift is None:
+                            drift = max_affinity_drift(LazyRoleModel(self.model_name), model)
+                            write_drift(self.drift_file, self.cache_key, drift)
+                        self.drift = check_drift(self.backend, drift)
+                    self._model = model
+        return self._model
+
+    def _build(self):
+        from sentence_transformers import SentenceTransformer
+
+        if self.backend == "torch":
+            return SentenceTransformer(self.model_name)
+        if self.backend == "onnx":
+            return SentenceTransformer(self.model_name, backend="onnx")
+        return SentenceTransformer(self.model_name, backend="onnx", model_kwargs={"file_name": self.onnx_file})
+
+    def encode(self, texts, **kwargs):
+        return self.load().encode(texts, **kwargs)
+
+    def warm_up(self, background=True):
+        # Carga el modelo y hace un encode de prueba (la primera inferencia tambien es lenta)
+        def run():
+            self.encode(["warm up"], convert_to_numpy=True)
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="role-model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+
+def max_affinity_drift(reference, candidate, texts=None):
+    # Maxima diferencia de coseno entre pares de roles usando 'candidate' en lugar de 'reference'
+    texts = texts or REFERENCE_ROLES
+
+    def cosine_matrix(model):
+        embs = np.asarray(model.encode(texts, convert_to_numpy=True), dtype=np.float64)
+        embs /= np.linalg.norm(embs, axis=1, keepdims=True)
+        return embs @ embs.T
+
+    return float(np.abs(cosine_matrix(reference) - cosine_matrix(candidate)).max())
+
+
+def check_drift(backend, drift, tolerance=ROLE_MODEL_TOLERANCE):
+    if drift > tolerance:
+        raise ValueError(
+            f"El backend '{backend}' se desvia {drift:.4f} del modelo de referencia (tolerancia {tolerance})"
+        )
+    return drift
+
+
+def read_drift(path, key):
+    # Desvio guardado para 'key' (LazyRoleModel.cache_key), o None si no se midio
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get(key)
+
+
+def write_drift(path, key, drift):
+    if not path:
+        return
+    drifts = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            drifts = json.load(f)
+    else:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    drifts[key] = drift
+    # Archivo temporal + rename: otro proceso nunca lee un JSON a medio escribir
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(drifts, f)
+    os.replace(tmp_path, path)
+
+
+def verify_backend(model, texts=None, tolerance=ROLE_MODEL_TOLERANCE):
+    # Compara un backend contra el modelo torch de referencia; falla si se pasa de la tolerancia.
+    # El desvio medido se guarda en model.drift_file (si tiene) para que las cargas no lo repitan
+    if model.backend == "torch":
+        return 0.0
+    drift = max_affinity_drift(LazyRoleModel(model.model_name), model, texts)
+    if texts is None:
+        write_drift(model.drift_file, model.cache_key, drift)
+    return check_drift(model.backend, drift, tolerance)
+
+
+if __name__ == "__main__":
+    # Valida el backend configurado (mismas variables que src/engine/matching.py) y guarda el desvio
+    from src.engine.matching import ROLE_MODEL
+
+    drift = verify_backend(ROLE_MODEL)
+    print(f"{ROLE_MODEL.cache_key}: desvio {drift:.4f} (tolerancia {ROLE_MODEL_TOLERANCE})")
@@ -0,0 +1,175 @@
+import numpy as np
+
+from src.engine.records import CandidateProfile, TECNICA, BLANDA
+from src.utils.helpers import ScoringClock, to_datetime64
+
+
+class SkillVocabulary:
+    """
+    Vocabulario de habilidades: nombre -> columna.
+    Se arma con get_all_skills y crece si aparece una habilidad nueva en un perfil u oferta.
+    """
+
+    def __init__(self, skills=()):
+        self.index = {}
+        self.names = []
+        self.types = []
+        for s in skills:
+            self.add(s['nombre'], s['tipo'])
+
+    @classmethod
+    def from_db(cls, db):
+        return cls(db.get_all_skills())
+
+    def add(self, nombre, tipo):
+        col = self.index.get(nombre)
+        if col is None:
+            col = len(self.names)
+            self.index[nombre] = col
+            self.names.append(nombre)
+            self.types.append(tipo)
+        elif self.types[col] is None:
+            self.types[col] = tipo
+        return col
+
+    def __len__(self):
+        return len(self.names)
+
+
+class CandidateSkillMatrix:
+    """
+    Niveles y recencia de N candidatos como matrices densas (candidatos x habilidades).
+    Una habilidad que el candidato no tiene queda con nivel 0, que puntua igual que no tenerla.
+    La recencia de los perfiles sin convertir se calcula toda junta contra el 'hoy' de 'clock'.
+    """
+
+    def __init__(self, vocabulary, candidates, clock=None):
+        self.vocabulary = vocabulary
+        clock = clock or ScoringClock()
+
+        entries = []  # (candidato, columna, nivel, recencia o None si hay que calcularla)
+        pending = []  # (posicion en entries, ultimo_uso)
+        for i, cand in enumerate(candidates):
+            if isinstance(cand, CandidateProfile):
+                # Ya vienen filtradas y con la recencia calculada
+                for h in cand.habilidades:
+                    if h.tipo in (TECNICA, BLANDA):
+                        entries.append((i, vocabulary.add(h.nombre, h.tipo), h.nivel, h.recencia))
+                continue
+            for h in cand['habilidades']:
+                if h['nombre'] is None or h['tipo'] not in (TECNICA, BLANDA):
+                    continue
+                pending.append((len(entries), h['ultimo_uso']))
+                entries.append((i, vocabulary.add(h['nombre'], h['tipo']), h['nivel'], None))
+
+        if pending:
+            recencies = clock.recency_array(to_datetime64([d for _, d in pending])).tolist()
+            for (k, _), recency in zip(pending, recencies):
+                i, col, level, _ = entries[k]
+                entries[k] = (i, col, level, recency)
+
+        self.levels = np.zeros((len(candidates), len(vocabulary)))
+        self.recency = np.zeros((len(candidates), len(vocabulary)))
+
+        # Si un candidato repite habilidad gana la ultima, igual que el dict de calculate_technical_score
+        for i, col, level, recency in entries:
+            self.levels[i, col] = level
+            self.recency[i, col] = recency
+
+    @classmethod
+    def from_arrays(cls, levels, recency, vocabulary=None):
+        # Para matrices ya armadas (por ej. memmaps compartidos entre procesos)
+        matrix = cls.__new__(cls)
+        matrix.vocabulary = vocabulary
+        matrix.levels = levels
+        matrix.recency = recency
+        return matrix
+
+    def columns(self, size):
+        # Devuelve las matrices con al menos 'size' columnas (si el vocabulario crecio despues)
+        missing = size - self.levels.shape[1]
+        if missing <= 0:
+            return self.levels, self.recency
+        pad = ((0, 0), (0, missing))
+        return np.pad(self.levels, pad), np.pad(self.recency, pad)
+
+
+class OfferRequirementVectors:
+    """
+    Requisitos de M ofertas como vectores sobre el vocabulario:
+    nivel minimo, criticidad y tipo (por columna), mas el orden original de los requisitos.
+    """
+
+    def __init__(self, vocabulary, offers):
+        self.vocabulary = vocabulary
+
+        # Columnas de cada oferta por tipo, en el orden de 'requisitos'
+        self.req_columns = []
+        for offer in offers:
+            cols = {TECNICA: [], BLANDA: []}
+            for r in offer['requisitos']:
+                if r['tipo'] in cols:
+                    cols[r['tipo']].append(vocabulary.add(r['nombre'], r['tipo']))
+            self.req_columns.append({tipo: np.array(c, dtype=np.intp) for tipo, c in cols.items()})
+
+        self.levels = np.zeros((len(offers), len(vocabulary)))
+        self.critical = np.zeros((len(offers), len(vocabulary)), dtype=bool)
+        for m, offer in enumerate(offers):
+            for r in offer['requisitos']:
+                if r['tipo'] in (TECNICA, BLANDA):
+                    col = vocabulary.index[r['nombre']]
+                    self.levels[m, col] = r['nivel_minimo']
+                    self.critical[m, col] = bool(r['es_critica'])
+
+        self.types = np.array(vocabulary.types, dtype=object)
+
+    @classmethod
+    def from_arrays(cls, req_columns, levels, critical, vocabulary=None):
+        vectors = cls.__new__(cls)
+        vectors.vocabulary = vocabulary
+        vectors.req_columns = req_columns
+        vectors.levels = levels
+        vectors.critical = critical
+        vectors.types = np.array(vocabulary.types, dtype=object) if vocabulary is not None else None
+        return vectors
+
+    def __len__(self):
+        return len(self.req_columns)
+
+
+# Las sumas se hacen con cumsum (estrictamente secuencial) para sumar en el mismo orden
+# que los loops de MatchingEngine y obtener exactamente los mismos valores
+
+def technical_scores(cand_matrix, offer_vectors):
+    # Matriz candidatos x ofertas con el score tecnico
+    levels, recency = cand_matrix.columns(offer_vectors.levels.shape[1])
+    scores = np.ones((levels.shape[0], len(offer_vectors)))
+
+    for m, cols in enumerate(offer_vectors.req_columns):
+        cols = cols[TECNICA]
+        if not len(cols):
+            continue # sin requisitos tecnicos queda 1.0
+
+        w_crit = np.where(offer_vectors.critical[m, cols], 1.5, 1.0)
+        level_match = np.minimum(levels[:, cols] / offer_vectors.levels[m, cols], 1)
+        weighted = level_match * recency[:, cols] * w_crit
+
+        scores[:, m] = np.cumsum(weighted, axis=1)[:, -1] / np.cumsum(w_crit)[-1]
+
+    return scores
+
+
+def soft_scores(cand_matrix, offer_vectors):
+    # Matriz candidatos x ofertas con el score blando
+    levels, _ = cand_matrix.columns(offer_vectors.levels.shape[1])
+    scores = np.ones((levels.shape[0], len(offer_vectors)))
+
+    for m, cols in enumerate(offer_vectors.req_columns):
+        cols = cols[BLANDA]
+        if not len(cols):
+            continue # sin requisitos blandos queda 1.0
+
+        level_match = np.minimum(levels[:, cols] / offer_vectors.levels[m, cols], 1)
+        scores[:, m] = np.cumsum(level_match, axis=1)[:, -1] / len(cols)
+
+    return scores
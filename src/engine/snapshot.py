@@ -0,0 +1,353 @@
+import json
+import os
+import time
+
+import numpy as np
+
+from src.engine.embeddings import EmbeddingCache, normalize_role
+from src.engine.matching import ROLE_CACHE, ROLE_MODEL
+from src.engine.records import (
+    CandidateProfile, OfferRequirements, Requirement, SkillLevel, Experience, TECNICA, BLANDA, to_date
+)
+from src.engine.skill_matrix import SkillVocabulary, CandidateSkillMatrix
+from src.utils.helpers import ScoringClock, months_between_array, to_datetime64
+
+SKILL_TYPES = (TECNICA, BLANDA)  # tipo -> codigo (posicion), -1 = otro / sin tipo
+MULT_KEYS = ("tecnico", "blando", "experiencia")  # columnas de offer_weights, como update_offer_weights
+
+
+def _type_code(tipo):
+    return SKILL_TYPES.index(tipo) if tipo in SKILL_TYPES else -1
+
+
+class MatchingSnapshot:
+    """
+    Foto local del dataset de matching: candidatos, habilidades, experiencias y ofertas como
+    arrays de NumPy (un .npy por array, se abren como memmap) mas un diccionario de strings,
+    con los embeddings de puestos y titulos ya calculados. Con MatchingEngine.rank_snapshot se
+    puntua offline, sin Neo4j ni modelo, y se pueden probar otros multiplicadores por oferta.
+    Los textos se guardan una sola vez en 'strings'; los arrays guardan su indice (-1 = None).
+    """
+
+    VERSION = 1
+    META_FILE = "meta.json"
+    STRINGS_FILE = "strings.json"
+
+    def __init__(self, strings, arrays, model_name=None, created_at=None):
+        self.strings = strings
+        self.arrays = arrays
+        self.model_name = model_name
+        self.created_at = created_at
+
+    def __len__(self):
+        return len(self.arrays["cand_email"])
+
+    def _text(self, index):
+        return self.strings[index] if index >= 0 else None
+
+    def _texts(self, indices):
+        return [self.strings[i] if i >= 0 else None for i in indices.tolist()]
+
+
+    # --- EXPORTAR ---
+    @classmethod
+    def from_db(cls, db, embedding_cache=None):
+        # Lee todo de Neo4j en tres consultas (perfiles, ofertas y catalogo de habilidades)
+        return cls.from_records(
+            db.stream_candidate_profiles(), db.stream_offer_requirements(), embedding_cache, db.get_all_skills()
+        )
+
+    @classmethod
+    def from_records(cls, candidates, offers, embedding_cache=None, skills=()):
+        # candidates / offers: registros de stream_candidate_profiles / stream_offer_requirements
+        # (o CandidateProfile / OfferRequirements). Los embeddings salen de embedding_cache
+        embedding_cache = embedding_cache or ROLE_CACHE
+        strings, string_rows = [], {}
+
+        def text_row(text):
+            if text is None:
+                return -1
+            row = string_rows.get(text)
+            if row is None:
+                row = string_rows[text] = len(strings)
+                strings.append(text)
+            return row
+
+        roles, role_rows = [], {}
+
+        def role_row(text):
+            key = normalize_role(text)
+            row = role_rows.get(key)
+            if row is None:
+                row = role_rows[key] = len(roles)
+                roles.append(key)
+            return row
+
+        vocabulary = SkillVocabulary(skills)
+        cand, hab, exp = [], [], []
+        for i, c in enumerate(candidates):
+            cand.append((
+                text_row(c['email']), text_row(c['nombre_completo']), text_row(c['ubicacion']), text_row(c['seniority']),
+                -1 if c['movilidad'] is None else int(bool(c['movilidad'])), to_date(c['fecha_nacimiento']),
+            ))
+            for h in c['habilidades'] or []:
+                if h['nombre'] is None:
+                    continue  # fila vacia del OPTIONAL MATCH
+                hab.append((i, vocabulary.add(h['nombre'], h['tipo']), _type_code(h['tipo']), h['nivel'], to_date(h['ultimo_uso'])))
+            for e in c['experiencias'] or []:
+                if e['puesto'] is None and e['fecha_inicio'] is None and e['fecha_fin'] is None:
+                    continue
+                exp.append((i, text_row(e['puesto']), role_row(e['puesto']), to_date(e['fecha_inicio']), to_date(e['fecha_fin'])))
+
+        offer_rows, reqs, req_offsets = [], [], [0]
+        for o in offers:
+            o = OfferRequirements.from_record(o)
+            offer_rows.append((
+                text_row(o.titulo), role_row(o.titulo), o.meses_min_experiencia, (o.w_tec, o.w_blan, o.w_exp),
+                text_row(o.modalidad), text_row(o.seniority_buscado), o.salario, o.fecha_publicacion,
+            ))
+            for r in o.requisitos:
+                reqs.append((vocabulary.add(r.nombre, r.tipo), _type_code(r.tipo), r.nivel_minimo, bool(r.es_critica)))
+            req_offsets.append(len(reqs))
+
+        def column(rows, k, dtype):
+            if dtype == "datetime64[D]":
+                return to_datetime64([row[k] for row in rows])
+            return np.array([row[k] for row in rows], dtype=dtype)
+
+        arrays = {
+            "cand_email": column(cand, 0, np.int32),
+            "cand_name": column(cand, 1, np.int32),
+            "cand_ubicacion": column(cand, 2, np.int32),
+            "cand_seniority": column(cand, 3, np.int32),
+            "cand_movilidad": column(cand, 4, np.int8),  # -1 = sin dato
+            "cand_nacimiento": column(cand, 5, "datetime64[D]"),
+            "skill_name": np.array([text_row(n) for n in vocabulary.names], dtype=np.int32),
+            "skill_type": np.array([_type_code(t) for t in vocabulary.types], dtype=np.int8),
+            "hab_candidate": column(hab, 0, np.int32),
+            "hab_skill": column(hab, 1, np.int32),
+            "hab_type": column(hab, 2, np.int8),
+            "hab_level": column(hab, 3, np.float64),
+            "hab_last_used": column(hab, 4, "datetime64[D]"),
+            "exp_candidate": column(exp, 0, np.int32),
+            "exp_puesto": column(exp, 1, np.int32),
+            "exp_role": column(exp, 2, np.int32),
+            "exp_start": column(exp, 3, "datetime64[D]"),
+            "exp_end": column(exp, 4, "datetime64[D]"),
+            "offer_title": column(offer_rows, 0, np.int32),
+            "offer_role": column(offer_rows, 1, np.int32),
+            "offer_min_months": column(offer_rows, 2, np.int64),
+            "offer_weights": np.array([row[3] for row in offer_rows], dtype=np.float64).reshape(len(offer_rows), 3),
+            "offer_modalidad": column(offer_rows, 4, np.int32),
+            "offer_seniority": column(offer_rows, 5, np.int32),
+            "offer_salario": np.array([np.nan if row[6] is None else row[6] for row in offer_rows], dtype=np.float64),
+            "offer_fecha": column(offer_rows, 7, "datetime64[D]"),
+            "req_offsets": np.array(req_offsets, dtype=np.int64),
+            "req_skill": column(reqs, 0, np.int32),
+            "req_type": column(reqs, 1, np.int8),
+            "req_level": column(reqs, 2, np.float64),
+            "req_critical": column(reqs, 3, bool),
+            "role_key": np.array([text_row(r) for r in roles], dtype=np.int32),
+            "embeddings": embedding_cache.get_many(roles) if roles else np.empty((0, 0), dtype=np.float32),
+        }
+        return cls(strings, arrays, getattr(embedding_cache, "model_name", None), time.time())
+
+
+    # --- GUARDAR / CARGAR ---
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(os.path.join(path, name + ".npy"), array)
+        with open(os.path.join(path, self.STRINGS_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.strings, f, ensure_ascii=False)
+        # meta.json al final: si esta, la foto esta completa
+        with open(os.path.join(path, self.META_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": self.VERSION,
+                "model_name": self.model_name,
+                "created_at": self.created_at,
+                "arrays": sorted(self.arrays),
+                "candidatos": len(self),
+                "ofertas": len(self.arrays["offer_title"]),
+            }, f)
+        return path
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, cls.META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["version"] != cls.VERSION:
+            raise ValueError(f"Version de snapshot no soportada: {meta['version']}")
+        with open(os.path.join(path, cls.STRINGS_FILE), encoding="utf-8") as f:
+            strings = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r" if mmap else None)
+            for name in meta["arrays"]
+        }
+        return cls(strings, arrays, meta.get("model_name"), meta.get("created_at"))
+
+
+    # --- LECTURA ---
+    def emails(self):
+        return self._texts(self.arrays["cand_email"])
+
+    def names(self):
+        return self._texts(self.arrays["cand_name"])
+
+    def vocabulary(self):
+        vocabulary = SkillVocabulary()
+        for name, code in zip(self.arrays["skill_name"].tolist(), self.arrays["skill_type"].tolist()):
+            vocabulary.add(self.strings[name], SKILL_TYPES[code] if code >= 0 else None)
+        return vocabulary
+
+    def same_model(self, model_name):
+        # Si los embeddings de la foto son comparables con los de 'model_name' (sin nombre no se sabe, se asume que si)
+        return not (self.model_name and model_name and self.model_name != model_name)
+
+    def seed(self, embedding_cache):
+        # Pasa los embeddings de la foto al cache (solo si son del mismo modelo). Devuelve si se cargaron
+        if not self.same_model(embedding_cache.model_name):
+            return False
+        embedding_cache.preload(self._texts(self.arrays["role_key"]), self.arrays["embeddings"])
+        return True
+
+    def embedding_cache(self, model=None):
+        # Cache con los embeddings de la foto; el modelo (lazy) solo se carga si aparece un texto nuevo
+        cache = EmbeddingCache(model or ROLE_MODEL, max_size=len(self.arrays["role_key"]) + 2048, model_name=self.model_name)
+        self.seed(cache)
+        return cache
+
+    def offers(self, titles=None, weights=None):
+        # OfferRequirements de la foto (todas o las de 'titles', en ese orden).
+        # weights: {titulo: {tecnico, blando, experiencia}} para probar otros multiplicadores
+        weights = weights or {}
+        titles_all = self._texts(self.arrays["offer_title"])
+        if titles is None:
+            columns = range(len(titles_all))
+        else:
+            by_title = {t: m for m, t in reversed(list(enumerate(titles_all)))}
+            columns = [by_title[t] for t in titles if t in by_title]
+
+        offsets = self.arrays["req_offsets"]
+        offers = []
+        for m in columns:
+            titulo = titles_all[m]
+            w_tec, w_blan, w_exp = self.arrays["offer_weights"][m].tolist()
+            mults = weights.get(titulo) or {}
+            w_tec, w_blan, w_exp = (
+                float(mults[key]) if mults.get(key) is not None else w for key, w in zip(MULT_KEYS, (w_tec, w_blan, w_exp))
+            )
+            requisitos = [
+                Requirement(self.strings[self.arrays["skill_name"][s]], SKILL_TYPES[t] if t >= 0 else None, level, crit)
+                for s, t, level, crit in zip(
+                    self.arrays["req_skill"][offsets[m]:offsets[m + 1]].tolist(),
+                    self.arrays["req_type"][offsets[m]:offsets[m + 1]].tolist(),
+                    self.arrays["req_level"][offsets[m]:offsets[m + 1]].tolist(),
+                    self.arrays["req_critical"][offsets[m]:offsets[m + 1]].tolist(),
+                )
+            ]
+            salario = float(self.arrays["offer_salario"][m])
+            fecha = self.arrays["offer_fecha"][m]
+            offers.append(OfferRequirements(
+                titulo=titulo,
+                meses_min_experiencia=int(self.arrays["offer_min_months"][m]),
+                w_tec=w_tec,
+                w_blan=w_blan,
+                w_exp=w_exp,
+                modalidad=self._text(int(self.arrays["offer_modalidad"][m])),
+                seniority_buscado=self._text(int(self.arrays["offer_seniority"][m])),
+                salario=None if np.isnan(salario) else salario,
+                fecha_publicacion=None if np.isnat(fecha) else fecha.astype(object),
+                requisitos=requisitos,
+                tecnicos=[r for r in requisitos if r.tipo == TECNICA],
+                blandos=[r for r in requisitos if r.tipo == BLANDA],
+            ))
+        return offers
+
+    def skill_matrix(self, vocabulary, clock=None):
+        # CandidateSkillMatrix armada directo de los arrays (recencia vectorizada contra clock.today)
+        clock = clock or ScoringClock()
+        keep = self.arrays["hab_type"] >= 0
+        rows = self.arrays["hab_candidate"][keep]
+        # Columnas del vocabulario pedido (puede tener otro orden o mas habilidades que el de la foto)
+        skill_cols = np.array([vocabulary.index[self.strings[n]] for n in self.arrays["skill_name"].tolist()], dtype=np.intp)
+        cols = skill_cols[self.arrays["hab_skill"][keep]] if len(skill_cols) else np.zeros(0, dtype=np.intp)
+
+        # Si un candidato repite habilidad gana la ultima, como en CandidateSkillMatrix
+        keys = rows.astype(np.int64) * max(len(vocabulary), 1) + cols
+        _, last = np.unique(keys[::-1], return_index=True)
+        last = len(keys) - 1 - last
+
+        levels = np.zeros((len(self), len(vocabulary)))
+        recency = np.zeros((len(self), len(vocabulary)))
+        levels[rows[last], cols[last]] = self.arrays["hab_level"][keep][last]
+        recency[rows[last], cols[last]] = clock.recency_array(self.arrays["hab_last_used"][keep][last])
+        return CandidateSkillMatrix.from_arrays(levels, recency, vocabulary)
+
+    def experiences(self, clock=None):
+        # Experiencias que cuentan (mas de un mes): (candidato, meses, fila del embedding del puesto)
+        clock = clock or ScoringClock()
+        start = self.arrays["exp_start"]
+        end = np.where(np.isnat(self.arrays["exp_end"]), np.datetime64(clock.today, "D"), self.arrays["exp_end"])
+        months = months_between_array(start, end)
+        valid = ~np.isnat(start) & (months > 0)
+        return self.arrays["exp_candidate"][valid], months[valid].astype(np.float64), self.arrays["exp_role"][valid]
+
+    def candidates(self, clock=None):
+        # CandidateProfile de la foto (para los caminos de a un candidato de MatchingEngine)
+        clock = clock or ScoringClock()
+        profiles = [
+            CandidateProfile(
+                email=email,
+                nombre_completo=name,
+                ubicacion=ubicacion,
+                fecha_nacimiento=nacimiento,
+                movilidad=None if movilidad < 0 else bool(movilidad),
+                seniority=seniority,
+            )
+            for email, name, ubicacion, seniority, movilidad, nacimiento in zip(
+                self.emails(), self.names(), self._texts(self.arrays["cand_ubicacion"]),
+                self._texts(self.arrays["cand_seniority"]), self.arrays["cand_movilidad"].tolist(),
+                self.arrays["cand_nacimiento"].astype(object).tolist(),
+            )
+        ]
+        skill_names = self._texts(self.arrays["skill_name"])
+        last_used = self.arrays["hab_last_used"]
+        months = months_between_array(last_used, np.datetime64(clock.today, "D"))
+        recency = clock.recency_array(last_used)
+        for i, s, t, level, used, m, r in zip(
+            self.arrays["hab_candidate"].tolist(), self.arrays["hab_skill"].tolist(), self.arrays["hab_type"].tolist(),
+            self.arrays["hab_level"].tolist(), last_used.astype(object).tolist(), months.tolist(), recency.tolist(),
+        ):
+            skill = SkillLevel(skill_names[s], SKILL_TYPES[t] if t >= 0 else None, level, used,
+                               m if used is not None else None, r)
+            profiles[i].habilidades.append(skill)
+            if t >= 0:
+                (profiles[i].tecnicas if skill.tipo == TECNICA else profiles[i].blandas)[skill.nombre] = skill
+
+        end = np.where(np.isnat(self.arrays["exp_end"]), np.datetime64(clock.today, "D"), self.arrays["exp_end"])
+        exp_months = np.where(np.isnat(self.arrays["exp_start"]), 0, months_between_array(self.arrays["exp_start"], end))
+        for i, puesto, start, fin, m in zip(
+            self.arrays["exp_candidate"].tolist(), self._texts(self.arrays["exp_puesto"]),
+            self.arrays["exp_start"].astype(object).tolist(), self.arrays["exp_end"].astype(object).tolist(), exp_months.tolist(),
+        ):
+            profiles[i].experiencias.append(Experience(puesto, start, fin, m))
+        return profiles
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.database.driver import close_driver
+    from src.database.neo4j_service import Neo4jService
+
+    parser = argparse.ArgumentParser(description="Exporta el dataset de matching de Neo4j a una carpeta local")
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    db = Neo4jService()
+    try:
+        snapshot = MatchingSnapshot.from_db(db)
+        snapshot.save(args.path)
+        print(f"{len(snapshot)} candidatos y {len(snapshot.arrays['offer_title'])} ofertas en {args.path}")
+    finally:
+        close_driver()
@@ -0,0 +1,126 @@
+import calendar
+from datetime import date, datetime
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+# Cuentas de fechas del scoring sin crear un relativedelta por llamada.
+# months_between da exactamente relativedelta(end, start).years * 12 + .months,
+# pero con aritmetica entera de anio/mes/dia.
+
+RECENCY_SIN_FECHA = 0.5
+RECENCY_BUCKETS = ((6, 1.0), (12, 0.8), (24, 0.6))  # (hasta X meses sin usar, factor)
+RECENCY_RESTO = 0.4
+
+
+def to_date(d):
+    # Fechas de Neo4j (neo4j.time.Date) a date de Python
+    if d is None:
+        return None
+    if hasattr(d, "to_native"):
+        return d.to_native()
+    return d
+
+
+def is_end_of_month(d):
+    return d.day == calendar.monthrange(d.year, d.month)[1]
+
+
+def months_between(start, end):
+    # Meses completos de start a end (negativo si start es posterior), como relativedelta:
+    # si el dia de start no llego todavia en el mes de end se descuenta uno, salvo que end
+    # sea fin de mes (31/01 -> 29/02 ya es un mes)
+    if isinstance(start, datetime) or isinstance(end, datetime):
+        delta = relativedelta(end, start)  # con horas la cuenta cambia, se deja a relativedelta
+        return delta.years * 12 + delta.months
+
+    months = (end.year - start.year) * 12 + (end.month - start.month)
+    if start <= end:
+        if start.day > end.day and not is_end_of_month(end):
+            months -= 1
+    elif end.day > start.day:
+        months += 1
+    return months
+
+
+def recency_bucket(months):
+    # Factor de recencia a partir de los meses sin usar la habilidad (None = sin fecha)
+    if months is None:
+        return RECENCY_SIN_FECHA
+    for limit, factor in RECENCY_BUCKETS:
+        if months <= limit:
+            return factor
+    return RECENCY_RESTO
+
+
+# --- Version vectorizada (arrays de numpy datetime64[D], NaT = sin fecha) ---
+
+def to_datetime64(dates):
+    # Lista de fechas (date, neo4j Date o None) a un array datetime64[D]
+    return np.array([to_date(d) for d in dates], dtype="datetime64[D]")
+
+
+def _split(dates):
+    months = dates.astype("datetime64[M]")
+    years = months.astype("datetime64[Y]").astype(np.int64) + 1970
+    month = months.astype(np.int64) % 12 + 1
+    day = (dates - months).astype(np.int64) + 1
+    return years, month, day, months
+
+
+def months_between_array(starts, ends):
+    # months_between elemento a elemento (ends puede ser una sola fecha). Donde hay NaT el valor no sirve
+    starts = np.asarray(starts, dtype="datetime64[D]")
+    ends = np.broadcast_to(np.asarray(ends, dtype="datetime64[D]"), starts.shape)
+    s_year, s_month, s_day, _ = _split(starts)
+    e_year, e_month, e_day, e_months = _split(ends)
+
+    months = (e_year - s_year) * 12 + (e_month - s_month)
+    end_of_month = (e_months + 1).astype("datetime64[D]") - 1 == ends
+    past = starts <= ends
+    months -= past & (s_day > e_day) & ~end_of_month
+    months += ~past & (e_day > s_day)
+    return months
+
+
+def recency_array(dates, today):
+    # recency_bucket(months_between(fecha, today)) para un array de fechas (NaT -> sin fecha)
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    months = months_between_array(dates, np.datetime64(today, "D"))
+    factors = np.select([months <= limit for limit, _ in RECENCY_BUCKETS], [f for _, f in RECENCY_BUCKETS], RECENCY_RESTO)
+    return np.where(np.isnat(dates), RECENCY_SIN_FECHA, factors)
+
+
+class ScoringClock:
+    """
+    'Hoy' fijado una sola vez por corrida de scoring (todas las recencias y experiencias
+    en curso se miden contra la misma fecha, aunque la corrida cruce la medianoche),
+    con los meses y la recencia memoizados por fecha distinta.
+    """
+
+    def __init__(self, today=None):
+        self.today = today or date.today()
+        self._months = {}
+
+    def months_since(self, d):
+        # Meses desde 'd' hasta hoy (None si no hay fecha)
+        d = to_date(d)
+        if not d:
+            return None
+        months = self._months.get(d)
+        if months is None:
+            months = self._months[d] = months_between(d, self.today)
+        return months
+
+    def recency(self, ultimo_uso):
+        return recency_bucket(self.months_since(ultimo_uso))
+
+    def months_until_today(self, start, end=None):
+        # Meses de una experiencia (sin fecha de fin = en curso hasta hoy); sin inicio no cuenta
+        start = to_date(start)
+        if not start:
+            return 0
+        return months_between(start, to_date(end) or self.today)
+
+    def recency_array(self, dates):
+        return recency_array(dates, self.today)
@@ -0,0 +1,136 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from itertools import groupby
+
+logger = logging.getLogger(__name__)
+
+
+class Metrics:
+    """
+    Registro simple de metricas en proceso: tiempos/observaciones (count, sum, max)
+    y contadores, con labels. Se exporta en formato texto de Prometheus o como JSON,
+    y se le pueden enganchar hooks propios (add_hook) para mandarlas a otro lado.
+    """
+
+    def __init__(self, prefix="workia"):
+        self.prefix = prefix
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._observations = {}  # (nombre, labels) -> [count, sum, max]
+        self._counters = {}      # (nombre, labels) -> valor
+        self._hooks = []
+
+    def add_hook(self, fn):
+        # fn(tipo, nombre, labels, valor) con tipo "observe" o "inc"
+        self._hooks.append(fn)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            obs = self._observations.get(key)
+            if obs is None:
+                self._observations[key] = [1, value, value]
+            else:
+                obs[0] += 1
+                obs[1] += value
+                if value > obs[2]:
+                    obs[2] = value
+        for hook in self._hooks:
+            hook("observe", name, labels, value)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        for hook in self._hooks:
+            hook("inc", name, labels, value)
+
+    def reset(self):
+        with self._lock:
+            self._observations.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "observations": [
+                    {"name": name, "labels": dict(labels), "count": c, "sum": s, "max": m, "mean": s / c}
+                    for (name, labels), (c, s, m) in self._observations.items()
+                ],
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": v}
+                    for (name, labels), v in self._counters.items()
+                ],
+            }
+
+    def render_prometheus(self):
+        # Formato de exposicion de texto de Prometheus (las observaciones como summary sin cuantiles)
+        def fmt_labels(labels):
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels) + "}"
+
+        lines = []
+        with self._lock:
+            typed = set()
+            observations = sorted(self._observations.items())
+            for name, group in groupby(observations, key=lambda item: item[0][0]):
+                group = list(group)
+                metric = f"{self.prefix}_{name}"
+                # Un summary solo admite _count y _sum: el maximo va en su propia familia (gauge)
+                lines.append(f"# TYPE {metric} summary")
+                for (_, labels), (c, s, _) in group:
+                    lines.append(f"{metric}_count{fmt_labels(labels)} {c}")
+                    lines.append(f"{metric}_sum{fmt_labels(labels)} {s}")
+                lines.append(f"# TYPE {metric}_max gauge")
+                for (_, labels), (_, _, m) in group:
+                    lines.append(f"{metric}_max{fmt_labels(labels)} {m}")
+            for (name, labels), v in sorted(self._counters.items()):
+                metric = f"{self.prefix}_{name}_total"
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} counter")
+                    typed.add(metric)
+                lines.append(f"{metric}{fmt_labels(labels)} {v}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def start_json_logger(metrics, interval=60, write=None, reset=False):
+    # Cada 'interval' segundos escribe un snapshot JSON (write recibe el string; por defecto va al
+    # logger de este modulo con nivel INFO). Devuelve un Event para frenarlo
+    write = write or logger.info
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            write(json.dumps({"timestamp": time.time(), **metrics.snapshot()}))
+            if reset:
+                metrics.reset()
+
+    threading.Thread(target=run, name="metrics-json-logger", daemon=True).start()
+    return stop
+
+
+# Registro global que usan Neo4jService, MatchingEngine y EmbeddingCache
+METRICS = Metrics()
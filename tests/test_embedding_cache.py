@@ -0,0 +1,45 @@
+"""
+Almacen en disco del EmbeddingCache: sobrevive reinicios y cada modelo tiene el suyo
+(cambiar de modelo en la misma carpeta no borra los vectores del otro).
+
+    python -m pytest -q tests
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.engine.embeddings import EmbeddingCache
+
+
+class CountingEncoder:
+    def __init__(self, offset=0.0):
+        self.offset = offset
+        self.calls = 0
+
+    def encode(self, texts, convert_to_numpy=True, batch_size=32, **kwargs):
+        self.calls += 1
+        return np.array([[len(t), 1.0 + self.offset, 2.0] for t in texts], dtype=np.float32)
+
+
+def test_disk_store_survives_restart(tmp_path):
+    first = EmbeddingCache(CountingEncoder(), disk_dir=str(tmp_path), model_name="modelo-a")
+    expected = first.get_many(["backend developer", "contador"])
+
+    encoder = CountingEncoder()
+    again = EmbeddingCache(encoder, disk_dir=str(tmp_path), model_name="modelo-a")
+    assert np.array_equal(again.get_many(["backend developer", "contador"]), expected)
+    assert encoder.calls == 0
+
+
+def test_each_model_keeps_its_own_store(tmp_path):
+    a = EmbeddingCache(CountingEncoder(), disk_dir=str(tmp_path), model_name="modelo-a")
+    emb_a = a.get("backend developer")
+    b = EmbeddingCache(CountingEncoder(offset=5.0), disk_dir=str(tmp_path), model_name="modelo-a:onnx")
+    emb_b = b.get("backend developer")
+    assert not np.array_equal(emb_a, emb_b)
+    assert a.disk_dir != b.disk_dir
+
+    encoder = CountingEncoder()
+    reopened = EmbeddingCache(encoder, disk_dir=str(tmp_path), model_name="modelo-a")
+    assert np.array_equal(reopened.get("backend developer"), emb_a)
+    assert encoder.calls == 0
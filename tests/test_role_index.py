@@ -0,0 +1,66 @@
+"""
+LazyRoleIndex: con pocos puestos no arma indice (se puntua a todos); por encima del umbral
+el prefiltro devuelve primero a los candidatos con puestos afines al titulo.
+
+    python -m pytest -q tests
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.engine.embeddings import EmbeddingCache
+from src.engine.role_index import LazyRoleIndex
+
+
+class WordEncoder:
+    # Un eje por palabra: los puestos con palabras en comun con el titulo quedan cerca
+    dim = 32
+
+    def encode(self, texts, convert_to_numpy=True, batch_size=32, **kwargs):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                out[i, sum(word.encode("utf-8")) % self.dim] += 1.0
+        return out
+
+
+class RolesDB:
+    def __init__(self, pairs):
+        self.pairs = pairs
+        self.calls = 0
+
+    def stream_candidate_roles(self):
+        self.calls += 1
+        return [{"email": email, "puesto": puesto} for email, puesto in self.pairs]
+
+
+PAIRS = [
+    ("ana@x.com", "Backend Developer"),
+    ("ana@x.com", "Contador"),
+    ("beto@x.com", "Vendedor"),
+    ("caro@x.com", "Backend Engineer"),
+    ("dani@x.com", "Disenador"),
+]
+
+
+def test_no_index_below_threshold():
+    lazy = LazyRoleIndex(EmbeddingCache(WordEncoder()), min_roles=10)
+    assert lazy.get(RolesDB(PAIRS)) is None
+
+
+def test_index_above_threshold_prefilters_by_role():
+    lazy = LazyRoleIndex(EmbeddingCache(WordEncoder()), min_roles=2)
+    index = lazy.get(RolesDB(PAIRS))
+    emails = [email for email, _ in index.search("Backend Developer", n=2)]
+    assert emails == ["ana@x.com", "caro@x.com"]
+
+
+def test_index_is_reused_until_ttl():
+    db = RolesDB(PAIRS)
+    lazy = LazyRoleIndex(EmbeddingCache(WordEncoder()), min_roles=2, ttl=600)
+    assert lazy.get(db) is lazy.get(db)
+    assert db.calls == 1
+    lazy.invalidate()
+    lazy.get(db)
+    assert db.calls == 2
+    assert LazyRoleIndex(None, enabled=False).get(db) is None
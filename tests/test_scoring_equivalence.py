@@ -0,0 +1,138 @@
+"""
+Los caminos rapidos del scoring tienen que dar exactamente lo mismo que el camino de dicts
+(MatchingEngine.calculate_total_score) y la aritmetica de fechas lo mismo que relativedelta.
+
+Corre sin Neo4j ni el modelo: la base es el fake de benchmarks/ y los embeddings salen de
+un encoder por palabras (roles con palabras en comun superan el umbral de afinidad).
+
+    python -m pytest -q tests
+"""
+import hashlib
+import random
+from datetime import date, timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+relativedelta = pytest.importorskip("dateutil.relativedelta").relativedelta
+pytest.importorskip("neo4j")
+
+from benchmarks.fake_neo4j import FakeDriver
+from benchmarks.synthetic import generate_dataset
+from src.database.neo4j_service import Neo4jService
+from src.engine.embeddings import EmbeddingCache
+from src.engine.matching import MatchingEngine
+from src.engine.records import CandidateProfile
+from src.engine.snapshot import MatchingSnapshot
+from src.utils.helpers import months_between, months_between_array
+
+
+class WordEncoder:
+    # Suma de un vector fijo por palabra: "developer backend senior" y "developer backend junior"
+    # quedan cerca, dos roles sin palabras en comun quedan lejos
+    dim = 64
+
+    def encode(self, texts, convert_to_numpy=True, batch_size=32, **kwargs):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                seed = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+                out[i] += np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return out
+
+
+@pytest.fixture(scope="module")
+def data():
+    return generate_dataset(300, n_offers=6, n_skills=40, seed=7)
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return MatchingEngine(embedding_cache=EmbeddingCache(WordEncoder()))
+
+
+@pytest.fixture(scope="module")
+def expected(data, engine):
+    # Camino de referencia: de a un par, con los dicts tal como salen de Neo4j
+    return {
+        offer['titulo']: [engine.calculate_total_score(c, offer) for c in data['candidates']]
+        for offer in data['offers']
+    }
+
+
+def _ranking(data, scores, top_k=None):
+    rows = [
+        {"email": c['email'], "nombre_completo": c['nombre_completo'], **s}
+        for c, s in zip(data['candidates'], scores)
+    ]
+    return sorted(rows, key=lambda r: r['final_score'], reverse=True)[:top_k]
+
+
+def _date_pairs(n, seed=0):
+    rng = random.Random(seed)
+    base = date(2000, 1, 1)
+    month_ends = [date(y, m, 1) - timedelta(days=1) for y in range(2000, 2030) for m in range(1, 13)]
+    pairs = []
+    for _ in range(n):
+        # Mitad fechas cualquiera, mitad fines de mes (31/01 -> 29/02, bisiestos, etc.)
+        pick = lambda: rng.choice(month_ends) if rng.random() < 0.5 else base + timedelta(days=rng.randrange(11000))
+        pairs.append((pick(), pick()))
+    return pairs
+
+
+def test_months_between_matches_relativedelta():
+    for start, end in _date_pairs(20000):
+        delta = relativedelta(end, start)
+        assert months_between(start, end) == delta.years * 12 + delta.months, (start, end)
+
+
+def test_months_between_array_matches_relativedelta():
+    pairs = _date_pairs(20000, seed=1)
+    starts = np.array([s for s, _ in pairs], dtype="datetime64[D]")
+    ends = np.array([e for _, e in pairs], dtype="datetime64[D]")
+    expected = [relativedelta(e, s).years * 12 + relativedelta(e, s).months for s, e in pairs]
+    assert months_between_array(starts, ends).tolist() == expected
+
+
+def test_experience_scores_are_not_trivial(data, expected):
+    # Si ninguna experiencia pasara el umbral de afinidad los tests de abajo no probarian nada
+    assert any(0.0 < s['exp_score'] < 1.0 for scores in expected.values() for s in scores)
+
+
+def test_records_and_compiled_offer_match_dict_path(data, engine, expected):
+    profiles = CandidateProfile.from_records(data['candidates'])
+    for offer in data['offers']:
+        compiled = engine.compile_offer(offer)
+        assert [engine.calculate_total_score(p, compiled) for p in profiles] == expected[offer['titulo']]
+
+
+def test_batch_scores_match_dict_path(data, engine, expected):
+    profiles = CandidateProfile.from_records(data['candidates'])
+    for offer in data['offers']:
+        assert engine.score_candidates(data['candidates'], offer) == expected[offer['titulo']]
+        assert engine.score_candidates(profiles, engine.compile_offer(offer)) == expected[offer['titulo']]
+
+
+def test_score_matrix_matches_dict_path(data, engine, expected):
+    rows = engine.score_matrix(data['candidates'], data['offers'])
+    for offer in data['offers']:
+        ranking = [{k: v for k, v in r.items() if k != 'oferta'} for r in rows if r['oferta'] == offer['titulo']]
+        assert ranking == _ranking(data, expected[offer['titulo']])
+
+
+def test_pushdown_scores_match_dict_path(data, engine, expected):
+    # Solo prueba el armado del ranking (rank_skill_scores): los scores tecnico y blando salen de la
+    # copia en Python de SKILL_SCORES_FOR_OFFER_QUERY del fake. La consulta Cypher real se prueba
+    # contra Neo4j en tests/test_skill_scores_pushdown.py
+    db = Neo4jService(driver=FakeDriver(data))
+    for offer in data['offers']:
+        rows = db.stream_skill_scores_for_offer(offer['titulo'])
+        ranking = engine.rank_skill_scores(rows, engine.compile_offer(offer), top_k=len(data['candidates']))
+        assert ranking == _ranking(data, expected[offer['titulo']])
+
+
+def test_snapshot_ranking_matches_dict_path(data, engine, expected):
+    snapshot = MatchingSnapshot.from_records(data['candidates'], data['offers'], engine.embedding_cache)
+    rankings = engine.rank_snapshot(snapshot, top_k=25)
+    for offer in data['offers']:
+        assert rankings[offer['titulo']] == _ranking(data, expected[offer['titulo']], 25)
@@ -0,0 +1,107 @@
+"""
+SKILL_SCORES_FOR_OFFER_QUERY (scoring tecnico y blando en Cypher) contra un Neo4j real:
+tiene que dar lo mismo que MatchingEngine.calculate_technical_score / calculate_soft_score.
+
+Necesita un servidor de prueba (se crean y se borran nodos con prefijo propio):
+
+    NEO4J_TEST_URI=bolt://localhost:7687 NEO4J_TEST_USER=neo4j NEO4J_TEST_PASSWORD=... \\
+        python -m pytest -q tests/test_skill_scores_pushdown.py
+
+Sin NEO4J_TEST_URI se saltea.
+"""
+import os
+from datetime import date
+
+import pytest
+
+pytest.importorskip("numpy")
+neo4j = pytest.importorskip("neo4j")
+
+if not os.getenv("NEO4J_TEST_URI"):
+    pytest.skip("NEO4J_TEST_URI no configurado (hace falta un Neo4j de prueba)", allow_module_level=True)
+
+from benchmarks.synthetic import generate_candidates, generate_offers, generate_skills
+from src.database.neo4j_service import Neo4jService
+from src.engine.matching import MatchingEngine
+
+PREFIX = "pushdown-test-"
+
+SETUP_CANDIDATES = """
+    UNWIND $candidatos AS cand
+    CREATE (c:Candidato {email: cand.email, nombre: cand.nombre, apellido: cand.apellido})
+    FOREACH (s IN cand.habilidades |
+        MERGE (h:Habilidad {nombre: s.nombre})
+        SET h.tipo = s.tipo
+        CREATE (c)-[:POSEE {nivel: s.nivel, ultimo_uso: s.ultimo_uso}]->(h)
+    )
+"""
+
+SETUP_OFFERS = """
+    UNWIND $ofertas AS oferta
+    CREATE (o:Oferta {titulo: oferta.titulo})
+    FOREACH (r IN oferta.requisitos |
+        MERGE (h:Habilidad {nombre: r.nombre})
+        SET h.tipo = r.tipo
+        CREATE (o)-[:REQUIERE {nivel_minimo: r.nivel_minimo, es_critica: r.es_critica}]->(h)
+    )
+"""
+
+TEARDOWN = """
+    MATCH (n) WHERE (n:Candidato AND n.email STARTS WITH $prefix)
+        OR (n:Oferta AND n.titulo STARTS WITH $prefix)
+        OR (n:Habilidad AND n.nombre STARTS WITH $prefix)
+    DETACH DELETE n
+"""
+
+
+@pytest.fixture(scope="module")
+def data():
+    skills = [{**s, "nombre": PREFIX + s["nombre"]} for s in generate_skills(40, seed=3)]
+    candidates = generate_candidates(200, skills, seed=3)
+    for c in candidates:
+        c["email"] = PREFIX + c["email"]
+    offers = generate_offers(6, skills, seed=3)
+    for o in offers:
+        o["titulo"] = PREFIX + o["titulo"]
+    return {"candidates": candidates, "offers": offers}
+
+
+@pytest.fixture(scope="module")
+def db(data):
+    driver = neo4j.GraphDatabase.driver(
+        os.getenv("NEO4J_TEST_URI"), auth=(os.getenv("NEO4J_TEST_USER", "neo4j"), os.getenv("NEO4J_TEST_PASSWORD"))
+    )
+    service = Neo4jService(driver=driver, database=os.getenv("NEO4J_TEST_DATABASE") or None)
+    service.run_write_query(TEARDOWN, {"prefix": PREFIX})
+    service.run_write_query(SETUP_CANDIDATES, {"candidatos": [
+        {
+            "email": c["email"],
+            "nombre": c["nombre_completo"].split()[0],
+            "apellido": c["nombre_completo"].split()[1],
+            "habilidades": [h for h in c["habilidades"] if h["nombre"] is not None],
+        }
+        for c in data["candidates"]
+    ]})
+    service.run_write_query(SETUP_OFFERS, {"ofertas": data["offers"]})
+    try:
+        yield service
+    finally:
+        service.run_write_query(TEARDOWN, {"prefix": PREFIX})
+        service.close()
+
+
+def test_cypher_skill_scores_match_python(data, db):
+    engine = MatchingEngine()
+    hoy = date.today()
+    emails = [c["email"] for c in data["candidates"]]
+    by_email = {c["email"]: c for c in data["candidates"]}
+
+    for offer in data["offers"]:
+        rows = list(db.stream_skill_scores_for_offer(offer["titulo"], emails, hoy))
+        assert sorted(r["email"] for r in rows) == sorted(emails)
+        for row in rows:
+            cand = by_email[row["email"]]
+            tech = engine.calculate_technical_score(cand["habilidades"], offer["requisitos"])
+            soft = engine.calculate_soft_score(cand["habilidades"], offer["requisitos"])
+            assert row["score_tecnico"] == pytest.approx(tech, rel=1e-12, abs=1e-12), (offer["titulo"], row["email"])
+            assert row["score_blando"] == pytest.approx(soft, rel=1e-12, abs=1e-12), (offer["titulo"], row["email"])